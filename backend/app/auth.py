@@ -1,75 +1,127 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
-from app.models import User
+from app.models import User, UserRole
+from app.services.password_hasher import check_password, hash_password
+from app.services.token_revocation import get_token_revocations
+from app.services.user_cache import get_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Bcrypt has a 72-byte limit, so truncate if necessary (must match get_password_hash)
-    password_bytes = plain_password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    # Ensure hashed_password is bytes
-    if isinstance(hashed_password, str):
-        hashed_password = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_password)
+    # Blocking; request handlers await get_password_hasher().verify instead
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    # Bcrypt has a 72-byte limit, so truncate if necessary
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    # Generate salt and hash password
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    # Blocking; request handlers await get_password_hasher().hash instead
+    return hash_password(password, settings.BCRYPT_ROUNDS)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+class TokenUser:
+    """
+    Current user built from verified token claims, without a database row.
+    Tokens are only issued to active users and revoked when that changes.
+    """
+    __slots__ = ('id', 'username', 'role', 'is_active', 'token_id', 'token_expires_at')
+
+    def __init__(self, claims: dict):
+        self.id = claims["uid"]
+        self.username = claims["sub"]
+        self.role = UserRole(claims["role"])
+        self.is_active = True
+        self.token_id = claims["jti"]
+        self.token_expires_at = datetime.utcfromtimestamp(claims["exp"])
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user: Optional[User] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    if user is not None:
+        # Signed claims let most endpoints authorize without loading the user
+        role = user.role or UserRole.STUDENT
+        to_encode.update({
+            "uid": user.id,
+            "role": role.value if isinstance(role, UserRole) else str(role),
+            "ver": user.token_version or 0
+        })
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_access_token(token: str, db: Session) -> dict:
+    """Verify the signature and expiry, and reject revoked tokens"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    if get_token_revocations().is_revoked(db, payload):
+        raise _credentials_exception("Token has been revoked")
+    return payload
+
+
+def _has_user_claims(payload: dict) -> bool:
+    return all(claim in payload for claim in ("uid", "role", "ver", "jti"))
+
+
+def _load_user(username: str, db: Session) -> User:
+    cache = get_user_cache()
+    if cache is not None:
+        user = cache.get_user(db, username)
+    else:
+        user = db.query(User).filter(User.username == username).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """The full user row (cached), for endpoints that need profile fields"""
+    payload = decode_access_token(token, db)
+    return _load_user(payload["sub"], db)
+
+
+def get_current_profile(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
+def get_current_active_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """
+    Authorize from the token claims alone (id, role, token version).
+    Tokens issued before those claims existed fall back to loading the user.
+    """
+    payload = decode_access_token(token, db)
+    if not _has_user_claims(payload):
+        return get_current_profile(_load_user(payload["sub"], db))
+    if db.in_transaction():
+        # End the revocation sync's read so its pooled connection isn't pinned by async routes
+        db.commit()
+    return TokenUser(payload)
+
+
 def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
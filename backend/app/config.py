@@ -9,11 +9,44 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./schoolsharthi.db"
+    DB_POOL_SIZE: int = 10  # Connections kept open per app worker (not used for SQLite)
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: int = 10  # Seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Reconnect connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True  # Test connections on checkout (survives DB restarts/idle kills)
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replicas for read-only endpoints (empty = primary only)
+    DB_REPLICA_RETRY_SECONDS: float = 30.0  # How long a failed replica is skipped before it is probed again
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0  # After a user's write, their reads stay on the primary this long
+    DB_READ_YOUR_WRITES_BACKEND: str = "memory"  # memory (per process) or redis (shared, uses REDIS_URL)
 
     # JWT
     SECRET_KEY: str = "change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0  # How often workers pick up tokens revoked elsewhere
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Cost of new password hashes (each step doubles the time)
+    PASSWORD_HASH_WORKERS: int = 0  # Hashing processes per app worker (0 = one per CPU core)
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Queued hashes before register/login answer 429
+
+    # Rate limiting (token buckets, '<count>/<second|minute|hour|day>' or 'off')
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or redis (shared, uses REDIS_URL)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Take the client IP from X-Forwarded-For (behind a proxy only)
+    RATE_LIMIT_LOGIN_IP: str = "10/minute"  # Login and register attempts per IP
+    RATE_LIMIT_AI_USER: str = "20/minute"  # AI doubt, questions and career requests per user
+    RATE_LIMIT_AI_IP: str = "200/minute"  # Generous: school networks share one IP
+    RATE_LIMIT_REVISION_USER: str = "30/minute"
+    RATE_LIMIT_REVISION_IP: str = "300/minute"
+    RATE_LIMIT_SEARCH_USER: str = "120/minute"  # Search-as-you-type
+    RATE_LIMIT_SEARCH_IP: str = "1200/minute"
+
+    # Authenticated user cache
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 60  # How long a resolved user is trusted without a database read
+    USER_CACHE_MAX_SIZE: int = 10000  # Cached users per worker (least recently used are evicted)
+    USER_CACHE_VERSION_CHECK_SECONDS: float = 1.0  # How often workers re-read the invalidation stamp
 
     # Supabase Storage
     SUPABASE_URL: Optional[str] = None
@@ -41,6 +74,28 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     GROQ_API_KEY: Optional[str] = None
 
+    # PYQ Analysis
+    CURRICULUM_VOCABULARY_PATH: Optional[str] = None  # JSON file overriding the built-in topic/chapter vocabulary
+    PYQ_ANALYSIS_WORKERS: int = 0  # Worker processes for batch analysis (0 = one per CPU core)
+    PYQ_BATCH_MAX_CONCURRENT: int = 1  # Batch analyses running at once per app worker; more answer 429
+    PYQ_INDEX_TTL_SECONDS: int = 600  # How long the mock-test posting index is reused before rebuilding
+
+    # Exam Mode
+    EXAM_ANSWER_DEBOUNCE_MS: int = 2000  # Clients flush buffered answers after this much idle time
+    EXAM_ANSWER_MAX_BATCH: int = 100  # Most answers accepted in one batch request
+    EXAM_SESSION_BACKEND: str = "auto"  # auto (redis when REDIS_URL is set, else memory), redis (shared), memory (single worker only) or database (no cache)
+    EXAM_SESSION_FLUSH_SECONDS: float = 5.0  # Write-behind interval for cached answers
+    REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    EXAM_TIMER_ENABLED: bool = True  # Auto-submit exams when their duration runs out
+    EXAM_SUBMIT_GRACE_SECONDS: int = 30  # Late answers are accepted for this long (network latency)
+    EXAM_AUTO_SUBMIT_BATCH: int = 200  # Expired exams submitted per database session
+    LEADERBOARD_BACKEND: str = "auto"  # auto (redis when REDIS_URL is set, else memory), redis (shared sorted sets) or memory (single worker only)
+    EXAM_ANALYSIS_CONCURRENCY: int = 4  # Background LLM calls generating exam analyses at once
+
+    # View/download counters (buffered, written back in batches)
+    COUNTER_BACKEND: str = "memory"  # memory (per process) or redis (shared, survives app crashes)
+    COUNTER_FLUSH_SECONDS: float = 10.0  # Write-back interval; at most this much is lost on a hard crash
+
     # CORS (string from env)
     CORS_ORIGINS: str = Field(
         default="http://localhost:3000,https://schoolsharthi.vercel.app"
@@ -48,6 +103,7 @@ class Settings(BaseSettings):
 
     # Environment
     ENVIRONMENT: str = "development"
+    WEB_CONCURRENCY: int = 1  # Worker processes serving the app (uvicorn/gunicorn take their worker count from it)
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,26 +1,215 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 
-# Use check_same_thread=False for SQLite compatibility
-connect_args = {}
-if settings.DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+
+class PoolMetrics:
+    """Checkout wait times and connections in use, for spotting pool exhaustion"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)  # seconds, most recent checkouts
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self._waits.append(seconds)
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def checked_in(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, in_use, peak = self.checkouts, self.timeouts, self.in_use, self.peak_in_use
+
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3) if waits else 0.0
+
+        return {
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'in_use': in_use,
+            'peak_in_use': peak,
+            'checkout_wait_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)}
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """Records how long each checkout waited for a free connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(poolclass) -> Dict:
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    }
+
+
+def engine_kwargs(url: str, poolclass=TimedQueuePool) -> Dict:
+    """create_engine arguments for a database URL (the primary or a read replica)"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # Use check_same_thread=False for SQLite compatibility
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(_pool_options(poolclass))
+    return options
+
 
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args=connect_args,
-    echo=False  # Set to True for SQL query logging
+    echo=False,  # Set to True for SQL query logging
+    **engine_kwargs(settings.DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checked_out()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.checked_in()
+
+
+event.listen(engine, "checkout", _on_checkout)
+event.listen(engine, "checkin", _on_checkin)
+
+
+def pool_status() -> Dict:
+    """Pool configuration and live usage (connections in use, checkout waits)"""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__, **pool_metrics.snapshot()}
+    if isinstance(pool, (TimedQueuePool, TimedAsyncQueuePool)):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(),
+                      max_overflow=settings.DB_MAX_OVERFLOW, timeout_seconds=settings.DB_POOL_TIMEOUT)
+    return status
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# ---------------- ASYNC ----------------
+
+def async_database_url(url: str) -> Tuple[str, Dict]:
+    """
+    The async driver URL for DATABASE_URL (asyncpg for PostgreSQL, aiosqlite for
+    SQLite) and the connect_args it needs
+    """
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    elif parsed.get_backend_name() in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes ssl as a connect argument, not libpq's sslmode query parameter
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"])
+            if sslmode != "disable":
+                connect_args["ssl"] = sslmode
+    return parsed.render_as_string(hide_password=False), connect_args
+
+
+def create_async_engine_for(url: str, poolclass=TimedAsyncQueuePool,
+                            connect_timeout: Optional[float] = None) -> AsyncEngine:
+    url, connect_args = async_database_url(url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        options.update(_pool_options(poolclass))
+        if connect_timeout:
+            connect_args["timeout"] = connect_timeout
+    return create_async_engine(url, connect_args=connect_args, **options)
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Created on first use, so scripts that only use the sync engine don't need the async drivers"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_async_engine_for(settings.DATABASE_URL)
+        event.listen(_async_engine.sync_engine, "checkout", _on_checkout)
+        event.listen(_async_engine.sync_engine, "checkin", _on_checkin)
+        _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db():
+    """
+    AsyncSession for async routes: queries are awaited instead of blocking the event
+    loop. Objects stay loaded after commit (expire_on_commit=False), since lazy loads
+    are not possible outside an await.
+    """
+    async with async_session() as db:
+        yield db
+
+
+def async_session() -> AsyncSession:
+    """A new AsyncSession on the primary (use as `async with async_session() as db`)"""
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
@@ -2,7 +2,8 @@
 Database Migration Utilities
 Handles schema migrations safely, especially for SQLite
 """
-from sqlalchemy import inspect, text
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
 from app.database import engine
 import logging
 
@@ -108,6 +109,102 @@ def add_column_sqlite_raw(table_name: str, column_name: str, column_type: str, d
             return False
 
 
+def column_is_nullable(table_name: str, column_name: str) -> bool:
+    """Whether the column accepts NULL (True when the table or column doesn't exist yet)"""
+    for column in inspect(engine).get_columns(table_name):
+        if column['name'] == column_name:
+            return column['nullable']
+    return True
+
+
+def drop_not_null(table_name: str, column_name: str) -> bool:
+    """
+    Allow NULL in a column declared NOT NULL by an older schema.
+    PostgreSQL alters the column in place; SQLite cannot, so the table is rebuilt
+    from its model definition (create, copy rows, drop, rename). Indexes are dropped
+    with the old table and recreated afterwards by create_model_indexes().
+    """
+    try:
+        if not table_exists(table_name) or column_is_nullable(table_name, column_name):
+            return False
+        
+        if not engine.url.drivername.startswith('sqlite'):
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL"))
+            logger.info(f"✅ Column '{column_name}' in '{table_name}' now allows NULL")
+            return True
+        
+        from app.database import Base
+        rebuilt_name = f"{table_name}__rebuild"
+        # Scratch metadata with the other tables, so foreign keys resolve by name
+        scratch = MetaData()
+        for table in Base.metadata.sorted_tables:
+            if table.name != table_name:
+                table.to_metadata(scratch)
+        rebuilt = Base.metadata.tables[table_name].to_metadata(scratch, name=rebuilt_name)
+        existing = {column['name'] for column in inspect(engine).get_columns(table_name)}
+        columns = ', '.join(column.name for column in rebuilt.columns if column.name in existing)
+        
+        # Foreign keys are not enforced (no PRAGMA foreign_keys), so rows referencing
+        # the table keep pointing at it by name across the drop and rename
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {rebuilt_name}"))
+            conn.execute(CreateTable(rebuilt))
+            conn.execute(text(f"INSERT INTO {rebuilt_name} ({columns}) SELECT {columns} FROM {table_name}"))
+            conn.execute(text(f"DROP TABLE {table_name}"))
+            conn.execute(text(f"ALTER TABLE {rebuilt_name} RENAME TO {table_name}"))
+        logger.info(f"✅ Rebuilt '{table_name}' so '{column_name}' allows NULL")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error dropping NOT NULL on '{table_name}.{column_name}': {e}")
+        return False
+
+
+def create_index_if_missing(index_name: str, table_name: str, columns: str, unique: bool = False) -> bool:
+    """
+    Create an index with CREATE INDEX IF NOT EXISTS (works on SQLite and PostgreSQL)
+    """
+    try:
+        if not table_exists(table_name):
+            logger.info(f"📋 Table '{table_name}' doesn't exist yet - will be created by create_all()")
+            return True
+        
+        unique_sql = "UNIQUE " if unique else ""
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+        logger.info(f"✅ Index '{index_name}' verified on '{table_name}'")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error creating index '{index_name}': {e}")
+        return False
+
+
+def create_model_indexes() -> list:
+    """
+    Create every index declared on the models (Index() in __table_args__ and
+    index=True columns) that the database doesn't have yet; create_all() only adds
+    indexes together with new tables
+    """
+    from app.database import Base
+    created = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine, checkfirst=True)
+                created.append(f"{table.name}.{index.name}")
+                logger.info(f"✅ Created index '{index.name}' on '{table.name}'")
+            except Exception as e:
+                logger.error(f"❌ Error creating index '{index.name}': {e}")
+    return created
+
+
 def verify_schema():
     """
     Verify and update database schema for required columns
@@ -123,6 +220,25 @@ def verify_schema():
         migrations_applied.append('doubts.detected_language')
         print("✅ detected_language column verified successfully")
     
+    # Migration: Add bank_question_id to exam_questions table
+    if add_column_sqlite_raw('exam_questions', 'bank_question_id', 'INTEGER'):
+        migrations_applied.append('exam_questions.bank_question_id')
+    
+    # Migration: Bank-backed exam questions store no text of their own
+    if drop_not_null('exam_questions', 'question_text'):
+        migrations_applied.append('exam_questions.question_text nullable')
+    
+    # Migration: Answer batches upsert on (exam_id, question_id)
+    if create_index_if_missing('unique_exam_question_attempt', 'exam_attempts', 'exam_id, question_id', unique=True):
+        migrations_applied.append('exam_attempts.unique_exam_question_attempt')
+    
+    # Migration: Token version claim for revoking a user's tokens
+    if add_column_sqlite_raw('users', 'token_version', 'INTEGER', '0'):
+        migrations_applied.append('users.token_version')
+    
+    # Migration: Indexes declared on the models (listing, history and per-exam access paths)
+    migrations_applied.extend(create_model_indexes())
+    
     if migrations_applied:
         logger.info(f"✅ Applied migrations: {', '.join(migrations_applied)}")
     else:
@@ -143,7 +259,9 @@ def ensure_tables_exist():
         
         required_tables = [
             'users', 'notes', 'pyqs', 'doubts', 'career_queries',
-            'exams', 'exam_questions', 'exam_attempts', 'exam_results'
+            'exams', 'exam_questions', 'exam_attempts', 'exam_results',
+            'pyq_questions', 'question_bank', 'exam_analyses', 'cache_versions',
+            'revoked_tokens'
         ]
         
         missing_tables = [table for table in required_tables if table not in existing_tables]
@@ -0,0 +1,254 @@
+"""
+Read Replica Routing
+Sends read-only endpoints to the DATABASE_REPLICA_URLS replicas (round-robin, skipping
+unhealthy ones) while writes stay on the primary; a user's reads stay on the primary
+for a short while after their own writes so they see them despite replication lag
+"""
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import settings
+from app.database import async_session, create_async_engine_for, engine_kwargs, get_db
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+READ_YOUR_WRITES_BACKENDS = ('memory', 'redis')
+
+# Give up on an unreachable replica quickly and fall through to the next one
+REPLICA_CONNECT_TIMEOUT_SECONDS = 3
+
+
+class Replica:
+    """One read replica: its engines (the async one created on first use) and health"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.label = make_url(url).render_as_string(hide_password=True)
+        options = engine_kwargs(url, poolclass=QueuePool)
+        if not url.startswith("sqlite"):
+            options["connect_args"] = {"connect_timeout": REPLICA_CONNECT_TIMEOUT_SECONDS}
+        self.engine = create_engine(url, **options)
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._async_engine = None
+        self._async_sessions: Optional[async_sessionmaker] = None
+        self.healthy = True
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def async_sessions(self) -> async_sessionmaker:
+        if self._async_sessions is None:
+            self._async_engine = create_async_engine_for(
+                self.url, poolclass=AsyncAdaptedQueuePool, connect_timeout=REPLICA_CONNECT_TIMEOUT_SECONDS
+            )
+            self._async_sessions = async_sessionmaker(self._async_engine, expire_on_commit=False)
+        return self._async_sessions
+
+    async def dispose(self):
+        self.engine.dispose()
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the replicas that are up.
+
+    A replica is marked down when connecting to it fails (pool_pre_ping tests every
+    checkout) and skipped for retry_seconds; the next request after that probes it
+    again. With every replica down, reads go to the primary.
+    """
+
+    def __init__(self, urls: List[str], retry_seconds: float = 30.0):
+        self.replicas = [Replica(url) for url in urls]
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self.primary_reads = 0
+
+    def candidates(self) -> List[Replica]:
+        """Replicas to try in order for one request, starting from the next in turn"""
+        now = time.monotonic()
+        start = next(self._counter)
+        count = len(self.replicas)
+        ordered = [self.replicas[(start + i) % count] for i in range(count)]
+        return [replica for replica in ordered if replica.healthy or now >= replica.retry_at]
+
+    def mark_down(self, replica: Replica, error: Exception):
+        with self._lock:
+            replica.failures += 1
+            replica.retry_at = time.monotonic() + self.retry_seconds
+            replica.last_error = str(error).splitlines()[0] if str(error) else type(error).__name__
+            if replica.healthy:
+                logger.warning(f"⚠️  Read replica {replica.label} is down, skipping it: {replica.last_error}")
+            replica.healthy = False
+
+    def count_primary_read(self):
+        with self._lock:
+            self.primary_reads += 1
+
+    def mark_up(self, replica: Replica):
+        if not replica.healthy:
+            with self._lock:
+                replica.healthy = True
+            logger.info(f"✅ Read replica {replica.label} is back")
+
+    def status(self) -> List[Dict]:
+        return [{
+            'replica': replica.label,
+            'healthy': replica.healthy,
+            'failures': replica.failures,
+            'last_error': replica.last_error
+        } for replica in self.replicas]
+
+
+class MemoryReadYourWrites:
+    """Per-process map of user -> time until which their reads go to the primary"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._until: Dict[str, float] = {}
+
+    def mark_write(self, user_key: str, seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_key] = now + seconds
+            if len(self._until) > self.max_keys:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+
+    def is_recent(self, user_key: str) -> bool:
+        until = self._until.get(user_key)
+        return until is not None and until > time.monotonic()
+
+
+class RedisReadYourWrites:
+    """Shared by every worker, so a write on one worker pins reads served by another"""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def mark_write(self, user_key: str, seconds: float):
+        self._redis.set(f'dbsticky:{user_key}', '1', px=max(1, int(seconds * 1000)))
+
+    def is_recent(self, user_key: str) -> bool:
+        return bool(self._redis.exists(f'dbsticky:{user_key}'))
+
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(',') if url.strip()]
+
+
+_router: Optional[ReplicaRouter] = None
+_read_your_writes = None
+_init_lock = threading.Lock()
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """Return the process-wide router, or None when no replicas are configured"""
+    global _router
+    if _router is None:
+        urls = replica_urls()
+        if not urls:
+            return None
+        with _init_lock:
+            if _router is None:
+                _router = ReplicaRouter(urls, retry_seconds=settings.DB_REPLICA_RETRY_SECONDS)
+                logger.info(f"📚 Routing reads to {len(urls)} replica(s)")
+    return _router
+
+
+def get_read_your_writes():
+    global _read_your_writes
+    if _read_your_writes is None:
+        backend_name = settings.DB_READ_YOUR_WRITES_BACKEND
+        if backend_name not in READ_YOUR_WRITES_BACKENDS:
+            raise ValueError(
+                f"Unknown DB_READ_YOUR_WRITES_BACKEND '{backend_name}'. Use one of {READ_YOUR_WRITES_BACKENDS}"
+            )
+        if backend_name == 'redis':
+            if not settings.REDIS_URL:
+                raise ValueError("DB_READ_YOUR_WRITES_BACKEND is 'redis' but REDIS_URL is not set")
+            _read_your_writes = RedisReadYourWrites(settings.REDIS_URL)
+        else:
+            _read_your_writes = MemoryReadYourWrites()
+    return _read_your_writes
+
+
+def replica_status() -> Dict:
+    router = get_replica_router()
+    if router is None:
+        return {'replicas': [], 'primary_reads': 0}
+    return {'replicas': router.status(), 'primary_reads': router.primary_reads}
+
+
+def _reads_from_primary(request: Request) -> bool:
+    # Set by ReadYourWritesMiddleware for users who wrote recently
+    return getattr(request.state, 'read_from_primary', False)
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: a healthy replica, or the primary when there are
+    no replicas, all are down, or the user wrote within DB_READ_YOUR_WRITES_SECONDS
+    """
+    router = get_replica_router()
+    if router is not None and not _reads_from_primary(request):
+        for replica in router.candidates():
+            db = replica.sessions()
+            try:
+                db.connection()  # check out now, so a dead replica falls through to the next
+            except DBAPIError as e:
+                db.close()
+                router.mark_down(replica, e)
+                continue
+            router.mark_up(replica)
+            try:
+                yield db
+            finally:
+                db.close()
+            return
+        router.count_primary_read()
+    yield from get_db()
+
+
+async def get_async_read_db(request: Request):
+    """AsyncSession counterpart of get_read_db"""
+    router = get_replica_router()
+    if router is not None and not _reads_from_primary(request):
+        for replica in router.candidates():
+            db = replica.async_sessions()()
+            try:
+                await db.connection()
+            except DBAPIError as e:
+                await db.close()
+                router.mark_down(replica, e)
+                continue
+            router.mark_up(replica)
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+        router.count_primary_read()
+    async with async_session() as db:
+        yield db
+
+
+async def dispose_replicas():
+    global _router
+    if _router is not None:
+        for replica in _router.replicas:
+            await replica.dispose()
+        _router = None
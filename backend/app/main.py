@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
@@ -7,11 +9,22 @@ from app.routers import (
     pyq_analysis, adaptive_learning, revision_mode, smart_search, exam_mode
 )
 
-from app.database import engine
+from app.database import dispose_async_engine, engine
 from app.config import settings
 from app.services.ai_service import initialize_ai_client
 from app.database_migrations import sync_database_schema
-from app.middleware import SecurityHeadersMiddleware, RequestLoggingMiddleware
+from app.middleware import (
+    SecurityHeadersMiddleware, RequestLoggingMiddleware, RateLimitMiddleware, ReadYourWritesMiddleware
+)
+from app.database_replicas import dispose_replicas, replica_urls
+from app.services.exam_session_store import get_exam_session_store
+from app.services.exam_timer import get_exam_timer
+from app.services.leaderboard import get_leaderboard
+from app.services.exam_analysis_queue import get_exam_analysis_queue
+from app.services.password_hasher import get_password_hasher
+from app.services.pyq_batch_analysis import get_batch_analysis_pool
+from app.services.view_counters import get_counter_buffer
+from app.services.pagination import NEXT_CURSOR_HEADER
 
 
 # ---------------- INIT ----------------
@@ -43,14 +56,52 @@ initialize_ai_client()
 
 # ---------------- APP ----------------
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Exam answers are written behind from the session cache; flush them on shutdown
+    exam_sessions = get_exam_session_store()
+    if exam_sessions is not None:
+        exam_sessions.start()
+    get_leaderboard().rebuild()
+    get_exam_analysis_queue().restore()
+    # Note views and downloads are buffered and written back in batches; flush on shutdown
+    counters = get_counter_buffer()
+    counters.start()
+    # Exam deadlines are restored from the database and enforced server-side
+    exam_timer = get_exam_timer()
+    if exam_timer is not None:
+        exam_timer.restore()
+        exam_timer.start()
+    yield
+    counters.stop()
+    if exam_timer is not None:
+        exam_timer.stop()
+    get_exam_analysis_queue().stop()
+    if exam_sessions is not None:
+        exam_sessions.stop()
+    get_password_hasher().shutdown()
+    get_batch_analysis_pool().shutdown()
+    await dispose_async_engine()
+    await dispose_replicas()
+
+
 app = FastAPI(
     title="SchoolSharthi API",
     description="Indian Education Platform API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# ---------------- CORS ----------------
+# ---------------- RATE LIMITS ----------------
+
+# Added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
 
+# Read-only endpoints use replicas; users who just wrote read from the primary
+if replica_urls():
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# ---------------- CORS ----------------
 
 app.add_middleware(
     CORSMiddleware,
@@ -58,6 +109,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "Retry-After", NEXT_CURSOR_HEADER],
 )
 
 
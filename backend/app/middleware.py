@@ -1,12 +1,32 @@
 """
 Security middleware for production
 """
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 from fastapi import status
+from jose import JWTError, jwt
+from app.config import settings
+from app.services.rate_limiter import get_rate_limiter
+from app.database_replicas import get_read_your_writes
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
+
+def token_user_id(request: Request):
+    """The user id (or username for older tokens) in a valid bearer token, else None"""
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("uid") or payload.get("sub")
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Add security headers to all responses"""
@@ -41,3 +61,75 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             print(f"[{request.method}] {request.url.path} - {response.status_code} - {process_time:.3f}s")
         
         return response
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Token-bucket limits for sign-in, AI, revision and search routes (429 when exhausted)"""
+    
+    @staticmethod
+    def _client_ip(request: Request):
+        if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else None
+    
+    async def dispatch(self, request: Request, call_next):
+        limiter = get_rate_limiter()
+        group = limiter.match(request.method, request.url.path) if limiter else None
+        if group is None:
+            return await call_next(request)
+        
+        try:
+            # The Redis backend is a blocking client; keep it off the event loop
+            result = await run_in_threadpool(limiter.check, group, token_user_id(request), self._client_ip(request))
+        except Exception as e:
+            # A rate-limit store outage must not take the API down with it
+            logger.warning(f"⚠️  Rate limit check failed for {request.url.path}: {e}")
+            result = None
+        
+        if result is not None and not result.allowed:
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Too many requests, please slow down"},
+                headers=result.headers()
+            )
+        
+        response = await call_next(request)
+        if result is not None:
+            response.headers.update(result.headers())
+        return response
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """
+    Remember signed-in users' successful writes, and route their reads to the primary
+    for DB_READ_YOUR_WRITES_SECONDS afterwards (only added when replicas are configured)
+    """
+    
+    WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+    
+    async def dispatch(self, request: Request, call_next):
+        user_id = token_user_id(request)
+        if user_id is None:
+            return await call_next(request)
+        
+        tracker = get_read_your_writes()
+        user_key = str(user_id)
+        if request.method in self.WRITE_METHODS:
+            response = await call_next(request)
+            if response.status_code < 400:
+                try:
+                    await run_in_threadpool(tracker.mark_write, user_key, settings.DB_READ_YOUR_WRITES_SECONDS)
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not record write for read-your-writes: {e}")
+            return response
+        
+        try:
+            # Blocking Redis call, so it runs in the threadpool like the rate limit check
+            request.state.read_from_primary = await run_in_threadpool(tracker.is_recent, user_key)
+        except Exception as e:
+            # Without the store we can't tell, so read from the primary to be safe
+            logger.warning(f"⚠️  Read-your-writes check failed, reading from the primary: {e}")
+            request.state.read_from_primary = True
+        return await call_next(request)
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
+import random
 
 
 class UserRole(str, enum.Enum):
@@ -42,6 +43,10 @@ class ExamType(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Admin user list, newest first
+        Index("ix_users_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -50,12 +55,21 @@ class User(Base):
     full_name = Column(String, nullable=True)
     role = Column(SQLEnum(UserRole), default=UserRole.STUDENT)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0)  # Bumped to revoke every token issued so far
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Approved listings, newest first: unfiltered, by class (and subject), by subject
+        Index("ix_notes_approved_created", "is_approved", "created_at", "id"),
+        Index("ix_notes_approved_class_subject_created", "is_approved", "class_level", "subject", "created_at", "id"),
+        Index("ix_notes_approved_subject_created", "is_approved", "subject", "created_at", "id"),
+        # Admin list of every note
+        Index("ix_notes_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -77,6 +91,13 @@ class Note(Base):
 
 class PYQ(Base):
     __tablename__ = "pyqs"
+    __table_args__ = (
+        # Approved listings by year then upload time; analysis scans one exam type at a time
+        Index("ix_pyqs_approved_year_created", "is_approved", "year", "created_at", "id"),
+        Index("ix_pyqs_approved_exam_year_created", "is_approved", "exam_type", "year", "created_at", "id"),
+        # Admin list of every PYQ
+        Index("ix_pyqs_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -97,8 +118,40 @@ class PYQ(Base):
     uploader = relationship("User", backref="pyqs")
 
 
+class PYQQuestion(Base):
+    """Individual question parsed from a PYQ paper (curriculum-scale question store)"""
+    __tablename__ = "pyq_questions"
+    __table_args__ = (
+        # Analysis filters on exam/subject and groups by year, chapter, topic or question hash
+        Index("ix_pyq_questions_exam_subject_year", "exam_type", "subject", "year"),
+        Index("ix_pyq_questions_exam_subject_chapter", "exam_type", "subject", "chapter", "year"),
+        Index("ix_pyq_questions_exam_subject_topic", "exam_type", "subject", "topic", "year"),
+        Index("ix_pyq_questions_exam_subject_hash", "exam_type", "subject", "question_hash"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    pyq_id = Column(Integer, ForeignKey("pyqs.id"), nullable=True, index=True)  # Source paper, if uploaded
+    exam_type = Column(SQLEnum(ExamType), nullable=False)
+    year = Column(Integer, nullable=False)
+    class_level = Column(SQLEnum(ClassLevel), nullable=True)
+    subject = Column(SQLEnum(Subject), nullable=True)
+    question_number = Column(Integer, nullable=True)
+    question_text = Column(Text, nullable=False)
+    question_hash = Column(String(40), nullable=False)  # SHA-1 of normalized text, for repeat detection
+    chapter = Column(String, nullable=True)
+    topic = Column(String, nullable=True)
+    marks = Column(Integer, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    pyq = relationship("PYQ", backref="questions")
+
+
 class Doubt(Base):
     __tablename__ = "doubts"
+    __table_args__ = (
+        # Doubt history pages are keyset-scanned per user, newest first
+        Index("ix_doubts_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -116,6 +169,9 @@ class Doubt(Base):
 
 class CareerQuery(Base):
     __tablename__ = "career_queries"
+    __table_args__ = (
+        Index("ix_career_queries_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -128,6 +184,10 @@ class CareerQuery(Base):
 
 class Exam(Base):
     __tablename__ = "exams"
+    __table_args__ = (
+        # Exam list pages are keyset-scanned per user, newest first
+        Index("ix_exams_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -145,23 +205,56 @@ class Exam(Base):
     user = relationship("User", backref="exams")
 
 
+class QuestionBankItem(Base):
+    """Reusable exam question shared by every exam that samples it"""
+    __tablename__ = "question_bank"
+    __table_args__ = (
+        # Exam creation filters on these and range-scans random_key to sample k rows
+        Index("ix_question_bank_sampling", "subject", "class_level", "exam_type", "difficulty", "random_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    subject = Column(SQLEnum(Subject), nullable=True)
+    class_level = Column(SQLEnum(ClassLevel), nullable=True)
+    exam_type = Column(SQLEnum(ExamType), nullable=True)
+    difficulty = Column(String, default="medium")  # easy, medium, hard
+    question_text = Column(Text, nullable=False)
+    options = Column(Text, nullable=True)  # JSON string: ["option1", "option2", ...]
+    correct_answer = Column(String, nullable=True)  # Option index or text
+    marks = Column(Integer, default=1)
+    pyq_question_id = Column(Integer, ForeignKey("pyq_questions.id"), nullable=True)  # Source PYQ, if any
+    random_key = Column(Float, nullable=False, default=random.random)  # Uniform key for O(k) sampling
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class ExamQuestion(Base):
     __tablename__ = "exam_questions"
+    __table_args__ = (
+        # An exam's questions are always loaded together, in order
+        Index("ix_exam_questions_exam_number", "exam_id", "question_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exam_id = Column(Integer, ForeignKey("exams.id"), nullable=False)
     question_number = Column(Integer, nullable=False)
-    question_text = Column(Text, nullable=False)
+    bank_question_id = Column(Integer, ForeignKey("question_bank.id"), nullable=True)  # Shared bank question
+    # Text, options and answer are only stored here for questions not taken from the bank
+    question_text = Column(Text, nullable=True)
     options = Column(Text, nullable=True)  # JSON string: ["option1", "option2", ...]
     correct_answer = Column(String, nullable=True)  # Option index or text
     marks = Column(Integer, default=1)
     difficulty = Column(String, default="medium")  # easy, medium, hard
 
     exam = relationship("Exam", backref="questions")
+    bank_question = relationship("QuestionBankItem")
 
 
 class ExamAttempt(Base):
     __tablename__ = "exam_attempts"
+    __table_args__ = (
+        # One attempt per question; answer batches upsert against this
+        UniqueConstraint("exam_id", "question_id", name="unique_exam_question_attempt"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exam_id = Column(Integer, ForeignKey("exams.id"), nullable=False)
@@ -192,3 +285,46 @@ class ExamResult(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     exam = relationship("Exam", backref="result", uselist=False)
+
+
+class ExamAnalysis(Base):
+    """AI performance analysis of a submitted exam, one row per language"""
+    __tablename__ = "exam_analyses"
+    __table_args__ = (
+        UniqueConstraint("exam_id", "language", name="unique_exam_analysis_language"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    exam_id = Column(Integer, ForeignKey("exams.id"), nullable=False)
+    language = Column(String, nullable=False)  # 'hindi', 'hinglish', 'english'
+    status = Column(String, default="pending", index=True)  # pending, running, ready, failed
+    analysis = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    exam = relationship("Exam", backref="analyses")
+
+
+class CacheVersion(Base):
+    """Version stamp per in-process cache; bumping it invalidates the cache in every worker"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RevokedToken(Base):
+    """
+    Revoked access tokens, kept until the tokens would have expired anyway.
+    A row revokes one token (jti) or every token of a user below min_version.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, nullable=True)
+    user_id = Column(Integer, nullable=True)  # No FK: rows outlive deleted users
+    min_version = Column(Integer, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
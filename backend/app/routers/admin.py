@@ -1,11 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db, pool_status
+from app.database_replicas import replica_status
 from app.models import Note, PYQ, User
 from app.schemas import NoteCreate, NoteResponse, PYQCreate, PYQResponse
 from app.auth import get_current_admin_user
 from app.services.supabase_storage_service import upload_file_to_supabase
+from app.services.pyq_question_store import DEFAULT_BATCH_SIZE, ingest_questions_file
+from app.services.pyq_index import invalidate_posting_index
+from app.services.question_bank import import_bank_questions_file
+from app.services.user_cache import get_user_cache, invalidate_user_cache
+from app.services.token_revocation import get_token_revocations
+from app.services.pagination import NEXT_CURSOR_HEADER, check_page_size, paginate
 from app.models import ClassLevel, Subject, ExamType
 
 router = APIRouter()
@@ -44,7 +52,7 @@ async def upload_note(
     file: UploadFile = File(...),
     thumbnail: UploadFile = File(None),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Normalize and validate input - CRITICAL: Normalize exactly once before validation
     subject_normalized = subject.strip().lower() if subject else ""
@@ -117,13 +125,13 @@ async def upload_note(
         )
         
         db.add(note)
-        db.commit()
-        db.refresh(note)
+        await db.commit()
+        await db.refresh(note)
         
         return note
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error_msg = str(e)
         if "enum" in error_msg.lower() or "invalid input value" in error_msg.lower():
             raise HTTPException(
@@ -145,7 +153,7 @@ async def upload_pyq(
     answer_key: UploadFile = File(None),
     solution: UploadFile = File(None),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Normalize and validate input - CRITICAL: Normalize exactly once before validation
     exam_type_normalized = exam_type.strip().lower() if exam_type else ""
@@ -226,13 +234,14 @@ async def upload_pyq(
         )
         
         db.add(pyq)
-        db.commit()
-        db.refresh(pyq)
+        await db.commit()
+        await db.refresh(pyq)
+        invalidate_posting_index()
         
         return pyq
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error_msg = str(e)
         if "enum" in error_msg.lower() or "invalid input value" in error_msg.lower():
             raise HTTPException(
@@ -243,15 +252,71 @@ async def upload_pyq(
         raise HTTPException(status_code=500, detail=f"Database error: {error_msg}")
 
 
+@router.post("/pyq-questions/import")
+def import_pyq_questions(
+    file: UploadFile = File(...),
+    batch_size: int = Form(DEFAULT_BATCH_SIZE),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Bulk import parsed PYQ questions from a JSON-lines file.
+    Each line: {"question_text", "exam_type", "year", "subject"?, "class_level"?,
+    "chapter"?, "topic"?, "marks"?, "pyq_id"?, "question_number"?}
+    The upload is streamed in batches, so very large files are never held in memory.
+    """
+    if batch_size < 1 or batch_size > 50000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 50000")
+    try:
+        stats = ingest_questions_file(file.file, batch_size=batch_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    
+    return {"message": f"Imported {stats['inserted']} questions ({stats['skipped']} skipped)", **stats}
+
+
+@router.post("/question-bank/import")
+def import_question_bank(
+    file: UploadFile = File(...),
+    batch_size: int = Form(DEFAULT_BATCH_SIZE),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Bulk import exam questions into the shared question bank from a JSON-lines file.
+    Each line: {"question_text", "options": [...], "correct_answer", "difficulty"?,
+    "subject"?, "class_level"?, "exam_type"?, "marks"?, "pyq_question_id"?}
+    """
+    if batch_size < 1 or batch_size > 50000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 50000")
+    try:
+        stats = import_bank_questions_file(file.file, batch_size=batch_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    
+    return {"message": f"Imported {stats['inserted']} bank questions ({stats['skipped']} skipped)", **stats}
+
+
+def _page(response: Response, query, created_column, id_column, limit: int, cursor: Optional[str], skip: int):
+    """Newest-first keyset page (offset when skip is sent); the next cursor goes in a header"""
+    try:
+        rows, next_cursor = paginate(query, created_column, id_column, check_page_size(limit), cursor, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
 @router.get("/notes/pending", response_model=List[NoteResponse])
 def get_pending_notes(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    notes = db.query(Note).filter(Note.is_approved == False).offset(skip).limit(limit).all()
-    return notes
+    query = db.query(Note).filter(Note.is_approved == False)
+    return _page(response, query, Note.created_at, Note.id, limit, cursor, skip)
 
 
 @router.post("/notes/{note_id}/approve")
@@ -289,24 +354,26 @@ def delete_note(
 
 @router.get("/notes/all", response_model=List[NoteResponse])
 def get_all_notes(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    notes = db.query(Note).order_by(Note.created_at.desc()).offset(skip).limit(limit).all()
-    return notes
+    return _page(response, db.query(Note), Note.created_at, Note.id, limit, cursor, skip)
 
 
 @router.get("/pyqs/all", response_model=List[PYQResponse])
 def get_all_pyqs(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    pyqs = db.query(PYQ).order_by(PYQ.created_at.desc()).offset(skip).limit(limit).all()
-    return pyqs
+    return _page(response, db.query(PYQ), PYQ.created_at, PYQ.id, limit, cursor, skip)
 
 
 @router.delete("/pyqs/{pyq_id}")
@@ -321,6 +388,7 @@ def delete_pyq(
     
     db.delete(pyq)
     db.commit()
+    invalidate_posting_index()
     
     return {"message": "PYQ deleted successfully"}
 
@@ -338,19 +406,21 @@ def approve_pyq(
     pyq.is_approved = True
     db.commit()
     db.refresh(pyq)
+    invalidate_posting_index()
     
     return {"message": "PYQ approved successfully"}
 
 
 @router.get("/users/all")
 def get_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    users = db.query(User).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-    return users
+    return _page(response, db.query(User), User.created_at, User.id, limit, cursor, skip)
 
 
 @router.post("/users/{user_id}/toggle-active")
@@ -368,6 +438,9 @@ def toggle_user_active(
     
     user.is_active = not user.is_active
     db.commit()
+    if not user.is_active:
+        get_token_revocations().revoke_user(db, user.id)
+    invalidate_user_cache(db)
     db.refresh(user)
     
     return {"message": f"User {'activated' if user.is_active else 'deactivated'} successfully", "user": user}
@@ -386,6 +459,9 @@ def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Tokens carry their own claims, so revoke them before the row disappears
+    get_token_revocations().revoke_user(db, user_id)
+    
     # Delete related records first to avoid foreign key constraint errors
     from app.models import Doubt, CareerQuery, Note, PYQ
     
@@ -404,6 +480,7 @@ def delete_user(
     # Now delete the user
     db.delete(user)
     db.commit()
+    invalidate_user_cache(db)
     
     return {"message": "User deleted successfully"}
 
@@ -421,11 +498,29 @@ def make_user_admin(
     from app.models import UserRole
     user.role = UserRole.ADMIN
     db.commit()
+    # The role claim in the user's current tokens is stale; the next login carries the new one
+    get_token_revocations().revoke_user(db, user.id)
+    invalidate_user_cache(db)
     db.refresh(user)
     
     return {"message": "User promoted to admin successfully", "user": user}
 
 
+@router.get("/stats/user-cache")
+def get_user_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Hit rate and size of this worker's authenticated-user cache"""
+    cache = get_user_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/stats/db-pool")
+def get_db_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """Connections in use and checkout wait times of this worker's database pool, and replica health"""
+    return {**pool_status(), **replica_status()}
+
+
 @router.post("/settings/ai-key")
 def update_ai_key(
     api_key: str = Form(...),
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import Doubt, User
 from app.schemas import (
-    DoubtCreate, DoubtResponse,
+    DoubtCreate, DoubtResponse, DoubtSummary,
     ImportantQuestionsRequest, ImportantQuestionsResponse,
     PYQPatternRequest, PYQPatternResponse,
     StepByStepSolutionRequest, StepByStepSolutionResponse
@@ -18,6 +20,7 @@ from app.services.ai_service import (
     get_step_by_step_solution,
     detect_language
 )
+from app.services.pagination import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, check_page_size, keyset_page
 
 router = APIRouter()
 
@@ -30,7 +33,7 @@ router = APIRouter()
 async def ask_doubt(
     doubt: DoubtCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Detect language from question
     detected_lang = detect_language(doubt.question)
@@ -45,8 +48,9 @@ async def ask_doubt(
         detected_language=detected_lang
     )
     db.add(db_doubt)
-    db.commit()
-    db.refresh(db_doubt)
+    # Committing without a refresh hands the connection back to the pool while the
+    # LLM answers (it can take seconds); the doubt reloads when it is updated below
+    await db.commit()
 
     # Get AI response
     try:
@@ -64,8 +68,8 @@ async def ask_doubt(
         else:
             db_doubt.ai_response = "AI service is not configured properly."
 
-        db.commit()
-        db.refresh(db_doubt)
+        await db.commit()
+        await db.refresh(db_doubt)
 
     except Exception as e:
         error_type = type(e).__name__
@@ -73,8 +77,8 @@ async def ask_doubt(
         print(f"AI service error ({error_type}): {error_msg}")
 
         db_doubt.ai_response = f"Error generating AI response: {error_msg}"
-        db.commit()
-        db.refresh(db_doubt)
+        await db.commit()
+        await db.refresh(db_doubt)
 
     return db_doubt
 
@@ -155,18 +159,46 @@ async def get_step_by_step(
 # 📜 User Doubts History
 # ============================================================
 
-@router.get("/doubts", response_model=List[DoubtResponse])
+# Characters of the AI answer shown in the history list
+DOUBT_PREVIEW_CHARS = 280
+
+
+@router.get("/doubts", response_model=List[DoubtSummary])
 def get_user_doubts(
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = Query(None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    doubts = (
-        db.query(Doubt)
-        .filter(Doubt.user_id == current_user.id)
-        .order_by(Doubt.created_at.desc())
-        .all()
-    )
-    return doubts
+    """
+    Newest-first doubt history, one page at a time.
+
+    Only a preview of each AI answer is read from the database; pass the
+    X-Next-Cursor response header back as cursor for the next page and use
+    /doubts/{id} for the full answer.
+    """
+    query = db.query(
+        Doubt.id,
+        Doubt.question,
+        Doubt.subject,
+        Doubt.chapter,
+        Doubt.detected_language,
+        func.substr(Doubt.ai_response, 1, DOUBT_PREVIEW_CHARS).label("ai_response_preview"),
+        Doubt.ai_response.isnot(None).label("has_response"),
+        Doubt.is_resolved,
+        Doubt.created_at
+    ).filter(Doubt.user_id == current_user.id)
+
+    try:
+        rows, next_cursor = keyset_page(query, Doubt.created_at, Doubt.id, check_page_size(limit), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return rows
 
 
 @router.get("/doubts/{doubt_id}", response_model=DoubtResponse)
@@ -1,31 +1,45 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import User
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
-from app.auth import verify_password, get_password_hash, create_access_token, get_current_active_user
+from app.auth import create_access_token, get_current_active_user, get_current_profile
+from app.services.password_hasher import PasswordHasherBusy, get_password_hasher
+from app.services.token_revocation import get_token_revocations
 from app.config import settings
 
 router = APIRouter()
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many sign-in requests right now, please retry in a moment",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user exists
-    db_user = db.query(User).filter(
+    db_user = (await db.execute(select(User).where(
         (User.email == user.email) | (User.username == user.username)
-    ).first()
+    ).limit(1))).scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email or username already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user; the connection goes back to the pool while bcrypt runs
+    await db.commit()
+    try:
+        hashed_password = await get_password_hasher().hash(user.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     from app.models import UserRole
     # Set role if provided, otherwise default to STUDENT
     user_role = user.role if user.role else UserRole.STUDENT
@@ -37,15 +51,25 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user_role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_credentials.username).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(
+        select(User).where(User.username == user_credentials.username).limit(1)
+    )).scalars().first()
+    # The connection goes back to the pool while bcrypt runs
+    await db.commit()
+    try:
+        password_ok = user is not None and await get_password_hasher().verify(
+            user_credentials.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -56,11 +80,20 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=access_token_expires, user=user
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+def read_users_me(current_user: User = Depends(get_current_profile)):
     return current_user
+
+
+@router.post("/logout")
+def logout(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    # Only tokens with an id can be revoked; older tokens simply expire
+    token_id = getattr(current_user, "token_id", None)
+    if token_id:
+        get_token_revocations().revoke_token(db, token_id, current_user.id, current_user.token_expires_at)
+    return {"message": "Logged out successfully"}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import CareerQuery, User
 from app.schemas import CareerQueryCreate, CareerQueryResponse
 from app.auth import get_current_active_user
@@ -14,7 +15,7 @@ router = APIRouter()
 async def ask_career_question(
     query: CareerQueryCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Create career query record
     db_query = CareerQuery(
@@ -22,8 +23,9 @@ async def ask_career_question(
         query=query.query
     )
     db.add(db_query)
-    db.commit()
-    db.refresh(db_query)
+    # Committing without a refresh hands the connection back to the pool while the
+    # LLM answers; the query reloads when it is updated below
+    await db.commit()
     
     # Get AI response with guidance type
     try:
@@ -33,8 +35,8 @@ async def ask_career_question(
         else:
             # If AI service returns None (no API key configured), set a helpful message
             db_query.ai_response = "AI service is not configured. Please configure GROQ_API_KEY or OPENAI_API_KEY in the admin panel."
-        db.commit()
-        db.refresh(db_query)
+        await db.commit()
+        await db.refresh(db_query)
     except NameError as e:
         # Handle undefined name errors (like _call_openai)
         error_msg = str(e)
@@ -42,8 +44,8 @@ async def ask_career_question(
         import traceback
         traceback.print_exc()
         db_query.ai_response = f"AI service configuration error: {error_msg}. Please restart the server or check the AI service code."
-        db.commit()
-        db.refresh(db_query)
+        await db.commit()
+        await db.refresh(db_query)
     except Exception as e:
         # If AI service fails, set error message
         error_type = type(e).__name__
@@ -52,8 +54,8 @@ async def ask_career_question(
         import traceback
         traceback.print_exc()
         db_query.ai_response = f"Error generating AI response ({error_type}): {error_msg}. Please check if the API key is configured correctly."
-        db.commit()
-        db.refresh(db_query)
+        await db.commit()
+        await db.refresh(db_query)
     
     return db_query
 
@@ -2,15 +2,22 @@
 Exam Mode Router
 Real exam simulation with timer, scoring, and analytics
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, Exam, ExamQuestion, ExamAttempt, ExamResult, Subject, ClassLevel, ExamType
+from app.models import User, Exam, ExamQuestion, ExamAttempt, ExamResult, QuestionBankItem, Subject, ClassLevel, ExamType
 from app.auth import get_current_active_user
+from app.config import settings
 from app.services.exam_service import (
-    create_exam, start_exam, submit_answer, submit_exam,
-    analyze_exam_performance
+    create_exam, start_exam, submit_answer, submit_answers, submit_exam
 )
+from app.services.question_bank import parse_options
+from app.services.exam_session_store import get_exam_session_store
+from app.services.exam_timer import exam_deadline, get_exam_timer, is_past_deadline
+from app.services.leaderboard import board_key, get_leaderboard
+from app.services.exam_analysis_queue import get_exam_analysis_queue, normalize_language, preferred_language
+from app.services.pagination import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, check_page_size, keyset_page
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime
@@ -33,6 +40,10 @@ class SubmitAnswerRequest(BaseModel):
     time_spent_seconds: Optional[int] = 0
 
 
+class SubmitAnswersRequest(BaseModel):
+    answers: List[SubmitAnswerRequest]
+
+
 class ExamResponse(BaseModel):
     id: int
     title: str
@@ -121,6 +132,11 @@ def start_exam_route(
             raise HTTPException(status_code=404, detail="Exam not found")
         
         exam = start_exam(db, exam_id)
+        
+        # Auto-submit when the duration runs out
+        timer = get_exam_timer()
+        if timer is not None:
+            timer.schedule(exam.id, exam_deadline(exam.started_at, exam.duration_minutes))
         return exam
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -142,18 +158,26 @@ def get_exam_questions(
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     
-    questions = db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam_id).order_by(ExamQuestion.question_number).all()
+    # Bank questions keep their text and options in the shared bank row
+    questions = db.query(
+        ExamQuestion.id,
+        ExamQuestion.question_number,
+        func.coalesce(ExamQuestion.question_text, QuestionBankItem.question_text).label("question_text"),
+        func.coalesce(ExamQuestion.options, QuestionBankItem.options).label("options"),
+        ExamQuestion.marks,
+        ExamQuestion.difficulty
+    ).outerjoin(
+        QuestionBankItem, ExamQuestion.bank_question_id == QuestionBankItem.id
+    ).filter(ExamQuestion.exam_id == exam_id).order_by(ExamQuestion.question_number).all()
     
-    # Parse options from JSON
+    # Parse options from JSON (cached, shared bank options are decoded once)
     result = []
-    import json
     for q in questions:
-        options = json.loads(q.options) if q.options else []
         result.append({
             "id": q.id,
             "question_number": q.question_number,
             "question_text": q.question_text,
-            "options": options,
+            "options": list(parse_options(q.options)),
             "marks": q.marks,
             "difficulty": q.difficulty
         })
@@ -171,6 +195,23 @@ def submit_answer_route(
     """
     Submit an answer for a question
     """
+    store = get_exam_session_store()
+    if store is not None:
+        # Hot path: graded and recorded in memory, written behind to exam_attempts
+        try:
+            outcome = store.record_answers(db, exam_id, current_user.id, [request.model_dump()])
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Exam not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if outcome["rejected"]:
+            raise HTTPException(status_code=400, detail="Question not found")
+        return {
+            "success": True,
+            "is_correct": outcome["results"][0]["is_correct"],
+            "message": "Answer submitted successfully"
+        }
+    
     try:
         # Verify exam belongs to user and is in progress
         exam = db.query(Exam).filter(Exam.id == exam_id, Exam.user_id == current_user.id).first()
@@ -180,6 +221,9 @@ def submit_answer_route(
         if exam.status != "in_progress":
             raise HTTPException(status_code=400, detail="Exam is not in progress")
         
+        if is_past_deadline(exam_deadline(exam.started_at, exam.duration_minutes)):
+            raise HTTPException(status_code=400, detail="Exam time is over")
+        
         attempt = submit_answer(
             db=db,
             exam_id=exam_id,
@@ -199,14 +243,85 @@ def submit_answer_route(
         raise HTTPException(status_code=500, detail=f"Error submitting answer: {str(e)}")
 
 
+def answer_sync_contract() -> Dict:
+    """
+    Debounce contract for clients batching answers:
+    - buffer answers locally, one entry per question (a newer answer replaces the older)
+    - send the buffer after debounce_ms without a new answer, or once it holds max_batch_size answers
+    - keep at most one batch in flight; answers given meanwhile go into the next batch
+    - flush when the page is hidden or closed, and always before POST /submit
+    - on failure keep the batch and retry it merged with newer answers (last answer wins)
+    """
+    return {
+        "debounce_ms": settings.EXAM_ANSWER_DEBOUNCE_MS,
+        "max_batch_size": settings.EXAM_ANSWER_MAX_BATCH
+    }
+
+
+@router.post("/{exam_id}/answers")
+def submit_answers_route(
+    exam_id: int,
+    request: SubmitAnswersRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit a batch of answers at once (see answer_sync_contract for the client contract)
+    """
+    if len(request.answers) > settings.EXAM_ANSWER_MAX_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.EXAM_ANSWER_MAX_BATCH} answers per batch"
+        )
+    answers = [answer.model_dump() for answer in request.answers]
+    try:
+        store = get_exam_session_store()
+        if store is not None:
+            outcome = store.record_answers(db, exam_id, current_user.id, answers)
+        else:
+            # Verify exam belongs to user and is in progress
+            exam = db.query(Exam.status, Exam.started_at, Exam.duration_minutes).filter(
+                Exam.id == exam_id, Exam.user_id == current_user.id
+            ).first()
+            if not exam:
+                raise HTTPException(status_code=404, detail="Exam not found")
+            
+            if exam.status != "in_progress":
+                raise HTTPException(status_code=400, detail="Exam is not in progress")
+            
+            if is_past_deadline(exam_deadline(exam.started_at, exam.duration_minutes)):
+                raise HTTPException(status_code=400, detail="Exam time is over")
+            
+            outcome = submit_answers(db, exam_id, answers)
+        
+        return {
+            "success": True,
+            **outcome,
+            "sync": answer_sync_contract(),
+            "message": f"{outcome['saved']} answers submitted successfully"
+        }
+    except HTTPException:
+        raise
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error submitting answers: {str(e)}")
+
+
 @router.post("/{exam_id}/submit", response_model=ResultResponse)
 def submit_exam_route(
     exam_id: int,
+    language: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Submit exam and calculate results
+    Submit exam and calculate results.
+    The performance analysis is generated in the background, in `language` or the
+    student's preferred language.
     """
     try:
         # Verify exam belongs to user
@@ -214,7 +329,22 @@ def submit_exam_route(
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         
-        result = submit_exam(db, exam_id)
+        timer = get_exam_timer()
+        if timer is not None:
+            timer.cancel(exam_id)
+        
+        # Write back answers still held in the session cache before scoring
+        store = get_exam_session_store()
+        if store is not None:
+            result, _ = store.submit(db, exam_id)
+        else:
+            result, _ = submit_exam(db, exam_id)
+        
+        try:
+            get_exam_analysis_queue().enqueue_for_submitted_exam(db, exam_id, language)
+        except Exception as e:
+            # Analysis can still be requested later from /analysis
+            print(f"⚠️ Could not queue exam analysis for exam {exam_id}: {e}")
         
         # Parse weak_topics from JSON
         import json
@@ -279,42 +409,129 @@ def get_exam_result(
 
 
 @router.get("/{exam_id}/analysis")
-async def get_exam_analysis(
+def get_exam_analysis(
     exam_id: int,
-    language: Optional[str] = "hinglish",
+    language: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get AI-powered performance analysis for exam
+    Get AI-powered performance analysis for exam.
+    Served from storage; status is 'pending' or 'running' while it is still being
+    generated (poll again), and a missing or failed analysis is queued on request.
     """
     # Verify exam belongs to user
-    exam = db.query(Exam).filter(Exam.id == exam_id, Exam.user_id == current_user.id).first()
+    exam = db.query(Exam.status).filter(Exam.id == exam_id, Exam.user_id == current_user.id).first()
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     
-    if language not in ['hindi', 'hinglish', 'english']:
-        language = 'hinglish'
+    language = normalize_language(language) if language else preferred_language(db, current_user.id)
+    
+    if exam.status != "submitted":
+        return {"exam_id": exam_id, "analysis": "", "language": language, "status": "not_submitted"}
     
-    analysis = await analyze_exam_performance(db, exam_id, language)
+    analysis = get_exam_analysis_queue().enqueue(db, exam_id, language)
     
     return {
         "exam_id": exam_id,
-        "analysis": analysis,
-        "language": language
+        "analysis": analysis.analysis if analysis.status == "ready" else None,
+        "language": language,
+        "status": analysis.status
     }
 
 
 @router.get("/list")
 def list_user_exams(
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = Query(None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    List all exams for the current user
+    List the current user's exams, newest first, one page at a time
+    (pass the X-Next-Cursor response header back as cursor for the next page)
+    """
+    query = db.query(
+        Exam.id,
+        Exam.title,
+        Exam.subject,
+        Exam.class_level,
+        Exam.exam_type,
+        Exam.duration_minutes,
+        Exam.total_questions,
+        Exam.status,
+        Exam.started_at,
+        Exam.submitted_at,
+        Exam.created_at
+    ).filter(Exam.user_id == current_user.id)
+    
+    try:
+        rows, next_cursor = keyset_page(query, Exam.created_at, Exam.id, check_page_size(limit), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return [row._asdict() for row in rows]
+
+
+@router.get("/leaderboard")
+def get_exam_leaderboard(
+    subject: Optional[Subject] = None,
+    class_level: Optional[ClassLevel] = None,
+    exam_type: Optional[ExamType] = None,
+    limit: int = 10,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
     """
-    exams = db.query(Exam).filter(Exam.user_id == current_user.id).order_by(Exam.created_at.desc()).all()
-    return exams
+    Top results for a (subject, class_level, exam_type) leaderboard
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    leaderboard = get_leaderboard()
+    top = leaderboard.top(board_key(subject, class_level, exam_type), limit)
+    
+    # One IN query for the names on the board
+    names = dict(
+        db.query(User.id, User.username).filter(User.id.in_({entry["user_id"] for entry in top})).all()
+    ) if top else {}
+    for entry in top:
+        entry["username"] = names.get(entry["user_id"])
+    
+    return {
+        "subject": subject.value if subject else None,
+        "class_level": class_level.value if class_level else None,
+        "exam_type": exam_type.value if exam_type else None,
+        "top": top
+    }
+
+
+@router.get("/{exam_id}/rank")
+def get_exam_rank(
+    exam_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank and percentile of a submitted exam within its leaderboard
+    """
+    exam = db.query(
+        Exam.subject, Exam.class_level, Exam.exam_type, ExamResult.percentage
+    ).join(ExamResult, ExamResult.exam_id == Exam.id).filter(
+        Exam.id == exam_id, Exam.user_id == current_user.id
+    ).first()
+    if not exam:
+        raise HTTPException(status_code=404, detail="Result not found. Submit the exam first.")
+    
+    standing = get_leaderboard().standing(
+        board_key(exam.subject, exam.class_level, exam.exam_type),
+        exam.percentage or 0
+    )
+    return {"exam_id": exam_id, **standing}
 
 
 @router.get("/{exam_id}", response_model=ExamResponse)
@@ -1,9 +1,11 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database_replicas import get_read_db
 from app.models import Note, ClassLevel, Subject
 from app.schemas import NoteResponse
+from app.services.pagination import NEXT_CURSOR_HEADER, paginate
+from app.services.view_counters import get_counter_buffer
 from app.utils.url_rewrite import rewrite_file_url
 
 router = APIRouter()
@@ -11,12 +13,14 @@ router = APIRouter()
 
 @router.get("/", response_model=List[NoteResponse])
 def get_notes(
+    response: Response,
     class_level: Optional[str] = Query(None),
     subject: Optional[str] = Query(None),
     chapter: Optional[str] = Query(None),
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset paging; prefer cursor"),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page"),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(Note).filter(Note.is_approved == True)
 
@@ -46,12 +50,12 @@ def get_notes(
     if chapter and chapter.strip():
         query = query.filter(Note.chapter.ilike(f"%{chapter}%"))
 
-    notes = (
-        query.order_by(Note.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    try:
+        notes, next_cursor = paginate(query, Note.created_at, Note.id, limit, cursor, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     # ✅ Rewrite file & thumbnail URLs
     for note in notes:
@@ -64,7 +68,7 @@ def get_notes(
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
-def get_note(note_id: int, db: Session = Depends(get_db)):
+def get_note(note_id: int, db: Session = Depends(get_read_db)):
     note = (
         db.query(Note)
         .filter(Note.id == note_id, Note.is_approved == True)
@@ -74,10 +78,9 @@ def get_note(note_id: int, db: Session = Depends(get_db)):
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
 
-    # Increment view count
-    note.views_count += 1
-    db.commit()
-    db.refresh(note)
+    # Buffered and written back in batches; show the count including pending views
+    pending = get_counter_buffer().increment('notes', note.id, 'views_count')
+    note.views_count = (note.views_count or 0) + pending
 
     if note.file_url:
         note.file_url = rewrite_file_url(note.file_url)
@@ -88,7 +91,7 @@ def get_note(note_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{note_id}/download")
-def download_note(note_id: int, db: Session = Depends(get_db)):
+def download_note(note_id: int, db: Session = Depends(get_read_db)):
     note = (
         db.query(Note)
         .filter(Note.id == note_id, Note.is_approved == True)
@@ -108,9 +111,7 @@ def download_note(note_id: int, db: Session = Depends(get_db)):
             ),
         )
 
-    # Increment download count
-    note.download_count += 1
-    db.commit()
+    get_counter_buffer().increment('notes', note.id, 'download_count')
 
     file_url = rewrite_file_url(note.file_url)
 
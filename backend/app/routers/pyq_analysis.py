@@ -3,10 +3,12 @@ PYQ Analysis API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database_replicas import get_read_db
 from app.models import ExamType, Subject
-from app.auth import get_current_active_user
-from app.services.pyq_analyzer import PYQAnalyzer
+from app.auth import get_current_active_user, get_current_admin_user
+from app.services.pyq_analyzer import PYQAnalyzer, ANALYSIS_SOURCES, get_analyzer
+from app.services.weightage_trends import PREDICTION_METHODS
+from app.services.pyq_batch_analysis import BatchAnalysisBusy, run_batch_analysis
 from typing import Optional, List
 from pydantic import BaseModel
 
@@ -25,13 +27,16 @@ def get_repeated_questions(
     exam_type: ExamType = Query(...),
     subject: Optional[Subject] = Query(None),
     years: Optional[str] = Query(None, description="Comma-separated years, e.g., '2020,2021,2022'"),
+    source: str = Query("papers", description="'papers' (PYQ titles) or 'questions' (per-question store)"),
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Detect repeated questions across years"""
+    if source not in ANALYSIS_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Invalid source: '{source}'. Valid values: {list(ANALYSIS_SOURCES)}")
     try:
         year_list = [int(y.strip()) for y in years.split(',')] if years else None
-        analyzer = PYQAnalyzer(db)
+        analyzer = get_analyzer(db, source)
         result = analyzer.detect_repeated_questions(exam_type, subject, year_list)
         return result
     except Exception as e:
@@ -43,13 +48,16 @@ def get_important_chapters(
     exam_type: ExamType = Query(...),
     subject: Optional[Subject] = Query(None),
     years: Optional[str] = Query(None),
+    source: str = Query("papers", description="'papers' (PYQ titles) or 'questions' (per-question store)"),
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Find important chapters based on PYQ frequency"""
+    if source not in ANALYSIS_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Invalid source: '{source}'. Valid values: {list(ANALYSIS_SOURCES)}")
     try:
         year_list = [int(y.strip()) for y in years.split(',')] if years else None
-        analyzer = PYQAnalyzer(db)
+        analyzer = get_analyzer(db, source)
         result = analyzer.find_important_chapters(exam_type, subject, year_list)
         return result
     except Exception as e:
@@ -61,24 +69,54 @@ def get_weightage_prediction(
     exam_type: ExamType = Query(...),
     subject: Optional[Subject] = Query(None),
     years: Optional[str] = Query(None),
+    method: str = Query("trend", description="Predictor: 'trend' or 'exponential'"),
+    source: str = Query("papers", description="'papers' (PYQ titles) or 'questions' (per-question store)"),
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Predict topic weightage based on historical data"""
+    if source not in ANALYSIS_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Invalid source: '{source}'. Valid values: {list(ANALYSIS_SOURCES)}")
+    if method not in PREDICTION_METHODS:
+        raise HTTPException(status_code=400, detail=f"Invalid method: '{method}'. Valid values: {list(PREDICTION_METHODS)}")
     try:
         year_list = [int(y.strip()) for y in years.split(',')] if years else None
-        analyzer = PYQAnalyzer(db)
-        result = analyzer.predict_weightage(exam_type, subject, year_list)
+        analyzer = get_analyzer(db, source)
+        result = analyzer.predict_weightage(exam_type, subject, year_list, method)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error predicting weightage: {str(e)}")
 
 
+@router.get("/weightage-prediction/batch")
+def get_weightage_prediction_batch(
+    exam_type: ExamType = Query(...),
+    subjects: Optional[str] = Query(None, description="Comma-separated subjects, e.g., 'physics,chemistry'. Defaults to all"),
+    years: Optional[str] = Query(None),
+    method: str = Query("trend", description="Predictor: 'trend' or 'exponential'"),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    """Predict topic weightage for several subjects in one call"""
+    if method not in PREDICTION_METHODS:
+        raise HTTPException(status_code=400, detail=f"Invalid method: '{method}'. Valid values: {list(PREDICTION_METHODS)}")
+    try:
+        subject_list = [Subject(s.strip().lower()) for s in subjects.split(',') if s.strip()] if subjects else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid subjects: '{subjects}'. Valid values: {[s.value for s in Subject]}")
+    try:
+        year_list = [int(y.strip()) for y in years.split(',')] if years else None
+        analyzer = PYQAnalyzer(db)
+        return analyzer.predict_weightage_batch(exam_type, subject_list, year_list, method)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting weightage: {str(e)}")
+
+
 @router.post("/mock-test")
 def generate_mock_test(
     request: MockTestRequest,
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Generate mock test based on PYQ patterns"""
     try:
@@ -99,23 +137,58 @@ def get_full_analysis(
     exam_type: ExamType = Query(...),
     subject: Optional[Subject] = Query(None),
     years: Optional[str] = Query(None),
+    source: str = Query("papers", description="'papers' (PYQ titles) or 'questions' (per-question store)"),
+    streaming: bool = Query(False, description="Single streaming pass with constant memory (papers source)"),
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get complete PYQ analysis"""
+    if source not in ANALYSIS_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Invalid source: '{source}'. Valid values: {list(ANALYSIS_SOURCES)}")
     try:
         year_list = [int(y.strip()) for y in years.split(',')] if years else None
-        analyzer = PYQAnalyzer(db)
+        analyzer = get_analyzer(db, source)
+        
+        if streaming and source == 'papers':
+            analysis = analyzer.analyze_stream(exam_type, subject, year_list)
+        else:
+            analysis = {
+                'repeated_questions': analyzer.detect_repeated_questions(exam_type, subject, year_list),
+                'important_chapters': analyzer.find_important_chapters(exam_type, subject, year_list),
+                'weightage_prediction': analyzer.predict_weightage(exam_type, subject, year_list)
+            }
         
         return {
-            'repeated_questions': analyzer.detect_repeated_questions(exam_type, subject, year_list),
-            'important_chapters': analyzer.find_important_chapters(exam_type, subject, year_list),
-            'weightage_prediction': analyzer.predict_weightage(exam_type, subject, year_list),
+            **analysis,
             'summary': {
                 'exam_type': exam_type.value,
                 'subject': subject.value if subject else 'All',
-                'years_analyzed': year_list or 'All available years'
+                'years_analyzed': year_list or 'All available years',
+                'source': source
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error performing analysis: {str(e)}")
+
+
+@router.get("/batch-analysis")
+def get_batch_analysis(
+    exam_types: Optional[str] = Query(None, description="Comma-separated exam types. Defaults to all"),
+    subjects: Optional[str] = Query(None, description="Comma-separated subjects. Defaults to all"),
+    years: Optional[str] = Query(None),
+    workers: Optional[int] = Query(None, ge=1, le=64, description="Partitions analyzed at once (at most PYQ_ANALYSIS_WORKERS)"),
+    current_user = Depends(get_current_admin_user)
+):
+    """Analyze every (exam_type, subject) pair in parallel worker processes (admin only)"""
+    try:
+        exam_type_list = [ExamType(e.strip().lower()) for e in exam_types.split(',') if e.strip()] if exam_types else None
+        subject_list = [Subject(s.strip().lower()) for s in subjects.split(',') if s.strip()] if subjects else None
+        year_list = [int(y.strip()) for y in years.split(',')] if years else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+    try:
+        return run_batch_analysis(exam_type_list, subject_list, year_list, max_workers=workers)
+    except BatchAnalysisBusy as e:
+        raise HTTPException(status_code=429, detail=f"{str(e)}, try again later")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error performing batch analysis: {str(e)}")
@@ -1,9 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database_replicas import get_read_db
 from app.models import PYQ, ExamType, ClassLevel, Subject
 from app.schemas import PYQResponse
+from app.services.pagination import NEXT_CURSOR_HEADER, paginate
 from app.utils.url_rewrite import rewrite_file_url
 
 router = APIRouter()
@@ -24,13 +25,15 @@ def parse_enum(enum_cls, value: Optional[str]):
 
 @router.get("/", response_model=List[PYQResponse])
 def get_pyqs(
+    response: Response,
     exam_type: Optional[str] = Query(None),
     class_level: Optional[str] = Query(None),
     subject: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset paging; prefer cursor"),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page"),
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(PYQ).filter(PYQ.is_approved == True)
 
@@ -51,13 +54,12 @@ def get_pyqs(
     if year:
         query = query.filter(PYQ.year == year)
 
-    pyqs = (
-        query
-        .order_by(PYQ.year.desc(), PYQ.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    try:
+        pyqs, next_cursor = paginate(query, PYQ.created_at, PYQ.id, limit, cursor, skip, lead_column=PYQ.year)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     # Rewrite URLs
     for pyq in pyqs:
@@ -3,8 +3,8 @@ Ultra Fast Smart Search Router
 Google-style unified search across notes, PYQs, and chapters
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database_replicas import get_async_read_db
 from app.models import User
 from app.auth import get_current_active_user
 from app.services.smart_search_service import unified_search
@@ -35,7 +35,7 @@ class SearchResponse(BaseModel):
 async def search(
     request: SearchRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Unified search across notes, PYQs, and chapters
@@ -81,7 +81,7 @@ async def quick_search(
     type: Optional[str] = Query("all", description="Search type: all, notes, pyqs, chapters"),
     limit: Optional[int] = Query(20, description="Max results"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Quick search endpoint - simpler GET interface
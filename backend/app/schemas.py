@@ -111,6 +111,22 @@ class DoubtResponse(BaseModel):
         from_attributes = True
 
 
+class DoubtSummary(BaseModel):
+    """History entry without the full AI answer (fetch /doubts/{id} for that)"""
+    id: int
+    question: str
+    subject: Optional[Subject] = None
+    chapter: Optional[str] = None
+    detected_language: Optional[str] = 'english'
+    ai_response_preview: Optional[str] = None
+    has_response: bool = False
+    is_resolved: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # Important Questions Schema
 class ImportantQuestionsRequest(BaseModel):
     subject: Subject
@@ -0,0 +1,100 @@
+"""
+Bulk Insert Helpers
+Multi-row INSERT, upsert and Postgres COPY paths shared by the bulk write services
+"""
+import csv
+import io
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import Table, and_
+
+
+def iter_batches(rows: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """Group a row stream into lists of at most batch_size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_rows(conn, table: Table, columns: Sequence[str], rows: List[Dict]):
+    """Postgres fast path: stream rows through COPY ... FROM STDIN as CSV"""
+    # Enum and other typed columns must be sent exactly as SQLAlchemy stores them
+    processors = {
+        name: table.c[name].type.bind_processor(conn.dialect)
+        for name in columns
+    }
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = []
+        for name in columns:
+            value = row.get(name)
+            processor = processors[name]
+            if processor is not None and value is not None:
+                value = processor(value)
+            values.append(r'\N' if value is None else value)
+        writer.writerow(values)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(conn, table: Table, columns: Sequence[str], rows: List[Dict],
+                copy_threshold: Optional[int] = None):
+    """
+    Insert rows in one statement on the given connection (no commit).
+
+    Uses COPY on Postgres when copy_threshold is set and the batch reaches it,
+    otherwise a single executemany INSERT (batched into multi-row VALUES by the driver).
+    """
+    if not rows:
+        return
+    if copy_threshold is not None and len(rows) >= copy_threshold and conn.dialect.name == 'postgresql':
+        copy_rows(conn, table, columns, rows)
+    else:
+        conn.execute(table.insert(), [{name: row.get(name) for name in columns} for row in rows])
+
+
+def upsert_rows(conn, table: Table, rows: List[Dict], conflict_columns: Sequence[str],
+                update_columns: Sequence[str]):
+    """
+    Insert rows or overwrite update_columns where conflict_columns already exist.
+
+    One INSERT ... ON CONFLICT DO UPDATE on Postgres and SQLite (conflict_columns
+    must be covered by a unique index); other dialects fall back to UPDATE, then
+    INSERT when nothing was updated, row by row.
+    """
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            match = and_(*[table.c[name] == row[name] for name in conflict_columns])
+            updated = conn.execute(
+                table.update().where(match).values({name: row[name] for name in update_columns})
+            )
+            if updated.rowcount == 0:
+                conn.execute(table.insert().values(row))
+        return
+
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={name: stmt.excluded[name] for name in update_columns}
+    )
+    conn.execute(stmt)
@@ -0,0 +1,270 @@
+"""
+Curriculum Matcher
+Prebuilt Aho-Corasick automaton that finds every topic and chapter of the curriculum
+vocabulary in a single pass over a PYQ title
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from app.config import settings
+
+
+# Default curriculum vocabulary (can be overridden with CURRICULUM_VOCABULARY_PATH)
+DEFAULT_CURRICULUM_VOCABULARY = {
+    # topic -> keywords; a topic matches when any keyword occurs in the text
+    'topics': {
+        'mechanics': ['motion', 'force', 'momentum', 'energy', 'work', 'power'],
+        'optics': ['light', 'lens', 'mirror', 'refraction', 'reflection'],
+        'electricity': ['current', 'voltage', 'resistance', 'circuit', 'electric'],
+        'magnetism': ['magnetic', 'field', 'induction', 'flux'],
+        'waves': ['wave', 'frequency', 'amplitude', 'oscillation'],
+        'thermodynamics': ['heat', 'temperature', 'entropy', 'thermodynamics'],
+        'atoms': ['atom', 'electron', 'proton', 'nucleus'],
+        'organic': ['organic', 'compound', 'reaction', 'molecule'],
+        'inorganic': ['inorganic', 'element', 'periodic'],
+        'biochemistry': ['biochemistry', 'enzyme', 'protein', 'dna']
+    },
+    # Chapter names used when no structured chapter reference is found
+    'chapters': [
+        'motion', 'force', 'energy', 'waves', 'optics', 'electricity',
+        'magnetism', 'atoms', 'nuclei', 'semiconductors', 'communication'
+    ],
+    # "<word> <suffix>" phrases are chapters, e.g. "ray optics", "electromagnetic waves"
+    'chapter_suffixes': ['wave', 'waves', 'mechanics', 'optics', 'electricity', 'magnetism'],
+    # "chapter 5" / "ch. 5" style references
+    'chapter_markers': ['chapter', 'ch.']
+}
+
+GENERAL = 'general'
+
+_TOPIC = 0
+_CHAPTER = 1
+_SUFFIX = 2
+_MARKER = 3
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class CurriculumMatcher:
+    """
+    Match topics and chapters with one automaton built once from the vocabulary.
+
+    Every vocabulary term (topic keywords, fallback chapters, chapter suffixes and
+    chapter markers) is inserted into a single Aho-Corasick automaton, so a text is
+    scanned exactly once regardless of vocabulary size, and overlapping terms are all
+    reported (e.g. "electromagnetic waves" yields the chapter and the "waves" topic).
+    """
+
+    def __init__(self, vocabulary: Optional[Dict] = None):
+        self.vocabulary = vocabulary or DEFAULT_CURRICULUM_VOCABULARY
+        self.topic_order = list(self.vocabulary.get('topics', {}).keys())
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int, Optional[str]]]] = [[]]
+        self._build()
+
+    # ---------------- AUTOMATON ----------------
+
+    def _add_term(self, term: str, kind: int, label: Optional[str]):
+        term = term.lower()
+        if not term:
+            return
+        state = 0
+        for ch in term:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(term), kind, label))
+
+    def _build(self):
+        for topic, keywords in self.vocabulary.get('topics', {}).items():
+            for keyword in keywords:
+                self._add_term(keyword, _TOPIC, topic)
+        for chapter in self.vocabulary.get('chapters', []):
+            self._add_term(chapter, _CHAPTER, chapter.lower())
+        for suffix in self.vocabulary.get('chapter_suffixes', []):
+            # Singular/plural forms ("wave"/"waves") share one phrase group
+            self._add_term(suffix, _SUFFIX, suffix.lower().rstrip('s'))
+        for marker in self.vocabulary.get('chapter_markers', []):
+            self._add_term(marker, _MARKER, marker.lower())
+
+        # Breadth-first construction of failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # Fold failure links into a full transition table so scanning never backtracks
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        for state in range(1, len(self._goto)):
+            self._delta.append({})
+        for state in self._bfs_order():
+            if state == 0:
+                continue
+            transitions = dict(self._delta[self._fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+
+    def _bfs_order(self) -> List[int]:
+        order = [0]
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            for next_state in self._goto[state].values():
+                order.append(next_state)
+                queue.append(next_state)
+        return order
+
+    def _scan(self, text: str) -> List[Tuple[int, int, int, Optional[str]]]:
+        """Return (start, length, kind, label) for every vocabulary hit in text"""
+        delta = self._delta
+        output = self._output
+        hits = []
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if output[state]:
+                for length, kind, label in output[state]:
+                    hits.append((i - length + 1, length, kind, label))
+        return hits
+
+    # ---------------- CHAPTER HELPERS ----------------
+
+    @staticmethod
+    def _phrase_before(text: str, start: int, end: int, floor: int) -> Optional[str]:
+        """
+        Return "<word> <suffix>" when the suffix at start is preceded by whitespace and a
+        word; the word may not reach back before floor (the end of the previous match)
+        """
+        pos = start - 1
+        if pos < floor or not text[pos].isspace():
+            return None
+        while pos >= floor and text[pos].isspace():
+            pos -= 1
+        word_end = pos + 1
+        while pos >= floor and _is_word_char(text[pos]):
+            pos -= 1
+        if pos + 1 == word_end:
+            return None
+        return text[pos + 1:end]
+
+    @staticmethod
+    def _number_after(text: str, end: int, marker: str) -> Optional[Tuple[str, int]]:
+        """Return the chapter number following a "chapter"/"ch." marker and where it ends"""
+        pos = end
+        length = len(text)
+        while pos < length and text[pos].isspace():
+            pos += 1
+        # "chapter" needs at least one space before the number, "ch." does not
+        if marker == 'chapter' and pos == end:
+            return None
+        digits_start = pos
+        # isdecimal() is the regex \d class; isdigit() would also take e.g. superscripts
+        while pos < length and text[pos].isdecimal():
+            pos += 1
+        if pos == digits_start:
+            return None
+        if marker == 'chapter' and pos < length and 'a' <= text[pos] <= 'z':
+            pos += 1
+        return text[digits_start:pos], pos
+
+    # ---------------- PUBLIC API ----------------
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find all topics and chapters in text in one pass.
+
+        Structured chapter references ("chapter 5", "ray optics") take precedence over
+        the plain chapter list, mirroring how chapters were extracted previously.
+        """
+        text_lower = text.lower()
+        topics = set()
+        numbered: List[str] = []
+        # Where the last "chapter N" / "ch. N" reference ended, per marker
+        numbered_end: Dict[str, int] = {}
+        # Accepted "<word> <suffix>" phrases per suffix group as [suffix_start, phrase_start, phrase_end]
+        phrases: Dict[str, List[list]] = {}
+        fallback_chapters: List[str] = []
+
+        # Matches of one pattern never overlap, like a left-to-right regex scan: a match
+        # may not start before the previous one of the same pattern ended
+        for start, length, kind, label in self._scan(text_lower):
+            end = start + length
+            if kind == _TOPIC:
+                topics.add(label)
+            elif kind == _CHAPTER:
+                if label not in fallback_chapters:
+                    fallback_chapters.append(label)
+            elif kind == _SUFFIX:
+                accepted = phrases.setdefault(label, [])
+                if accepted and accepted[-1][0] == start:
+                    # Longer suffix at the same position ("waves" over "wave")
+                    accepted[-1][2] = end
+                    continue
+                phrase = self._phrase_before(text_lower, start, end, accepted[-1][2] if accepted else 0)
+                if phrase:
+                    accepted.append([start, end - len(phrase), end])
+            elif start >= numbered_end.get(label, 0):
+                found = self._number_after(text_lower, end, label)
+                if found:
+                    numbered.append(found[0])
+                    numbered_end[label] = found[1]
+
+        chapters = list(dict.fromkeys(
+            numbered + [text_lower[phrase_start:phrase_end]
+                        for accepted in phrases.values() for _, phrase_start, phrase_end in accepted]
+        ))
+        if not chapters:
+            chapters = fallback_chapters
+
+        return {
+            'topics': [topic for topic in self.topic_order if topic in topics] or [GENERAL],
+            'chapters': chapters or [GENERAL]
+        }
+
+    def extract_topics(self, text: str) -> List[str]:
+        return self.match(text)['topics']
+
+    def extract_chapters(self, text: str) -> List[str]:
+        return self.match(text)['chapters']
+
+
+def load_curriculum_vocabulary(path: Optional[str] = None) -> Dict:
+    """Load vocabulary from a JSON file, falling back to the built-in curriculum"""
+    path = path or settings.CURRICULUM_VOCABULARY_PATH
+    if not path:
+        return DEFAULT_CURRICULUM_VOCABULARY
+    try:
+        with open(path, encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        # Missing sections inherit the defaults
+        return {**DEFAULT_CURRICULUM_VOCABULARY, **vocabulary}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not load curriculum vocabulary from {path}: {e}. Using defaults.")
+        return DEFAULT_CURRICULUM_VOCABULARY
+
+
+_default_matcher: Optional[CurriculumMatcher] = None
+
+
+def get_curriculum_matcher() -> CurriculumMatcher:
+    """Return the shared matcher, building the automaton on first use"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = CurriculumMatcher(load_curriculum_vocabulary())
+    return _default_matcher
@@ -0,0 +1,251 @@
+"""
+Exam Analysis Queue
+Generates AI exam performance analyses in the background after submit and stores
+them per language, so reading an analysis is a single database lookup
+
+Rows go pending -> running -> ready/failed. A worker only calls the LLM after
+moving a row from pending to running with a conditional UPDATE, so each analysis
+is generated once even though every worker restores and enqueues. A row left
+running by a crashed worker is claimable again after ANALYSIS_CLAIM_SECONDS.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Doubt, Exam, ExamAnalysis, ExamResult
+from app.services.ai_service import _call_ai
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+ANALYSIS_LANGUAGES = ('hindi', 'hinglish', 'english')
+DEFAULT_ANALYSIS_LANGUAGE = 'hinglish'
+
+# How long a running claim lasts before another worker may take the row over
+# (well above one LLM call, which times out much sooner)
+ANALYSIS_CLAIM_SECONDS = 300
+
+
+def normalize_language(language: Optional[str]) -> str:
+    language = (language or '').strip().lower()
+    return language if language in ANALYSIS_LANGUAGES else DEFAULT_ANALYSIS_LANGUAGE
+
+
+def claimable(now: datetime):
+    """Filter for rows a worker may start generating: pending, or running but stale"""
+    return or_(
+        ExamAnalysis.status == "pending",
+        and_(
+            ExamAnalysis.status == "running",
+            or_(ExamAnalysis.updated_at.is_(None),
+                ExamAnalysis.updated_at < now - timedelta(seconds=ANALYSIS_CLAIM_SECONDS))
+        )
+    )
+
+
+def claim_is_live(updated_at: Optional[datetime]) -> bool:
+    """Whether a running row's claim is recent enough that its worker still holds it"""
+    if updated_at is None:
+        return False
+    if updated_at.tzinfo is None:
+        # SQLite returns it naive (written as UTC)
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at >= datetime.now(timezone.utc) - timedelta(seconds=ANALYSIS_CLAIM_SECONDS)
+
+
+def preferred_language(db: Session, user_id: int) -> str:
+    """The language detected in the user's latest doubt, else the default"""
+    latest = db.query(Doubt.detected_language).filter(
+        Doubt.user_id == user_id
+    ).order_by(Doubt.created_at.desc()).first()
+    return normalize_language(latest.detected_language if latest else None)
+
+
+class ExamAnalysisQueue:
+    """
+    Background generator for exam analyses.
+
+    Jobs run on a pool of `concurrency` threads, so they can be enqueued from request
+    handlers and from the exam timer alike. The AI client and the database calls
+    block, so each job holds one thread: at most `concurrency` LLM calls run at once,
+    and no database session is held while waiting for the LLM.
+    _inflight only skips duplicate submits within this process; across workers a
+    job does nothing unless its claim UPDATE wins. Rows still 'pending' (or
+    stale 'running') after a restart are picked up again by restore().
+    """
+
+    def __init__(self, session_factory=SessionLocal, concurrency: int = 4):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Set[Tuple[int, str]] = set()
+        self._lock = threading.Lock()
+
+    # ---------------- WORKER ----------------
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="exam-analysis")
+
+    def stop(self):
+        """Drop queued jobs (their rows stay pending for restore()) and let running ones finish"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._inflight.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, exam_id: int, language: str):
+        key = (exam_id, language)
+        self.start()
+        with self._lock:
+            if key in self._inflight or self._executor is None:
+                return
+            self._inflight.add(key)
+            self._executor.submit(self._generate, exam_id, language)
+
+    def _claim(self, exam_id: int, language: str) -> bool:
+        """Move the row to running if no other worker holds it; True if this job won"""
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            claimed = db.query(ExamAnalysis).filter(
+                ExamAnalysis.exam_id == exam_id, ExamAnalysis.language == language, claimable(now)
+            ).update({ExamAnalysis.status: "running", ExamAnalysis.updated_at: now}, synchronize_session=False)
+            db.commit()
+            return claimed == 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to claim analysis for exam {exam_id} ({language}): {e}")
+            return False
+        finally:
+            db.close()
+
+    def _generate(self, exam_id: int, language: str):
+        from app.services.exam_service import build_analysis_prompt
+
+        try:
+            if not self._claim(exam_id, language):
+                return
+            db = self.session_factory()
+            try:
+                exam = db.query(Exam).filter(Exam.id == exam_id).first()
+                result = db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first()
+                prompt = build_analysis_prompt(exam, result, language) if exam and result else None
+            finally:
+                db.close()
+
+            if prompt is None:
+                self._store(exam_id, language, None, "Exam has no result")
+                return
+            try:
+                # _call_ai is async but calls the blocking client; run it to completion here
+                analysis = asyncio.run(_call_ai(*prompt))
+            except Exception as e:
+                self._store(exam_id, language, None, str(e))
+                return
+            self._store(exam_id, language, analysis, None if analysis else "AI service unavailable")
+        finally:
+            with self._lock:
+                self._inflight.discard((exam_id, language))
+
+    def _store(self, exam_id: int, language: str, analysis: Optional[str], error: Optional[str]):
+        db = self.session_factory()
+        try:
+            row = db.query(ExamAnalysis).filter(
+                ExamAnalysis.exam_id == exam_id, ExamAnalysis.language == language
+            ).first()
+            if row is None:
+                row = ExamAnalysis(exam_id=exam_id, language=language)
+                db.add(row)
+            row.status = "ready" if analysis else "failed"
+            row.analysis = analysis
+            row.error = error
+            if analysis:
+                # Keep the result's single analysis column filled for existing readers
+                db.query(ExamResult).filter(ExamResult.exam_id == exam_id).update(
+                    {ExamResult.performance_analysis: analysis}, synchronize_session=False
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to store analysis for exam {exam_id} ({language}): {e}")
+        finally:
+            db.close()
+
+    # ---------------- API ----------------
+
+    def get(self, db: Session, exam_id: int, language: str) -> Optional[ExamAnalysis]:
+        return db.query(ExamAnalysis).filter(
+            ExamAnalysis.exam_id == exam_id, ExamAnalysis.language == language
+        ).first()
+
+    def enqueue(self, db: Session, exam_id: int, language: str) -> ExamAnalysis:
+        """
+        Make sure an analysis exists or is being generated for (exam, language).
+        Ready rows and rows another worker is generating are returned as they are;
+        missing, failed or unclaimed ones are (re)queued.
+        """
+        row = self.get(db, exam_id, language)
+        if row is not None and row.status == "ready":
+            return row
+        if row is not None and row.status == "running" and claim_is_live(row.updated_at):
+            return row
+        if row is None:
+            try:
+                row = ExamAnalysis(exam_id=exam_id, language=language, status="pending")
+                db.add(row)
+                db.commit()
+            except IntegrityError:
+                # Another request queued it first
+                db.rollback()
+                row = self.get(db, exam_id, language)
+        elif row.status == "failed":
+            row.status = "pending"
+            row.error = None
+            db.commit()
+        self._submit(exam_id, language)
+        return row
+
+    def enqueue_for_submitted_exam(self, db: Session, exam_id: int, language: Optional[str] = None) -> ExamAnalysis:
+        """Queue the analysis right after submit, in the student's preferred language"""
+        if language is None:
+            user_id = db.query(Exam.user_id).filter(Exam.id == exam_id).scalar()
+            language = preferred_language(db, user_id)
+        return self.enqueue(db, exam_id, normalize_language(language))
+
+    def restore(self) -> int:
+        """
+        Re-queue analyses left pending, or running by a dead worker (called at startup).
+        Every worker calls this; the claim in _generate keeps each row to one LLM call.
+        """
+        db = self.session_factory()
+        try:
+            pending = db.query(ExamAnalysis.exam_id, ExamAnalysis.language).filter(
+                claimable(datetime.now(timezone.utc))
+            ).all()
+        finally:
+            db.close()
+        for exam_id, language in pending:
+            self._submit(exam_id, language)
+        if pending:
+            logger.info(f"🧠 Re-queued {len(pending)} pending exam analyses")
+        return len(pending)
+
+
+_queue: Optional[ExamAnalysisQueue] = None
+
+
+def get_exam_analysis_queue() -> ExamAnalysisQueue:
+    global _queue
+    if _queue is None:
+        _queue = ExamAnalysisQueue(concurrency=settings.EXAM_ANALYSIS_CONCURRENCY)
+    return _queue
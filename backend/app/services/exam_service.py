@@ -3,13 +3,24 @@ Exam Mode Service
 Generates exams, tracks performance, and analyzes results
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import Exam, ExamQuestion, ExamAttempt, ExamResult, Subject, ClassLevel, ExamType, PYQ
-from app.services.ai_service import _call_ai
-from typing import List, Dict, Optional
+from sqlalchemy import case, func, or_
+from app.models import Exam, ExamQuestion, ExamAttempt, ExamResult, QuestionBankItem, Subject, ClassLevel, ExamType, PYQ
+from app.services.bulk_insert import insert_rows, upsert_rows
+from app.services.question_bank import add_bank_questions, rekey_bank_questions, sample_bank_questions, split_by_difficulty
+from app.services.leaderboard import get_leaderboard
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import json
 import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Exams at least this large are written with COPY on Postgres
+EXAM_COPY_THRESHOLD = 1000
+
+EXAM_QUESTION_COLUMNS = ["exam_id", "question_number", "bank_question_id", "marks", "difficulty"]
 
 
 def create_exam(
@@ -23,7 +34,10 @@ def create_exam(
     difficulty: str = "mixed"
 ) -> Exam:
     """
-    Create a new exam with randomized questions
+    Create a new exam with randomized questions.
+    Questions are sampled from the shared question bank in O(k) and referenced by id;
+    only a shortfall is generated, and it is added to the bank for later exams.
+    The exam and its question list are written in a single transaction.
     """
     # Create exam record
     exam = Exam(
@@ -36,35 +50,55 @@ def create_exam(
         total_questions=total_questions,
         status="pending"
     )
-    db.add(exam)
-    db.commit()
-    db.refresh(exam)
-    
-    # Generate questions (mock questions for now - can be enhanced with PYQ integration)
-    questions = generate_exam_questions(
-        exam.id,
-        subject,
-        class_level,
-        exam_type,
-        total_questions,
-        difficulty
-    )
-    
-    # Add questions to database
-    for q in questions:
-        db_question = ExamQuestion(
-            exam_id=exam.id,
-            question_number=q["question_number"],
-            question_text=q["question_text"],
-            options=json.dumps(q["options"]),
-            correct_answer=q["correct_answer"],
-            marks=q.get("marks", 1),
-            difficulty=q.get("difficulty", "medium")
+    rng = random.Random()
+    try:
+        db.add(exam)
+        db.flush()  # Flush to get exam ID, still inside the same transaction
+        
+        selected = []
+        sampled_ids = []
+        for question_difficulty, count in split_by_difficulty(total_questions, difficulty, rng).items():
+            picked = sample_bank_questions(db, count, subject, class_level, exam_type, question_difficulty, rng)
+            sampled_ids += [bank_question_id for bank_question_id, _, _ in picked]
+            if len(picked) < count:
+                # Bank is short for this filter: generate the rest once and keep them in the bank
+                generated = generate_exam_questions(
+                    exam.id,
+                    subject,
+                    class_level,
+                    exam_type,
+                    count - len(picked),
+                    question_difficulty
+                )
+                picked += add_bank_questions(db, generated, subject, class_level, exam_type)
+            selected += picked
+        rng.shuffle(selected)
+        
+        # Reference the bank questions in one statement
+        insert_rows(
+            db.connection(),
+            ExamQuestion.__table__,
+            EXAM_QUESTION_COLUMNS,
+            [
+                {
+                    "exam_id": exam.id,
+                    "question_number": number,
+                    "bank_question_id": bank_question_id,
+                    "marks": marks,
+                    "difficulty": question_difficulty
+                }
+                for number, (bank_question_id, marks, question_difficulty) in enumerate(selected, start=1)
+            ],
+            copy_threshold=EXAM_COPY_THRESHOLD
         )
-        db.add(db_question)
-        db.flush()  # Flush to get question ID
-    
-    db.commit()
+        # Last, so the sampled bank rows stay locked only until the commit
+        rekey_bank_questions(db, sampled_ids, rng)
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(exam)
     
     return exam
 
@@ -129,8 +163,13 @@ def submit_answer(
     time_spent_seconds: int = 0
 ) -> ExamAttempt:
     """Submit answer for a question"""
-    # Get question to check answer
-    question = db.query(ExamQuestion).filter(ExamQuestion.id == question_id).first()
+    # Get question to check answer (bank questions keep the answer in the bank row)
+    question = db.query(
+        ExamQuestion.id,
+        func.coalesce(ExamQuestion.correct_answer, QuestionBankItem.correct_answer).label("correct_answer")
+    ).outerjoin(
+        QuestionBankItem, ExamQuestion.bank_question_id == QuestionBankItem.id
+    ).filter(ExamQuestion.id == question_id).first()
     if not question:
         raise ValueError("Question not found")
     
@@ -163,94 +202,186 @@ def submit_answer(
     return attempt
 
 
-def submit_exam(db: Session, exam_id: int) -> ExamResult:
-    """Submit exam and calculate results"""
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
-    if not exam:
-        raise ValueError("Exam not found")
-    
-    if exam.status == "submitted":
-        # Return existing result
-        return db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first()
-    
-    # Get all attempts
-    attempts = db.query(ExamAttempt).filter(ExamAttempt.exam_id == exam_id).all()
-    questions = db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam_id).all()
+def upsert_attempts(db: Session, rows: List[Dict]):
+    """Insert or overwrite attempts in one statement, keyed on (exam_id, question_id)"""
+    upsert_rows(
+        db.connection(),
+        ExamAttempt.__table__,
+        rows,
+        conflict_columns=["exam_id", "question_id"],
+        update_columns=["selected_answer", "is_correct", "time_spent_seconds"]
+    )
+
+
+def submit_answers(db: Session, exam_id: int, answers: List[Dict]) -> Dict:
+    """
+    Record a batch of answers with one lookup and one upsert.
     
-    # Calculate results
-    total_questions = len(questions)
-    correct_answers = sum(1 for a in attempts if a.is_correct)
-    wrong_answers = sum(1 for a in attempts if not a.is_correct)
-    unanswered = total_questions - len(attempts)
+    Answer keys for every question in the batch are read with a single IN query
+    (bank questions keep theirs in the bank row), then all attempts are written in
+    one INSERT ... ON CONFLICT (exam_id, question_id) DO UPDATE and one commit.
+    If the same question appears more than once, the last answer wins. Questions
+    that do not belong to the exam are returned in 'rejected' and not saved.
     
-    # Calculate marks
-    total_marks = sum(q.marks for q in questions)
-    obtained_marks = sum(q.marks for q, a in zip(questions, attempts) if a.is_correct)
-    percentage = round((obtained_marks / total_marks * 100) if total_marks > 0 else 0)
+    Returns:
+        {'saved': int, 'results': [{'question_id', 'is_correct'}], 'rejected': [question_id, ...]}
+    """
+    latest = {}
+    for answer in answers:
+        latest[answer["question_id"]] = answer
+    if not latest:
+        return {"saved": 0, "results": [], "rejected": []}
     
-    # Identify weak topics (questions with wrong answers)
-    weak_questions = [a for a in attempts if not a.is_correct]
-    weak_topics = {
-        "wrong_questions": len(weak_questions),
-        "difficulties": {}
-    }
+    answer_keys = dict(
+        db.query(
+            ExamQuestion.id,
+            func.coalesce(ExamQuestion.correct_answer, QuestionBankItem.correct_answer)
+        ).outerjoin(
+            QuestionBankItem, ExamQuestion.bank_question_id == QuestionBankItem.id
+        ).filter(
+            ExamQuestion.exam_id == exam_id,
+            ExamQuestion.id.in_(list(latest))
+        ).all()
+    )
     
-    # Count by difficulty
-    for attempt in weak_questions:
-        q = next((q for q in questions if q.id == attempt.question_id), None)
-        if q:
-            difficulty = q.difficulty
-            weak_topics["difficulties"][difficulty] = weak_topics["difficulties"].get(difficulty, 0) + 1
+    rows = []
+    rejected = []
+    for question_id, answer in latest.items():
+        if question_id not in answer_keys:
+            rejected.append(question_id)
+            continue
+        selected_answer = answer["selected_answer"]
+        rows.append({
+            "exam_id": exam_id,
+            "question_id": question_id,
+            "selected_answer": selected_answer,
+            "is_correct": str(selected_answer).strip() == str(answer_keys[question_id]).strip(),
+            "time_spent_seconds": answer.get("time_spent_seconds") or 0
+        })
     
-    # Update exam status
-    exam.status = "submitted"
-    exam.submitted_at = datetime.utcnow()
-    db.commit()
+    if rows:
+        upsert_attempts(db, rows)
+        db.commit()
     
-    # Create or update result
-    result = db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first()
-    if result:
-        result.total_questions = total_questions
-        result.correct_answers = correct_answers
-        result.wrong_answers = wrong_answers
-        result.unanswered = unanswered
-        result.total_marks = total_marks
-        result.obtained_marks = obtained_marks
-        result.percentage = percentage
-        result.weak_topics = json.dumps(weak_topics)
-    else:
-        result = ExamResult(
-            exam_id=exam_id,
-            total_questions=total_questions,
-            correct_answers=correct_answers,
-            wrong_answers=wrong_answers,
-            unanswered=unanswered,
-            total_marks=total_marks,
-            obtained_marks=obtained_marks,
-            percentage=percentage,
-            weak_topics=json.dumps(weak_topics)
-        )
-        db.add(result)
+    return {
+        "saved": len(rows),
+        "results": [{"question_id": row["question_id"], "is_correct": row["is_correct"]} for row in rows],
+        "rejected": rejected
+    }
+
+
+def score_exam(db: Session, exam_id: int) -> Dict:
+    """
+    Score an exam with one grouped query over its questions joined to their attempts.
+    Returns the ExamResult columns (weak_topics as a dict).
+    """
+    answered = func.count(ExamAttempt.id)
+    correct = func.coalesce(func.sum(case((ExamAttempt.is_correct == True, 1), else_=0)), 0)
+    rows = db.query(
+        ExamQuestion.difficulty,
+        func.count(ExamQuestion.id),
+        func.coalesce(func.sum(ExamQuestion.marks), 0),
+        answered,
+        correct,
+        func.coalesce(func.sum(case((ExamAttempt.is_correct == True, ExamQuestion.marks), else_=0)), 0)
+    ).outerjoin(
+        ExamAttempt,
+        (ExamAttempt.question_id == ExamQuestion.id) & (ExamAttempt.exam_id == ExamQuestion.exam_id)
+    ).filter(
+        ExamQuestion.exam_id == exam_id
+    ).group_by(ExamQuestion.difficulty).all()
     
-    db.commit()
-    db.refresh(result)
+    total_questions = total_marks = answered_count = correct_answers = obtained_marks = 0
+    wrong_by_difficulty = {}
+    for difficulty, questions, marks, answered_n, correct_n, obtained in rows:
+        total_questions += questions
+        total_marks += marks
+        answered_count += answered_n
+        correct_answers += correct_n
+        obtained_marks += obtained
+        if answered_n - correct_n:
+            wrong_by_difficulty[difficulty] = answered_n - correct_n
     
-    return result
+    wrong_answers = answered_count - correct_answers
+    return {
+        "exam_id": exam_id,
+        "total_questions": total_questions,
+        "correct_answers": correct_answers,
+        "wrong_answers": wrong_answers,
+        "unanswered": total_questions - answered_count,
+        "total_marks": total_marks,
+        "obtained_marks": obtained_marks,
+        "percentage": round((obtained_marks / total_marks * 100) if total_marks > 0 else 0),
+        # Identify weak topics (questions with wrong answers), counted by difficulty
+        "weak_topics": {
+            "wrong_questions": wrong_answers,
+            "difficulties": wrong_by_difficulty
+        }
+    }
 
 
-async def analyze_exam_performance(
-    db: Session,
-    exam_id: int,
-    language: str = "hinglish"
-) -> str:
+def submit_exam(db: Session, exam_id: int) -> Tuple[ExamResult, bool]:
     """
-    Generate AI-powered performance analysis
+    Submit exam and calculate results.
+    Scores come from one grouped SQL query and the result is written with one upsert,
+    in the same transaction as the status change.
+    
+    The status change is a conditional UPDATE, so of several concurrent submits (the
+    student, the exam timer on every worker) exactly one scores the exam; the others
+    get the stored result.
+    
+    Returns:
+        (result, whether this call submitted the exam)
     """
+    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    if not exam:
+        raise ValueError("Exam not found")
+    
+    if exam.status == "submitted":
+        # Return existing result
+        return db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first(), False
+    
+    try:
+        claimed = db.query(Exam).filter(
+            Exam.id == exam_id,
+            or_(Exam.status.is_(None), Exam.status != "submitted")
+        ).update(
+            {Exam.status: "submitted", Exam.submitted_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        if not claimed:
+            # Submitted concurrently by someone else
+            db.rollback()
+            return db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first(), False
+        
+        scores = score_exam(db, exam_id)
+        scores["weak_topics"] = json.dumps(scores["weak_topics"])
+        
+        # Create or update result
+        upsert_rows(
+            db.connection(),
+            ExamResult.__table__,
+            [scores],
+            conflict_columns=["exam_id"],
+            update_columns=[name for name in scores if name != "exam_id"]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
     result = db.query(ExamResult).filter(ExamResult.exam_id == exam_id).first()
-    if not result:
-        return ""
+    try:
+        get_leaderboard().record(exam, result)
+    except Exception as e:
+        # The result is saved; a leaderboard outage must not fail the submit
+        logger.error(f"❌ Leaderboard update failed for exam {exam_id}: {e}")
     
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    return result, True
+
+
+def build_analysis_prompt(exam: Exam, result: ExamResult, language: str = "hinglish") -> Tuple[str, str]:
+    """Build the (prompt, system_prompt) for an exam performance analysis"""
     weak_topics = json.loads(result.weak_topics) if result.weak_topics else {}
     
     # Build analysis prompt
@@ -315,11 +446,4 @@ Please provide:
 
 Keep it encouraging and actionable."""
     
-    analysis = await _call_ai(prompt, system_prompt)
-    
-    # Save analysis
-    if analysis:
-        result.performance_analysis = analysis
-        db.commit()
-    
-    return analysis or "Performance analysis generated."
+    return prompt, system_prompt
@@ -0,0 +1,480 @@
+"""
+Exam Session Store
+Keeps in-progress exams (status, owner, answer keys, answers) in memory and
+writes answers behind to exam_attempts in batches
+
+Crash recovery:
+- exam_attempts is the durable record. Everything else in a session (exam status,
+  owner, answer keys) is reloaded from the database on a cache miss.
+- Answers are flushed every EXAM_SESSION_FLUSH_SECONDS, when an exam is submitted
+  and on graceful shutdown. A failed flush puts the answers back as dirty.
+- Submit flushes, drops the session and scores the exam under the exam lock, and a
+  cache miss loads under the same lock, so an answer racing a submit is either
+  flushed before scoring or refused (the exam is no longer in progress).
+- memory backend: a hard crash loses at most the last flush interval of answers;
+  after restart sessions reload from exam_attempts. State is per process, so it is
+  refused when WEB_CONCURRENCY is above 1 (a submit on another worker would miss
+  answers buffered here).
+- redis backend: answers and dirty markers live in Redis, so they survive app
+  crashes and are shared by all workers; any worker's flusher writes them back.
+"""
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Exam, ExamQuestion, ExamAttempt, QuestionBankItem
+from app.services.exam_timer import exam_deadline, is_past_deadline
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+SESSION_BACKENDS = ('auto', 'memory', 'redis', 'database')
+
+# Sessions outlive the exam duration by this much before expiring from the cache
+SESSION_GRACE_SECONDS = 3600
+
+# Longest a flush or submit may hold an exam's lock (Redis lock expiry) and longest
+# another one waits for it
+FLUSH_LOCK_SECONDS = 30
+
+# Exam locks are striped: exam ids share this many locks per process
+MEMORY_LOCK_STRIPES = 64
+
+
+class MemorySessionBackend:
+    """In-process backend: plain dicts guarded by one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._exam_locks = [threading.Lock() for _ in range(MEMORY_LOCK_STRIPES)]
+        self._sessions: Dict[int, Dict] = {}
+        self._answers: Dict[int, Dict[int, Dict]] = {}
+        self._dirty: Dict[int, set] = {}
+
+    def exam_lock(self, exam_id: int):
+        """Serializes flushes of one exam (and close) within this process"""
+        return self._exam_locks[exam_id % MEMORY_LOCK_STRIPES]
+
+    def get(self, exam_id: int) -> Optional[Dict]:
+        session = self._sessions.get(exam_id)
+        if session and session['expires_at'] < time.time():
+            self.delete(exam_id)
+            return None
+        return session
+
+    def put(self, exam_id: int, session: Dict, answers: Dict[int, Dict]):
+        with self._lock:
+            self._sessions[exam_id] = session
+            self._answers[exam_id] = dict(answers)
+            self._dirty.setdefault(exam_id, set())
+
+    def delete(self, exam_id: int):
+        with self._lock:
+            self._sessions.pop(exam_id, None)
+            self._answers.pop(exam_id, None)
+            self._dirty.pop(exam_id, None)
+
+    def pop(self, exam_id: int) -> Tuple[Optional[Dict], Dict[int, Dict], Set[int]]:
+        """Drop a session atomically; returns (session, answers, dirty question ids)"""
+        with self._lock:
+            session = self._sessions.pop(exam_id, None)
+            answers = self._answers.pop(exam_id, {})
+            dirty = self._dirty.pop(exam_id, set())
+        return session, answers, dirty
+
+    def record_answers(self, exam_id: int, answers: Dict[int, Dict]) -> bool:
+        """False (nothing recorded) if the session was dropped, e.g. by a submit"""
+        with self._lock:
+            if exam_id not in self._sessions:
+                return False
+            self._answers.setdefault(exam_id, {}).update(answers)
+            self._dirty.setdefault(exam_id, set()).update(answers)
+            return True
+
+    def get_answers(self, exam_id: int) -> Dict[int, Dict]:
+        return dict(self._answers.get(exam_id, {}))
+
+    def take_dirty(self, exam_id: int) -> Dict[int, Dict]:
+        with self._lock:
+            dirty = self._dirty.get(exam_id)
+            if not dirty:
+                return {}
+            self._dirty[exam_id] = set()
+            answers = self._answers.get(exam_id, {})
+            return {question_id: answers[question_id] for question_id in dirty if question_id in answers}
+
+    def restore_dirty(self, exam_id: int, question_ids: Iterable[int]):
+        with self._lock:
+            if exam_id in self._answers:
+                self._dirty.setdefault(exam_id, set()).update(question_ids)
+
+    def dirty_exam_ids(self) -> List[int]:
+        return [exam_id for exam_id, dirty in list(self._dirty.items()) if dirty]
+
+
+# Record answers only while the session exists, so a submit that already dropped it
+# can't leave dirty answers behind. KEYS: session, answers, dirty, dirty exams;
+# ARGV: exam id, then question id / answer JSON pairs.
+RECORD_ANSWERS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+    redis.call('SADD', KEYS[3], ARGV[i])
+end
+redis.call('SADD', KEYS[4], ARGV[1])
+return 1
+"""
+
+
+class RedisSessionBackend:
+    """
+    Redis backend. Per exam: a JSON session string, a hash of answers keyed by
+    question id and a set of dirty question ids; a global set lists dirty exams.
+    """
+
+    DIRTY_EXAMS_KEY = 'exam_session:dirty_exams'
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._record_answers = self._redis.register_script(RECORD_ANSWERS_SCRIPT)
+
+    @staticmethod
+    def _keys(exam_id: int):
+        prefix = f'exam_session:{exam_id}'
+        return f'{prefix}:session', f'{prefix}:answers', f'{prefix}:dirty'
+
+    def exam_lock(self, exam_id: int):
+        """Serializes flushes of one exam (and close) across every worker"""
+        return self._redis.lock(
+            f'exam_session:{exam_id}:lock', timeout=FLUSH_LOCK_SECONDS, blocking_timeout=FLUSH_LOCK_SECONDS
+        )
+
+    @staticmethod
+    def _decode_session(raw: Optional[str]) -> Optional[Dict]:
+        if raw is None:
+            return None
+        session = json.loads(raw)
+        session['answer_keys'] = {int(k): v for k, v in session['answer_keys'].items()}
+        return session
+
+    def get(self, exam_id: int) -> Optional[Dict]:
+        return self._decode_session(self._redis.get(self._keys(exam_id)[0]))
+
+    def put(self, exam_id: int, session: Dict, answers: Dict[int, Dict]):
+        session_key, answers_key, _ = self._keys(exam_id)
+        ttl = max(1, int(session['expires_at'] - time.time()))
+        pipe = self._redis.pipeline()
+        pipe.set(session_key, json.dumps(session), ex=ttl)
+        pipe.delete(answers_key)
+        if answers:
+            pipe.hset(answers_key, mapping={str(k): json.dumps(v) for k, v in answers.items()})
+        pipe.expire(answers_key, ttl)
+        pipe.execute()
+
+    def delete(self, exam_id: int):
+        pipe = self._redis.pipeline()
+        pipe.delete(*self._keys(exam_id))
+        pipe.srem(self.DIRTY_EXAMS_KEY, exam_id)
+        pipe.execute()
+
+    def pop(self, exam_id: int) -> Tuple[Optional[Dict], Dict[int, Dict], Set[int]]:
+        keys = self._keys(exam_id)
+        # One MULTI, so an answer is either returned here or refused by RECORD_ANSWERS_SCRIPT
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.get(keys[0])
+        pipe.hgetall(keys[1])
+        pipe.smembers(keys[2])
+        pipe.delete(*keys)
+        pipe.srem(self.DIRTY_EXAMS_KEY, exam_id)
+        raw, answers, dirty, _, _ = pipe.execute()
+        return (
+            self._decode_session(raw),
+            {int(k): json.loads(v) for k, v in answers.items()},
+            {int(question_id) for question_id in dirty}
+        )
+
+    def record_answers(self, exam_id: int, answers: Dict[int, Dict]) -> bool:
+        args = [exam_id]
+        for question_id, answer in answers.items():
+            args += [str(question_id), json.dumps(answer)]
+        return bool(self._record_answers(keys=[*self._keys(exam_id), self.DIRTY_EXAMS_KEY], args=args))
+
+    def get_answers(self, exam_id: int) -> Dict[int, Dict]:
+        raw = self._redis.hgetall(self._keys(exam_id)[1])
+        return {int(k): json.loads(v) for k, v in raw.items()}
+
+    def take_dirty(self, exam_id: int) -> Dict[int, Dict]:
+        _, answers_key, dirty_key = self._keys(exam_id)
+        # SMEMBERS + DEL in one MULTI so no answer is marked clean without being read
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.smembers(dirty_key)
+        pipe.delete(dirty_key)
+        pipe.srem(self.DIRTY_EXAMS_KEY, exam_id)
+        question_ids = list(pipe.execute()[0])
+        if not question_ids:
+            return {}
+        values = self._redis.hmget(answers_key, question_ids)
+        return {int(k): json.loads(v) for k, v in zip(question_ids, values) if v is not None}
+
+    def restore_dirty(self, exam_id: int, question_ids: Iterable[int]):
+        question_ids = list(question_ids)
+        if not question_ids:
+            return
+        pipe = self._redis.pipeline()
+        pipe.sadd(self._keys(exam_id)[2], *question_ids)
+        pipe.sadd(self.DIRTY_EXAMS_KEY, exam_id)
+        pipe.execute()
+
+    def dirty_exam_ids(self) -> List[int]:
+        return [int(exam_id) for exam_id in self._redis.smembers(self.DIRTY_EXAMS_KEY)]
+
+
+class ExamSessionStore:
+    """
+    Read-through cache of in-progress exams with write-behind answers.
+
+    Recording an answer touches only the backend; a flusher thread upserts dirty
+    answers into exam_attempts in one statement per exam. Flushes of one exam hold
+    the backend's exam lock, so submit() waits for a flush already in flight and
+    scoring sees its answers committed.
+    """
+
+    def __init__(self, backend, session_factory=SessionLocal, flush_seconds: float = 5.0):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- SESSIONS ----------------
+
+    def load(self, db: Session, exam_id: int, user_id: int) -> Optional[Dict]:
+        """Return the cached session, loading it from the database on a miss"""
+        session = self.backend.get(exam_id)
+        if session is None:
+            # Under the exam lock, so a miss during submit() waits and sees the exam submitted
+            with self.backend.exam_lock(exam_id):
+                session = self.backend.get(exam_id) or self._load_from_db(db, exam_id)
+        if session is None or session['user_id'] != user_id:
+            return None
+        return session
+
+    def _load_from_db(self, db: Session, exam_id: int) -> Optional[Dict]:
+        exam = db.query(
+            Exam.user_id, Exam.status, Exam.started_at, Exam.duration_minutes
+        ).filter(Exam.id == exam_id).first()
+        if not exam:
+            return None
+
+        session = {
+            'exam_id': exam_id,
+            'user_id': exam.user_id,
+            'status': exam.status,
+            'started_at': exam.started_at.isoformat() if exam.started_at else None,
+            'duration_minutes': exam.duration_minutes,
+            'deadline': exam_deadline(exam.started_at, exam.duration_minutes),
+            'answer_keys': {},
+            'expires_at': time.time() + (exam.duration_minutes or 0) * 60 + SESSION_GRACE_SECONDS
+        }
+        if exam.status != "in_progress":
+            # Only in-progress exams are cached; others change rarely and are read directly
+            return session
+
+        session['answer_keys'] = dict(
+            db.query(
+                ExamQuestion.id,
+                func.coalesce(ExamQuestion.correct_answer, QuestionBankItem.correct_answer)
+            ).outerjoin(
+                QuestionBankItem, ExamQuestion.bank_question_id == QuestionBankItem.id
+            ).filter(ExamQuestion.exam_id == exam_id).all()
+        )
+        answers = {
+            a.question_id: {
+                'selected_answer': a.selected_answer,
+                'is_correct': bool(a.is_correct),
+                'time_spent_seconds': a.time_spent_seconds or 0
+            }
+            for a in db.query(
+                ExamAttempt.question_id, ExamAttempt.selected_answer,
+                ExamAttempt.is_correct, ExamAttempt.time_spent_seconds
+            ).filter(ExamAttempt.exam_id == exam_id)
+        }
+        self.backend.put(exam_id, session, answers)
+        return session
+
+    # ---------------- ANSWERS ----------------
+
+    def record_answers(self, db: Session, exam_id: int, user_id: int, answers: List[Dict]) -> Dict:
+        """
+        Grade and record answers in memory (no database write on the hot path).
+
+        Raises:
+            LookupError: If the exam does not exist or belongs to another user
+            ValueError: If the exam is not in progress or its time is over
+
+        Returns:
+            {'saved': int, 'results': [{'question_id', 'is_correct'}], 'rejected': [question_id, ...]}
+        """
+        session = self.load(db, exam_id, user_id)
+        if session is None:
+            raise LookupError("Exam not found")
+        if session['status'] != "in_progress":
+            raise ValueError("Exam is not in progress")
+        if is_past_deadline(session.get('deadline')):
+            raise ValueError("Exam time is over")
+
+        answer_keys = session['answer_keys']
+        recorded = {}
+        rejected = []
+        for answer in answers:
+            question_id = answer['question_id']
+            if question_id not in answer_keys:
+                rejected.append(question_id)
+                continue
+            selected_answer = answer['selected_answer']
+            recorded[question_id] = {
+                'selected_answer': selected_answer,
+                'is_correct': str(selected_answer).strip() == str(answer_keys[question_id]).strip(),
+                'time_spent_seconds': answer.get('time_spent_seconds') or 0
+            }
+
+        if recorded and not self.backend.record_answers(exam_id, recorded):
+            # Submitted (and the session dropped) since it was loaded
+            raise ValueError("Exam is not in progress")
+
+        return {
+            'saved': len(recorded),
+            'results': [{'question_id': qid, 'is_correct': a['is_correct']} for qid, a in recorded.items()],
+            'rejected': rejected
+        }
+
+    # ---------------- WRITE-BEHIND ----------------
+
+    def flush_exam(self, db: Session, exam_id: int) -> int:
+        """Upsert this exam's dirty answers into exam_attempts; returns rows written"""
+        with self.backend.exam_lock(exam_id):
+            return self._flush_exam_locked(db, exam_id)
+
+    def _flush_exam_locked(self, db: Session, exam_id: int) -> int:
+        from app.services.exam_service import upsert_attempts
+
+        dirty = self.backend.take_dirty(exam_id)
+        if not dirty:
+            return 0
+        rows = [
+            {'exam_id': exam_id, 'question_id': question_id, **answer}
+            for question_id, answer in dirty.items()
+        ]
+        try:
+            upsert_attempts(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.backend.restore_dirty(exam_id, dirty.keys())
+            raise
+        return len(rows)
+
+    def flush_all(self) -> int:
+        """Flush every exam with dirty answers (called by the flusher thread)"""
+        written = 0
+        exam_ids = self.backend.dirty_exam_ids()
+        if not exam_ids:
+            return 0
+        db = self.session_factory()
+        try:
+            for exam_id in exam_ids:
+                try:
+                    written += self.flush_exam(db, exam_id)
+                except Exception as e:
+                    logger.error(f"❌ Failed to flush answers for exam {exam_id}: {e}")
+        finally:
+            db.close()
+        return written
+
+    def submit(self, db: Session, exam_id: int):
+        """
+        Drop the session, write its dirty answers and score the exam (submit_exam),
+        all under the exam lock so no answer is cached between the write and the score.
+
+        Returns:
+            submit_exam's (result, claimed)
+        """
+        from app.services.exam_service import submit_exam, upsert_attempts
+
+        with self.backend.exam_lock(exam_id):
+            # Dropping the session and taking its dirty answers is one step, so an
+            # answer recorded meanwhile is either written here or refused
+            session, answers, dirty = self.backend.pop(exam_id)
+            rows = [
+                {'exam_id': exam_id, 'question_id': question_id, **answers[question_id]}
+                for question_id in dirty if question_id in answers
+            ]
+            if rows:
+                try:
+                    upsert_attempts(db, rows)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    if session is not None:
+                        self.backend.put(exam_id, session, answers)
+                        self.backend.restore_dirty(exam_id, dirty)
+                    raise
+            return submit_exam(db, exam_id)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush_all()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="exam-session-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write back everything still dirty"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush_all()
+
+
+_store: Optional[ExamSessionStore] = None
+
+
+def get_exam_session_store() -> Optional[ExamSessionStore]:
+    """
+    Return the configured store, or None when EXAM_SESSION_BACKEND is 'database'
+    (answers are then written straight to exam_attempts)
+    """
+    global _store
+    backend_name = settings.EXAM_SESSION_BACKEND
+    if backend_name not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown EXAM_SESSION_BACKEND '{backend_name}'. Use one of {SESSION_BACKENDS}")
+    if backend_name == 'auto':
+        backend_name = 'redis' if settings.REDIS_URL else 'memory'
+    if backend_name == 'database':
+        return None
+    if _store is None:
+        if backend_name == 'redis':
+            if not settings.REDIS_URL:
+                raise ValueError("EXAM_SESSION_BACKEND is 'redis' but REDIS_URL is not set")
+            backend = RedisSessionBackend(settings.REDIS_URL)
+        else:
+            if settings.WEB_CONCURRENCY > 1:
+                raise ValueError(
+                    f"EXAM_SESSION_BACKEND 'memory' needs a single worker but WEB_CONCURRENCY is "
+                    f"{settings.WEB_CONCURRENCY}; set REDIS_URL or use 'redis' or 'database'"
+                )
+            backend = MemorySessionBackend()
+        _store = ExamSessionStore(backend, flush_seconds=settings.EXAM_SESSION_FLUSH_SECONDS)
+    return _store
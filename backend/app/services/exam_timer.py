@@ -0,0 +1,182 @@
+"""
+Exam Timer
+Server-side deadlines for in-progress exams: a min-heap of deadlines drained by one
+thread that auto-submits expired exams in batches
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Exam
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def exam_deadline(started_at: Optional[datetime], duration_minutes: Optional[int]) -> Optional[float]:
+    """Epoch seconds when the exam ends (None if it has not started)"""
+    if started_at is None:
+        return None
+    if started_at.tzinfo is None:
+        # started_at is written with datetime.utcnow(); SQLite returns it naive
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    return started_at.timestamp() + (duration_minutes or 0) * 60
+
+
+def is_past_deadline(deadline: Optional[float], now: Optional[float] = None) -> bool:
+    """True once the deadline plus EXAM_SUBMIT_GRACE_SECONDS has passed"""
+    if deadline is None:
+        return False
+    return (now or time.time()) > deadline + settings.EXAM_SUBMIT_GRACE_SECONDS
+
+
+class ExamTimerScheduler:
+    """
+    Min-heap of (deadline, exam_id).
+
+    schedule/cancel are O(log n) / O(1): cancelled or rescheduled entries stay in the
+    heap and are skipped when popped (lazy deletion), so tens of thousands of timers
+    cost one tuple each and a single thread. Due exams are submitted in batches of
+    EXAM_AUTO_SUBMIT_BATCH per database session.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 200):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._heap: List[Tuple[float, int]] = []
+        self._deadlines: Dict[int, float] = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, exam_id: int, deadline: float):
+        with self._condition:
+            self._deadlines[exam_id] = deadline
+            heapq.heappush(self._heap, (deadline, exam_id))
+            if self._heap[0] == (deadline, exam_id):
+                # New earliest deadline: wake the worker so it sleeps the right amount
+                self._condition.notify()
+
+    def cancel(self, exam_id: int):
+        with self._condition:
+            self._deadlines.pop(exam_id, None)
+
+    def deadline(self, exam_id: int) -> Optional[float]:
+        return self._deadlines.get(exam_id)
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[int]:
+        """Remove and return up to `limit` exam ids whose deadline (plus grace) has passed"""
+        now = now or time.time()
+        limit = limit or self.batch_size
+        due = []
+        with self._condition:
+            while self._heap and len(due) < limit:
+                deadline, exam_id = self._heap[0]
+                if self._deadlines.get(exam_id) != deadline:
+                    heapq.heappop(self._heap)  # cancelled or rescheduled
+                    continue
+                if not is_past_deadline(deadline, now):
+                    break
+                heapq.heappop(self._heap)
+                del self._deadlines[exam_id]
+                due.append(exam_id)
+        return due
+
+    def restore(self) -> int:
+        """Schedule every in-progress exam from the database (called at startup)"""
+        db = self.session_factory()
+        try:
+            rows = db.query(Exam.id, Exam.started_at, Exam.duration_minutes).filter(
+                Exam.status == "in_progress"
+            ).yield_per(1000)
+            count = 0
+            for exam_id, started_at, duration_minutes in rows:
+                deadline = exam_deadline(started_at, duration_minutes)
+                if deadline is not None:
+                    self.schedule(exam_id, deadline)
+                    count += 1
+        finally:
+            db.close()
+        logger.info(f"⏱️  Restored {count} exam timers")
+        return count
+
+    def submit_due(self, now: Optional[float] = None) -> int:
+        """Auto-submit expired exams in batches; returns how many this process submitted"""
+        from app.services.exam_service import submit_exam
+        from app.services.exam_session_store import get_exam_session_store
+        from app.services.exam_analysis_queue import get_exam_analysis_queue
+
+        store = get_exam_session_store()
+        submitted = 0
+        while True:
+            due = self.pop_due(now)
+            if not due:
+                return submitted
+            db = self.session_factory()
+            try:
+                for exam_id in due:
+                    try:
+                        # Answers still held in the session cache are written back first,
+                        # under the exam lock until the exam is scored
+                        if store is not None:
+                            _, claimed = store.submit(db, exam_id)
+                        else:
+                            _, claimed = submit_exam(db, exam_id)
+                        # Every worker restores every timer; only the one whose submit
+                        # claims the exam queues its analysis
+                        if claimed:
+                            get_exam_analysis_queue().enqueue_for_submitted_exam(db, exam_id)
+                            submitted += 1
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"❌ Auto-submit failed for exam {exam_id}: {e}")
+            finally:
+                db.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                wait = 60.0
+                if self._heap:
+                    next_due = self._heap[0][0] + settings.EXAM_SUBMIT_GRACE_SECONDS
+                    wait = min(wait, max(0.0, next_due - time.time()))
+                if wait > 0:
+                    self._condition.wait(wait)
+                if self._stopped:
+                    return
+            self.submit_due()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="exam-timer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_scheduler: Optional[ExamTimerScheduler] = None
+
+
+def get_exam_timer() -> Optional[ExamTimerScheduler]:
+    """Return the process-wide scheduler, or None when EXAM_TIMER_ENABLED is off"""
+    global _scheduler
+    if not settings.EXAM_TIMER_ENABLED:
+        return None
+    if _scheduler is None:
+        _scheduler = ExamTimerScheduler(batch_size=settings.EXAM_AUTO_SUBMIT_BATCH)
+    return _scheduler
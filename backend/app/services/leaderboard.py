@@ -0,0 +1,248 @@
+"""
+Exam Leaderboard
+Rank, percentile and top-N for submitted exams per (subject, class_level, exam_type),
+kept in order-statistics structures updated on each submit
+
+Backends ('auto' picks redis when REDIS_URL is set, else memory):
+- memory: per process, so it is refused when WEB_CONCURRENCY is above 1 (a submit
+  on another worker would never reach this worker's boards).
+- redis: sorted sets shared by all workers.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Exam, ExamResult, Subject, ClassLevel, ExamType
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+LEADERBOARD_BACKENDS = ('auto', 'memory', 'redis')
+
+# Scores are whole percentages
+MAX_SCORE = 100
+
+BoardKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def board_key(subject: Optional[Subject], class_level: Optional[ClassLevel],
+              exam_type: Optional[ExamType]) -> BoardKey:
+    return (
+        subject.value if subject else None,
+        class_level.value if class_level else None,
+        exam_type.value if exam_type else None
+    )
+
+
+class ScoreFenwickTree:
+    """Fenwick (binary indexed) tree of result counts per score 0..max_score"""
+
+    def __init__(self, max_score: int = MAX_SCORE):
+        self.size = max_score + 1
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def add(self, score: int, delta: int = 1):
+        self.total += delta
+        i = score + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_at_most(self, score: int) -> int:
+        """Number of results with score <= score, in O(log max_score)"""
+        if score < 0:
+            return 0
+        i = min(score, self.size - 1) + 1
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+
+class MemoryLeaderboardBackend:
+    """
+    In-process boards: a Fenwick tree of counts plus per-score buckets for top N.
+    Single worker only; each process would otherwise rank against its own submits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees: Dict[BoardKey, ScoreFenwickTree] = {}
+        self._buckets: Dict[BoardKey, List[Dict[int, int]]] = {}
+        self._entries: Dict[int, Tuple[BoardKey, int]] = {}  # exam_id -> (board, score)
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+            self._buckets.clear()
+            self._entries.clear()
+
+    def record(self, key: BoardKey, exam_id: int, user_id: int, score: int):
+        with self._lock:
+            previous = self._entries.get(exam_id)
+            if previous:
+                old_key, old_score = previous
+                self._trees[old_key].add(old_score, -1)
+                self._buckets[old_key][old_score].pop(exam_id, None)
+            if key not in self._trees:
+                self._trees[key] = ScoreFenwickTree()
+                self._buckets[key] = [{} for _ in range(MAX_SCORE + 1)]
+            self._trees[key].add(score)
+            self._buckets[key][score][exam_id] = user_id
+            self._entries[exam_id] = (key, score)
+
+    def record_many(self, entries: List[Tuple[BoardKey, int, int, int]]):
+        for key, exam_id, user_id, score in entries:
+            self.record(key, exam_id, user_id, score)
+
+    def counts(self, key: BoardKey, score: int) -> Tuple[int, int, int]:
+        """(results above score, results below score, total results)"""
+        tree = self._trees.get(key)
+        if tree is None:
+            return 0, 0, 0
+        return tree.total - tree.count_at_most(score), tree.count_at_most(score - 1), tree.total
+
+    def top(self, key: BoardKey, limit: int) -> List[Tuple[int, int, int]]:
+        """[(exam_id, user_id, score)] best first"""
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            return []
+        entries = []
+        for score in range(MAX_SCORE, -1, -1):
+            for exam_id, user_id in list(buckets[score].items()):
+                entries.append((exam_id, user_id, score))
+                if len(entries) >= limit:
+                    return entries
+        return entries
+
+
+class RedisLeaderboardBackend:
+    """Redis sorted set per board; members are 'exam_id:user_id', scores the percentage"""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _key(key: BoardKey) -> str:
+        return 'leaderboard:' + ':'.join(part or '*' for part in key)
+
+    def clear(self):
+        # Sorted sets are shared by all workers and ZADD is idempotent, so a rebuild
+        # re-adds on top instead of wiping what other workers are serving
+        pass
+
+    def record(self, key: BoardKey, exam_id: int, user_id: int, score: int):
+        self._redis.zadd(self._key(key), {f'{exam_id}:{user_id}': score})
+
+    def record_many(self, entries: List[Tuple[BoardKey, int, int, int]]):
+        pipe = self._redis.pipeline(transaction=False)
+        for key, exam_id, user_id, score in entries:
+            pipe.zadd(self._key(key), {f'{exam_id}:{user_id}': score})
+        pipe.execute()
+
+    def counts(self, key: BoardKey, score: int) -> Tuple[int, int, int]:
+        pipe = self._redis.pipeline()
+        pipe.zcount(self._key(key), f'({score}', '+inf')
+        pipe.zcount(self._key(key), '-inf', f'({score}')
+        pipe.zcard(self._key(key))
+        above, below, total = pipe.execute()
+        return above, below, total
+
+    def top(self, key: BoardKey, limit: int) -> List[Tuple[int, int, int]]:
+        entries = []
+        for member, score in self._redis.zrevrange(self._key(key), 0, limit - 1, withscores=True):
+            exam_id, user_id = member.split(':')
+            entries.append((int(exam_id), int(user_id), int(score)))
+        return entries
+
+
+class Leaderboard:
+    """
+    Leaderboards of submitted exam results, one per (subject, class_level, exam_type).
+
+    Every submitted exam is one entry scored by its percentage. rank, percentile and
+    top N are O(log n) (Fenwick tree over the 101 possible scores, or Redis sorted
+    sets); submit_exam records each new result and rebuild() reloads from the database.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def record(self, exam: Exam, result: ExamResult):
+        self.backend.record(
+            board_key(exam.subject, exam.class_level, exam.exam_type),
+            exam.id, exam.user_id, result.percentage or 0
+        )
+
+    def standing(self, key: BoardKey, score: int) -> Dict:
+        above, below, total = self.backend.counts(key, score)
+        return {
+            'score': score,
+            'rank': above + 1,
+            'total': total,
+            'percentile': round(below / total * 100, 2) if total else 0.0
+        }
+
+    def top(self, key: BoardKey, limit: int = 10) -> List[Dict]:
+        # Entries come best first, so everyone scoring above an entry is listed before
+        # it and ties share the position of the first of them
+        standings = []
+        rank = 0
+        previous = None
+        for position, (exam_id, user_id, score) in enumerate(self.backend.top(key, limit), start=1):
+            if score != previous:
+                rank, previous = position, score
+            standings.append({'exam_id': exam_id, 'user_id': user_id, 'score': score, 'rank': rank})
+        return standings
+
+    def rebuild(self, session_factory=SessionLocal) -> int:
+        """Reload every submitted result from the database (called at startup)"""
+        self.backend.clear()
+        db = session_factory()
+        count = 0
+        try:
+            rows = db.query(
+                Exam.id, Exam.user_id, Exam.subject, Exam.class_level, Exam.exam_type, ExamResult.percentage
+            ).join(ExamResult, ExamResult.exam_id == Exam.id).yield_per(1000)
+            batch = []
+            for exam_id, user_id, subject, class_level, exam_type, percentage in rows:
+                batch.append((board_key(subject, class_level, exam_type), exam_id, user_id, percentage or 0))
+                if len(batch) >= 1000:
+                    self.backend.record_many(batch)
+                    count += len(batch)
+                    batch = []
+            self.backend.record_many(batch)
+            count += len(batch)
+        finally:
+            db.close()
+        logger.info(f"🏆 Leaderboards rebuilt from {count} exam results")
+        return count
+
+
+_leaderboard: Optional[Leaderboard] = None
+
+
+def get_leaderboard() -> Leaderboard:
+    global _leaderboard
+    if _leaderboard is None:
+        backend_name = settings.LEADERBOARD_BACKEND
+        if backend_name not in LEADERBOARD_BACKENDS:
+            raise ValueError(f"Unknown LEADERBOARD_BACKEND '{backend_name}'. Use one of {LEADERBOARD_BACKENDS}")
+        if backend_name == 'auto':
+            backend_name = 'redis' if settings.REDIS_URL else 'memory'
+        if backend_name == 'redis':
+            if not settings.REDIS_URL:
+                raise ValueError("LEADERBOARD_BACKEND is 'redis' but REDIS_URL is not set")
+            _leaderboard = Leaderboard(RedisLeaderboardBackend(settings.REDIS_URL))
+        else:
+            if settings.WEB_CONCURRENCY > 1:
+                raise ValueError(
+                    f"LEADERBOARD_BACKEND 'memory' needs a single worker but WEB_CONCURRENCY is "
+                    f"{settings.WEB_CONCURRENCY}; set REDIS_URL or use 'redis'"
+                )
+            _leaderboard = Leaderboard(MemoryLeaderboardBackend())
+    return _leaderboard
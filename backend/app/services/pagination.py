@@ -0,0 +1,135 @@
+"""
+Keyset Pagination
+Opaque (created_at, id) or (lead, created_at, id) cursors for newest-first lists, so
+each page is one index range scan no matter how deep the user has scrolled
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import String, literal, tuple_
+from sqlalchemy.orm import Query
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# List endpoints that return a bare JSON array send the next page's cursor here
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int, lead=None) -> str:
+    """`lead` is the extra leading sort key (e.g. year) for lists ordered by it first"""
+    values = [created_at.isoformat(), row_id]
+    if lead is not None:
+        values.insert(0, lead)
+    payload = json.dumps(values)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, with_lead: bool = False) -> Tuple:
+    """
+    Returns (created_at, id), or (lead, created_at, id) when with_lead is set
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor for this list
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if with_lead:
+            lead, created_at, row_id = values
+            if not isinstance(lead, (int, str)) or isinstance(lead, bool):
+                raise ValueError("Invalid cursor")
+            return lead, datetime.fromisoformat(created_at), int(row_id)
+        created_at, row_id = values
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def check_page_size(limit: int) -> int:
+    """
+    Raises:
+        ValueError: If limit is outside 1..MAX_PAGE_SIZE
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _bind_created_at(query: Query, created_at: datetime, created_column):
+    if query.session.get_bind().dialect.name == 'sqlite':
+        # SQLite keeps server_default timestamps as text without microseconds; compare
+        # against the same text so the cursor row itself is not returned again
+        return literal(str(created_at.replace(tzinfo=None)), String)
+    return literal(created_at, created_column.type)
+
+
+def keyset_page(
+    query: Query,
+    created_column,
+    id_column,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    lead_column=None
+) -> Tuple[List, Optional[str]]:
+    """
+    One newest-first page of `query`, ordered by (created_at DESC, id DESC), or by
+    (lead DESC, created_at DESC, id DESC) when lead_column is given.
+
+    The query must select the sort columns under their own names (ORM entity or
+    projection). The cursor condition is a row-value comparison, which an index ending
+    in the sort columns (after any equality filters) turns into a range start, so
+    the page costs O(limit) instead of OFFSET's O(offset + limit).
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    columns = [created_column, id_column]
+    if lead_column is not None:
+        columns.insert(0, lead_column)
+
+    if cursor:
+        values = decode_cursor(cursor, with_lead=lead_column is not None)
+        bounds = [literal(value, column.type) for value, column in zip(values, columns)]
+        bounds[-2] = _bind_created_at(query, values[-2], created_column)
+        query = query.filter(tuple_(*columns) < tuple_(*bounds))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    lead = getattr(last, lead_column.key) if lead_column is not None else None
+    return rows, encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key), lead)
+
+
+def paginate(
+    query: Query,
+    created_column,
+    id_column,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    lead_column=None
+) -> Tuple[List, Optional[str]]:
+    """
+    keyset_page, or a legacy OFFSET page (in the same order, without a next cursor)
+    for clients that still send skip
+
+    Raises:
+        ValueError: If the cursor is invalid or combined with skip
+    """
+    if not skip:
+        return keyset_page(query, created_column, id_column, limit, cursor, lead_column)
+    if cursor:
+        raise ValueError("Use either skip or cursor, not both")
+    columns = [created_column, id_column]
+    if lead_column is not None:
+        columns.insert(0, lead_column)
+    rows = query.order_by(*[column.desc() for column in columns]).offset(skip).limit(limit).all()
+    return rows, None
@@ -0,0 +1,116 @@
+"""
+Password Hasher
+bcrypt hashing and checking on a dedicated, bounded process pool, so login storms
+neither block the event loop nor starve the threadpool shared by sync routes
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import bcrypt
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when more hash requests are pending than PASSWORD_HASH_MAX_PENDING"""
+
+
+def _password_bytes(password: str) -> bytes:
+    # Bcrypt has a 72-byte limit, so truncate if necessary (hash and check must match)
+    password_bytes = password.encode('utf-8')
+    if len(password_bytes) > 72:
+        password_bytes = password_bytes[:72]
+    return password_bytes
+
+
+def hash_password(password: str, rounds: int = 12) -> str:
+    """bcrypt hash with 2^rounds iterations (runs in a pool worker)"""
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """Compare a password with a bcrypt hash; the cost is read from the hash (runs in a pool worker)"""
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(_password_bytes(password), hashed_password)
+
+
+class PasswordHasher:
+    """
+    Async front for a ProcessPoolExecutor of `workers` processes.
+
+    At most `max_pending` hash/check calls may be queued or running; beyond that
+    calls fail fast with PasswordHasherBusy (the routes answer 429) instead of
+    queueing behind seconds of bcrypt work.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 32, rounds: int = 12):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Workers start from a clean interpreter instead of forking a process
+                # whose background threads may hold locks
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self._pending} password hashes already pending")
+            self._pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call instead of failing forever
+            logger.error("❌ Password hasher pool broke, restarting it")
+            self.shutdown()
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(check_password, password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(
+            workers=max(1, settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1),
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+            rounds=settings.BCRYPT_ROUNDS
+        )
+    return _hasher
@@ -3,19 +3,33 @@ PYQ Analysis System
 Detects repeated questions, finds important chapters, predicts weightage, generates mock tests
 """
 import re
-from typing import List, Dict, Tuple, Optional
+import random
+from typing import Iterator, List, Dict, Tuple, Optional
 from collections import Counter, defaultdict
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from app.models import PYQ, ExamType, Subject
+from app.models import PYQ, PYQQuestion, ExamType, Subject
 from app.database import get_db
+from app.services.curriculum_matcher import CurriculumMatcher, get_curriculum_matcher
+from app.services.weightage_trends import WeightageMatrix, summarize_predictions
+from app.services.pyq_stream_aggregators import ChapterAggregator, RepeatedPatternAggregator, TopicYearAggregator
+from app.services.pyq_index import CHAPTER, TOPIC, get_posting_index
 import json
 
+# Rows fetched per round trip when streaming PYQs
+STREAM_BATCH_SIZE = 1000
+
 
 class PYQAnalyzer:
     """Analyze Previous Year Questions for patterns and insights"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, matcher: Optional[CurriculumMatcher] = None):
         self.db = db
+        # Topic/chapter automaton is built once and shared across analyzers
+        self.matcher = matcher or get_curriculum_matcher()
+        # title -> matcher result, so chapters and topics of a title come from one scan
+        # even when several analyses run over the same PYQs
+        self._matches: Dict[str, Dict[str, List[str]]] = {}
     
     def get_pyqs(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> List[PYQ]:
         """Get PYQs from database"""
@@ -32,6 +46,52 @@ class PYQAnalyzer:
         
         return query.order_by(PYQ.year.desc()).all()
     
+    def iter_pyqs(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator:
+        """
+        Stream PYQs with a server-side cursor instead of materializing them all
+        Only the columns the analysis needs are fetched, batch_size rows at a time
+        """
+        query = self.db.query(PYQ.id, PYQ.title, PYQ.year, PYQ.subject).filter(
+            PYQ.exam_type == exam_type,
+            PYQ.is_approved == True
+        )
+        
+        if subject:
+            query = query.filter(PYQ.subject == subject)
+        
+        if years:
+            query = query.filter(PYQ.year.in_(years))
+        
+        return query.order_by(PYQ.year.desc()).execution_options(stream_results=True).yield_per(batch_size)
+    
+    def analyze_stream(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None,
+                       method: str = 'trend') -> Dict:
+        """
+        Repeated questions, important chapters and weightage prediction in a single
+        streaming pass; memory stays bounded regardless of corpus size
+        """
+        repeated = RepeatedPatternAggregator()
+        chapters = ChapterAggregator()
+        topics = TopicYearAggregator()
+        
+        for pyq in self.iter_pyqs(exam_type, subject, years):
+            repeated.add(self._create_pattern_key(self._extract_keywords(pyq.title)), {
+                'id': pyq.id,
+                'title': pyq.title,
+                'year': pyq.year,
+                'subject': pyq.subject.value if pyq.subject else None
+            })
+            matched = self.matcher.match(pyq.title)
+            chapters.add(matched['chapters'], pyq.year)
+            topics.add(matched['topics'], pyq.year)
+        
+        return {
+            'repeated_questions': repeated.result(),
+            'important_chapters': chapters.result(),
+            'weightage_prediction': topics.result(method)
+        }
+    
     def detect_repeated_questions(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> Dict:
         """
         Detect repeated questions across years
@@ -111,76 +171,66 @@ class PYQAnalyzer:
             'top_10_chapters': important_chapters[:10]
         }
     
-    def predict_weightage(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> Dict:
+    def predict_weightage(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None,
+                          method: str = 'trend') -> Dict:
         """
         Predict topic weightage based on historical data
+        method: 'trend' (moving average + least-squares slope) or 'exponential' (exponential smoothing)
         """
         pyqs = self.get_pyqs(exam_type, subject, years)
         
         if not pyqs:
             return {'error': 'No PYQs found'}
         
-        # Analyze by year
-        year_analysis = defaultdict(lambda: {'count': 0, 'topics': Counter()})
+        # Topic x year count matrix (single group)
+        matrix = WeightageMatrix.from_records(
+            (None, pyq.year, self._extract_topics(pyq.title)) for pyq in pyqs
+        )
+        return summarize_predictions(matrix, method)[None]
+    
+    def predict_weightage_batch(self, exam_type: ExamType, subjects: Optional[List[Subject]] = None,
+                                years: Optional[List[int]] = None, method: str = 'trend') -> Dict:
+        """
+        Predict topic weightage for several subjects in one query and one vectorized pass
+        Returns {subject: predict_weightage result}
+        """
+        query = self.db.query(PYQ.subject, PYQ.year, PYQ.title).filter(
+            PYQ.exam_type == exam_type,
+            PYQ.is_approved == True,
+            PYQ.subject.isnot(None)
+        )
         
-        for pyq in pyqs:
-            year_analysis[pyq.year]['count'] += 1
-            topics = self._extract_topics(pyq.title)
-            for topic in topics:
-                year_analysis[pyq.year]['topics'][topic] += 1
-        
-        # Calculate weightage trends
-        topic_weightage = defaultdict(list)
-        
-        for year, data in sorted(year_analysis.items()):
-            total = data['count']
-            for topic, count in data['topics'].items():
-                weightage = (count / total) * 100 if total > 0 else 0
-                topic_weightage[topic].append({
-                    'year': year,
-                    'weightage': round(weightage, 2)
-                })
+        if subjects:
+            query = query.filter(PYQ.subject.in_(subjects))
         
-        # Predict future weightage (simple average trend)
-        predictions = {}
-        for topic, history in topic_weightage.items():
-            if len(history) >= 2:
-                recent_weightage = sum([h['weightage'] for h in history[-3:]]) / min(3, len(history))
-                trend = (history[-1]['weightage'] - history[0]['weightage']) / len(history) if len(history) > 1 else 0
-                
-                predictions[topic] = {
-                    'current_weightage': history[-1]['weightage'],
-                    'predicted_weightage': round(max(0, recent_weightage + trend), 2),
-                    'trend': 'increasing' if trend > 0 else 'decreasing' if trend < 0 else 'stable',
-                    'history': history
-                }
+        if years:
+            query = query.filter(PYQ.year.in_(years))
         
-        # Sort by predicted weightage
-        predictions_sorted = dict(sorted(predictions.items(), key=lambda x: x[1]['predicted_weightage'], reverse=True))
+        matrix = WeightageMatrix.from_records(
+            (row.subject.value, row.year, self._extract_topics(row.title)) for row in query
+        )
+        summaries = summarize_predictions(matrix, method)
         
+        requested = [s.value for s in subjects] if subjects else sorted(summaries)
         return {
-            'years_analyzed': sorted(year_analysis.keys()),
-            'topic_predictions': predictions_sorted,
-            'high_weightage_topics': list(predictions_sorted.keys())[:10]
+            subject: summaries.get(subject, {'error': 'No PYQs found'})
+            for subject in requested
         }
     
     def generate_mock_test(self, exam_type: ExamType, subject: Optional[Subject] = None, 
                           num_questions: int = 30, difficulty: str = 'mixed') -> Dict:
         """
         Generate mock test based on PYQ patterns
+        Uses the cached posting index, so assembly is a few posting-list lookups
         """
-        pyqs = self.get_pyqs(exam_type, subject)
+        index = get_posting_index(self, exam_type, subject)
         
-        if not pyqs:
+        if not len(index):
             return {'error': 'No PYQs found'}
         
-        # Get important chapters
-        important_chapters = self.find_important_chapters(exam_type, subject)
-        top_chapters = [ch['chapter'] for ch in important_chapters.get('top_10_chapters', [])[:5]]
-        
-        # Get weightage predictions
-        weightage = self.predict_weightage(exam_type, subject)
-        high_weightage_topics = weightage.get('high_weightage_topics', [])[:10]
+        top_chapters = index.top_chapters[:5]
+        high_weightage_topics = index.high_weightage_topics
+        rng = random.Random()
         
         # Select questions based on patterns
         selected_questions = []
@@ -188,33 +238,31 @@ class PYQAnalyzer:
         # 60% from high weightage topics
         high_weightage_count = int(num_questions * 0.6)
         for topic in high_weightage_topics[:high_weightage_count]:
-            matching_pyqs = [p for p in pyqs if topic.lower() in p.title.lower()]
-            if matching_pyqs:
+            matching = index.sample(TOPIC, topic, 2, rng)
+            if matching:
                 selected_questions.append({
                     'type': 'high_weightage',
                     'topic': topic,
-                    'reference_pyqs': [{'year': p.year, 'title': p.title} for p in matching_pyqs[:2]]
+                    'reference_pyqs': index.references(matching)
                 })
         
         # 30% from important chapters
         chapter_count = int(num_questions * 0.3)
         for chapter in top_chapters[:chapter_count]:
-            matching_pyqs = [p for p in pyqs if chapter.lower() in p.title.lower()]
-            if matching_pyqs:
+            matching = index.sample(CHAPTER, chapter, 2, rng)
+            if matching:
                 selected_questions.append({
                     'type': 'important_chapter',
                     'chapter': chapter,
-                    'reference_pyqs': [{'year': p.year, 'title': p.title} for p in matching_pyqs[:2]]
+                    'reference_pyqs': index.references(matching)
                 })
         
         # 10% random
         remaining = num_questions - len(selected_questions)
-        import random
-        random_pyqs = random.sample(pyqs, min(remaining, len(pyqs)))
-        for pyq in random_pyqs:
+        for position in index.random_sample(remaining, rng):
             selected_questions.append({
                 'type': 'random',
-                'reference_pyqs': [{'year': pyq.year, 'title': pyq.title}]
+                'reference_pyqs': index.references([position])
             })
         
         return {
@@ -228,7 +276,7 @@ class PYQAnalyzer:
                 'random': remaining
             },
             'based_on': {
-                'total_pyqs_analyzed': len(pyqs),
+                'total_pyqs_analyzed': len(index),
                 'important_chapters': top_chapters,
                 'high_weightage_topics': high_weightage_topics[:5]
             }
@@ -246,73 +294,190 @@ class PYQAnalyzer:
         # Use top 3 keywords as pattern
         return ' '.join(sorted(keywords[:3]))
     
+    def _match(self, text: str) -> Dict[str, List[str]]:
+        """Topics and chapters of text, scanning each distinct text once per analyzer"""
+        matched = self._matches.get(text)
+        if matched is None:
+            matched = self._matches[text] = self.matcher.match(text)
+        return matched
+    
     def _extract_chapters(self, text: str) -> List[str]:
         """Extract chapter names from text"""
-        # Common chapter patterns
-        patterns = [
-            r'chapter\s+(\d+[a-z]?)',
-            r'ch\.\s*(\d+)',
-            r'(\w+\s+waves?)',
-            r'(\w+\s+mechanics)',
-            r'(\w+\s+optics)',
-            r'(\w+\s+electricity)',
-            r'(\w+\s+magnetism)',
-        ]
-        
-        chapters = []
-        text_lower = text.lower()
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text_lower)
-            chapters.extend(matches)
-        
-        # If no pattern match, try to extract from common Indian curriculum chapters
-        if not chapters:
-            common_chapters = [
-                'motion', 'force', 'energy', 'waves', 'optics', 'electricity',
-                'magnetism', 'atoms', 'nuclei', 'semiconductors', 'communication'
-            ]
-            for chapter in common_chapters:
-                if chapter in text_lower:
-                    chapters.append(chapter)
-        
-        return list(set(chapters)) if chapters else ['general']
+        return self._match(text)['chapters']
     
     def _extract_topics(self, text: str) -> List[str]:
         """Extract topics from text"""
-        # Common physics/chemistry/biology topics
-        topics = []
-        text_lower = text.lower()
-        
-        topic_keywords = {
-            'mechanics': ['motion', 'force', 'momentum', 'energy', 'work', 'power'],
-            'optics': ['light', 'lens', 'mirror', 'refraction', 'reflection'],
-            'electricity': ['current', 'voltage', 'resistance', 'circuit', 'electric'],
-            'magnetism': ['magnetic', 'field', 'induction', 'flux'],
-            'waves': ['wave', 'frequency', 'amplitude', 'oscillation'],
-            'thermodynamics': ['heat', 'temperature', 'entropy', 'thermodynamics'],
-            'atoms': ['atom', 'electron', 'proton', 'nucleus'],
-            'organic': ['organic', 'compound', 'reaction', 'molecule'],
-            'inorganic': ['inorganic', 'element', 'periodic'],
-            'biochemistry': ['biochemistry', 'enzyme', 'protein', 'dna']
+        return self._match(text)['topics']
+
+
+
+class PYQQuestionAnalyzer:
+    """
+    Analyze the per-question store (pyq_questions)
+    Aggregation happens in SQL with GROUP BY over the composite indexes, so only
+    summary rows reach Python no matter how many millions of questions are stored.
+    Results use the same shapes as PYQAnalyzer.
+    """
+    
+    REPEATED_PATTERN_LIMIT = 50
+    OCCURRENCES_PER_PATTERN = 10
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _filtered(self, query, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None):
+        query = query.filter(PYQQuestion.exam_type == exam_type)
+        
+        if subject:
+            query = query.filter(PYQQuestion.subject == subject)
+        
+        if years:
+            query = query.filter(PYQQuestion.year.in_(years))
+        
+        return query
+    
+    def count_questions(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> int:
+        return self._filtered(self.db.query(func.count(PYQQuestion.id)), exam_type, subject, years).scalar() or 0
+    
+    def detect_repeated_questions(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> Dict:
+        """
+        Detect questions repeated across years by their normalized-text hash
+        """
+        total = self.count_questions(exam_type, subject, years)
+        
+        repeats = self._filtered(
+            self.db.query(PYQQuestion.question_hash, func.count(PYQQuestion.id).label('count')),
+            exam_type, subject, years
+        ).group_by(PYQQuestion.question_hash).having(func.count(PYQQuestion.id) > 1).subquery()
+        
+        repeated_total = self.db.query(func.count()).select_from(repeats).scalar() or 0
+        top_repeats = (
+            self.db.query(repeats.c.question_hash, repeats.c.count)
+            .order_by(repeats.c.count.desc())
+            .limit(self.REPEATED_PATTERN_LIMIT)
+            .all()
+        )
+        
+        # Fetch a bounded sample of occurrences for the top patterns only
+        occurrences = defaultdict(list)
+        years_by_hash = defaultdict(list)
+        if top_repeats:
+            rows = self._filtered(
+                self.db.query(PYQQuestion.id, PYQQuestion.question_hash, PYQQuestion.question_text,
+                              PYQQuestion.year, PYQQuestion.subject),
+                exam_type, subject, years
+            ).filter(PYQQuestion.question_hash.in_([r.question_hash for r in top_repeats])).order_by(PYQQuestion.year)
+            
+            for row in rows.yield_per(1000):
+                years_by_hash[row.question_hash].append(row.year)
+                if len(occurrences[row.question_hash]) < self.OCCURRENCES_PER_PATTERN:
+                    occurrences[row.question_hash].append({
+                        'id': row.id,
+                        'title': row.question_text,
+                        'year': row.year,
+                        'subject': row.subject.value if row.subject else None
+                    })
+        
+        repeated = {}
+        for row in top_repeats:
+            sample = occurrences[row.question_hash]
+            pattern = sample[0]['title'][:120] if sample else row.question_hash
+            repeated[pattern] = {
+                'count': row.count,
+                'years': years_by_hash[row.question_hash],
+                'occurrences': sample,
+                'frequency': f"{row.count}/{total} questions"
+            }
+        
+        return {
+            'total_pyqs': total,
+            'repeated_patterns': repeated,
+            'repetition_rate': repeated_total / total * 100 if total else 0
         }
+    
+    def find_important_chapters(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None) -> Dict:
+        """
+        Find important chapters based on question frequency
+        """
+        total = self.count_questions(exam_type, subject, years)
         
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                topics.append(topic)
+        rows = self._filtered(
+            self.db.query(PYQQuestion.chapter, PYQQuestion.year, func.count(PYQQuestion.id)),
+            exam_type, subject, years
+        ).group_by(PYQQuestion.chapter, PYQQuestion.year).all()
+        
+        chapter_frequency = Counter()
+        chapter_years = defaultdict(set)
+        for chapter, year, count in rows:
+            chapter = chapter or 'general'
+            chapter_frequency[chapter] += count
+            chapter_years[chapter].add(year)
         
-        return topics if topics else ['general']
+        important_chapters = []
+        for chapter, count in chapter_frequency.most_common():
+            important_chapters.append({
+                'chapter': chapter,
+                'frequency': count,
+                'importance_score': round((count / total) * 100, 2) if total > 0 else 0,
+                'years_appeared': sorted(chapter_years[chapter]),
+                'appearance_rate': f"{count}/{total} questions"
+            })
+        
+        return {
+            'total_pyqs': total,
+            'important_chapters': important_chapters,
+            'top_10_chapters': important_chapters[:10]
+        }
+    
+    def predict_weightage(self, exam_type: ExamType, subject: Optional[Subject] = None, years: Optional[List[int]] = None,
+                          method: str = 'trend') -> Dict:
+        """
+        Predict topic weightage from marks per topic per year
+        """
+        marks = func.coalesce(func.sum(PYQQuestion.marks), 0)
+        totals = self._filtered(
+            self.db.query(PYQQuestion.year, marks), exam_type, subject, years
+        ).group_by(PYQQuestion.year).all()
+        
+        if not totals:
+            return {'error': 'No PYQs found'}
+        
+        counts = self._filtered(
+            self.db.query(PYQQuestion.year, PYQQuestion.topic, marks), exam_type, subject, years
+        ).group_by(PYQQuestion.year, PYQQuestion.topic).all()
+        
+        matrix = WeightageMatrix.from_counts(
+            ((None, year, topic or 'general', value) for year, topic, value in counts),
+            ((None, year, value) for year, value in totals)
+        )
+        return summarize_predictions(matrix, method)[None]
+
+
+ANALYSIS_SOURCES = ('papers', 'questions')
 
 
+def get_analyzer(db: Session, source: str = 'papers'):
+    """Return the analyzer for a data source: 'papers' (PYQ titles) or 'questions' (pyq_questions)"""
+    if source == 'questions':
+        return PYQQuestionAnalyzer(db)
+    return PYQAnalyzer(db)
+
 def analyze_pyqs(exam_type: ExamType, subject: Optional[Subject] = None, 
-                 years: Optional[List[int]] = None, db: Session = None) -> Dict:
+                 years: Optional[List[int]] = None, db: Session = None, streaming: bool = False) -> Dict:
     """Main analysis function"""
     analyzer = PYQAnalyzer(db)
     
+    if streaming:
+        analysis = analyzer.analyze_stream(exam_type, subject, years)
+    else:
+        analysis = {
+            'repeated_questions': analyzer.detect_repeated_questions(exam_type, subject, years),
+            'important_chapters': analyzer.find_important_chapters(exam_type, subject, years),
+            'weightage_prediction': analyzer.predict_weightage(exam_type, subject, years)
+        }
+    
     return {
-        'repeated_questions': analyzer.detect_repeated_questions(exam_type, subject, years),
-        'important_chapters': analyzer.find_important_chapters(exam_type, subject, years),
-        'weightage_prediction': analyzer.predict_weightage(exam_type, subject, years),
+        **analysis,
         'summary': {
             'exam_type': exam_type.value,
             'subject': subject.value if subject else 'All',
@@ -0,0 +1,216 @@
+"""
+Batch PYQ Analysis
+Runs the PYQ analysis for every (exam_type, subject) partition in a long-lived
+process pool and merges the results into a single report
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.models import ExamType, Subject
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchAnalysisBusy(RuntimeError):
+    """Raised when PYQ_BATCH_MAX_CONCURRENT batch analyses are already running"""
+
+
+# Per-process session factory, created by the pool initializer
+_worker_session_factory = None
+
+
+def _init_worker(database_url: str):
+    """Give each worker process its own single-connection engine"""
+    global _worker_session_factory
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    worker_engine = create_engine(database_url, connect_args=connect_args, pool_size=1, max_overflow=0)
+    _worker_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+
+
+def analyze_partition(exam_type: str, subject: Optional[str], years: Optional[List[int]] = None) -> Dict:
+    """Analyze one (exam_type, subject) partition inside a worker process"""
+    from app.services.pyq_analyzer import PYQAnalyzer
+
+    start = time.time()
+    db = _worker_session_factory()
+    try:
+        analyzer = PYQAnalyzer(db)
+        analysis = analyzer.analyze_stream(ExamType(exam_type), Subject(subject) if subject else None, years)
+    finally:
+        db.close()
+
+    analysis['elapsed_seconds'] = round(time.time() - start, 3)
+    analysis['worker_pid'] = os.getpid()
+    return analysis
+
+
+def get_worker_count(max_workers: Optional[int] = None) -> int:
+    workers = max_workers or settings.PYQ_ANALYSIS_WORKERS or os.cpu_count() or 1
+    return max(1, workers)
+
+
+class BatchAnalysisPool:
+    """
+    Long-lived ProcessPoolExecutor of `workers` processes shared by every batch run.
+
+    The pool is created on first use from a clean interpreter (forkserver, or spawn
+    where forkserver is unavailable) rather than by forking the web worker with its
+    connection pool and background threads. At most `max_concurrent` runs may use it
+    at once; further runs fail fast with BatchAnalysisBusy.
+    """
+
+    def __init__(self, workers: int = 1, max_concurrent: int = 1, database_url: Optional[str] = None):
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        self.database_url = database_url or settings.DATABASE_URL
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._runs = threading.BoundedSemaphore(max_concurrent)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.database_url,)
+                )
+            return self._executor
+
+    def run(
+        self,
+        exam_types: Optional[List[ExamType]] = None,
+        subjects: Optional[List[Subject]] = None,
+        years: Optional[List[int]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict:
+        """
+        Analyze every (exam_type, subject) pair in parallel, keeping at most
+        max_workers partitions (default: the whole pool) in flight.
+
+        Partitions are independent, so they are spread over the worker processes
+        (CPU-bound title matching does not contend for the GIL). A failing partition
+        is reported in 'failed' instead of aborting the whole report.
+
+        Returns:
+            {'partitions': {exam_type: {subject: analysis}}, 'failed': [...], 'summary': {...}}
+
+        Raises:
+            BatchAnalysisBusy: If max_concurrent runs are already in progress
+        """
+        if not self._runs.acquire(blocking=False):
+            raise BatchAnalysisBusy(f"{self.max_concurrent} batch analyses already running")
+        try:
+            return self._run(exam_types or list(ExamType), subjects or list(Subject), years, max_workers)
+        finally:
+            self._runs.release()
+
+    def _run(self, exam_types: List[ExamType], subjects: List[Subject], years: Optional[List[int]],
+             max_workers: Optional[int]) -> Dict:
+        partitions: List[Tuple[str, str]] = [(e.value, s.value) for e in exam_types for s in subjects]
+        in_flight = min(max_workers or self.workers, self.workers, len(partitions)) or 1
+
+        start = time.time()
+        report: Dict[str, Dict[str, Dict]] = {exam_type.value: {} for exam_type in exam_types}
+        failed = []
+
+        executor = self._get_executor()
+        queued = iter(partitions)
+        futures = {}
+
+        def submit(count: int):
+            for exam_type, subject in itertools.islice(queued, count):
+                futures[executor.submit(analyze_partition, exam_type, subject, years)] = (exam_type, subject)
+
+        broken = False
+        submit(in_flight)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                exam_type, subject = futures.pop(future)
+                try:
+                    report[exam_type][subject] = future.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    failed.append({'exam_type': exam_type, 'subject': subject, 'error': str(e)})
+                except Exception as e:
+                    failed.append({'exam_type': exam_type, 'subject': subject, 'error': str(e)})
+            if not broken:
+                submit(len(done))
+
+        if broken:
+            # A worker died; start a fresh pool on the next run instead of failing forever
+            logger.error("❌ Batch analysis pool broke, restarting it")
+            for exam_type, subject in queued:
+                failed.append({'exam_type': exam_type, 'subject': subject, 'error': 'worker pool broke'})
+            self.shutdown()
+
+        return {
+            'partitions': merge_partition_order(report, exam_types, subjects),
+            'failed': failed,
+            'summary': {
+                'partitions': len(partitions),
+                'workers': in_flight,
+                'total_pyqs': sum(
+                    result['important_chapters']['total_pyqs']
+                    for by_subject in report.values() for result in by_subject.values()
+                ),
+                'elapsed_seconds': round(time.time() - start, 3),
+                'years_analyzed': years or 'All available years'
+            }
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool: Optional[BatchAnalysisPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_batch_analysis_pool() -> BatchAnalysisPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BatchAnalysisPool(
+                workers=get_worker_count(),
+                max_concurrent=max(1, settings.PYQ_BATCH_MAX_CONCURRENT)
+            )
+        return _pool
+
+
+def run_batch_analysis(
+    exam_types: Optional[List[ExamType]] = None,
+    subjects: Optional[List[Subject]] = None,
+    years: Optional[List[int]] = None,
+    max_workers: Optional[int] = None
+) -> Dict:
+    """Run a batch analysis on the shared pool (see BatchAnalysisPool.run)"""
+    return get_batch_analysis_pool().run(exam_types, subjects, years, max_workers)
+
+
+def merge_partition_order(report: Dict[str, Dict[str, Dict]], exam_types: List[ExamType],
+                          subjects: List[Subject]) -> Dict[str, Dict[str, Dict]]:
+    """Results arrive in completion order; return them in the requested exam/subject order"""
+    return {
+        exam_type.value: {
+            subject.value: report[exam_type.value][subject.value]
+            for subject in subjects if subject.value in report[exam_type.value]
+        }
+        for exam_type in exam_types
+    }
@@ -0,0 +1,131 @@
+"""
+PYQ Posting Index
+Cached topic/chapter -> PYQ posting lists used to assemble mock tests without
+rescanning every PYQ on each request
+"""
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.models import ExamType, Subject
+from app.services.pyq_stream_aggregators import ChapterAggregator, TopicYearAggregator
+
+
+TOPIC = 'topic'
+CHAPTER = 'chapter'
+
+
+class PYQPostingIndex:
+    """
+    Posting lists of PYQ positions per high-weightage topic and important chapter.
+
+    Built in one pass together with the chapter/weightage analysis it depends on.
+    Titles are lowercased once at build time; each posting list carries cumulative
+    recency weights so drawing reference PYQs is a binary search, not a scan.
+    """
+
+    def __init__(self, years: List[int], titles: List[str], important_chapters: Dict, weightage: Dict):
+        self.years = years
+        self.titles = titles
+        self.important_chapters = important_chapters
+        self.weightage = weightage
+        self.top_chapters = [ch['chapter'] for ch in important_chapters.get('top_10_chapters', [])]
+        self.high_weightage_topics = weightage.get('high_weightage_topics', [])[:10]
+        self.postings: Dict[Tuple[str, str], np.ndarray] = {}
+        self.cumulative_weights: Dict[Tuple[str, str], np.ndarray] = {}
+        self.built_at = time.time()
+        self._build_postings()
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _build_postings(self):
+        titles_lower = [title.lower() for title in self.titles]
+        years = np.asarray(self.years, dtype=np.float64)
+        oldest = years.min() if len(years) else 0
+
+        labels = [(TOPIC, topic) for topic in self.high_weightage_topics]
+        labels += [(CHAPTER, chapter) for chapter in self.top_chapters]
+        for kind, label in labels:
+            needle = label.lower()
+            positions = np.fromiter(
+                (i for i, title in enumerate(titles_lower) if needle in title),
+                dtype=np.int64
+            )
+            if not len(positions):
+                continue
+            self.postings[(kind, label)] = positions
+            # Recent papers are more representative: weight grows linearly with year
+            self.cumulative_weights[(kind, label)] = np.cumsum(years[positions] - oldest + 1)
+
+    def sample(self, kind: str, label: str, k: int, rng: random.Random) -> List[int]:
+        """Draw up to k distinct PYQ positions from a posting list, weighted by recency"""
+        positions = self.postings.get((kind, label))
+        if positions is None:
+            return []
+        if len(positions) <= k:
+            return positions.tolist()
+
+        cumulative = self.cumulative_weights[(kind, label)]
+        total = cumulative[-1]
+        chosen = []
+        # Rejection on duplicates; k is tiny compared to the posting list
+        for _ in range(k * 8):
+            index = int(np.searchsorted(cumulative, rng.random() * total, side='right'))
+            position = int(positions[min(index, len(positions) - 1)])
+            if position not in chosen:
+                chosen.append(position)
+                if len(chosen) == k:
+                    break
+        return chosen
+
+    def random_sample(self, k: int, rng: random.Random) -> List[int]:
+        return rng.sample(range(len(self.titles)), min(k, len(self.titles)))
+
+    def references(self, positions: List[int]) -> List[Dict]:
+        return [{'year': self.years[p], 'title': self.titles[p]} for p in positions]
+
+
+def build_posting_index(analyzer, exam_type: ExamType, subject: Optional[Subject] = None) -> PYQPostingIndex:
+    """Stream the PYQs once, computing the analysis and the index together"""
+    years: List[int] = []
+    titles: List[str] = []
+    chapters = ChapterAggregator()
+    topics = TopicYearAggregator()
+
+    for pyq in analyzer.iter_pyqs(exam_type, subject):
+        matched = analyzer.matcher.match(pyq.title)
+        chapters.add(matched['chapters'], pyq.year)
+        topics.add(matched['topics'], pyq.year)
+        years.append(pyq.year)
+        titles.append(pyq.title)
+
+    return PYQPostingIndex(years, titles, chapters.result(), topics.result())
+
+
+_index_cache: Dict[Tuple[str, Optional[str]], PYQPostingIndex] = {}
+_index_lock = threading.Lock()
+
+
+def get_posting_index(analyzer, exam_type: ExamType, subject: Optional[Subject] = None) -> PYQPostingIndex:
+    """Return the cached index for (exam_type, subject), rebuilding it when older than the TTL"""
+    key = (exam_type.value, subject.value if subject else None)
+    index = _index_cache.get(key)
+    if index is not None and time.time() - index.built_at < settings.PYQ_INDEX_TTL_SECONDS:
+        return index
+
+    with _index_lock:
+        # Another request may have rebuilt it while we waited
+        index = _index_cache.get(key)
+        if index is None or time.time() - index.built_at >= settings.PYQ_INDEX_TTL_SECONDS:
+            index = build_posting_index(analyzer, exam_type, subject)
+            _index_cache[key] = index
+    return index
+
+
+def invalidate_posting_index():
+    """Drop all cached indexes (call after PYQs are added, approved or deleted)"""
+    with _index_lock:
+        _index_cache.clear()
@@ -0,0 +1,137 @@
+"""
+PYQ Question Store
+Bulk ingestion of parsed PYQ questions into the pyq_questions table
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Union
+from sqlalchemy.engine import Engine
+from app.database import engine as default_engine
+from app.models import PYQQuestion, ExamType, Subject, ClassLevel
+from app.services.curriculum_matcher import GENERAL, get_curriculum_matcher
+from app.services.bulk_insert import copy_rows, iter_batches
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Columns written by the bulk path (id and created_at are filled by the database)
+INGEST_COLUMNS = [
+    'pyq_id', 'exam_type', 'year', 'class_level', 'subject', 'question_number',
+    'question_text', 'question_hash', 'chapter', 'topic', 'marks'
+]
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so reworded copies hash alike"""
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def question_hash(text: str) -> str:
+    return hashlib.sha1(normalize_question(text).encode('utf-8')).hexdigest()
+
+
+def prepare_question(raw: Union[Dict, str]) -> Dict:
+    """
+    Validate one parsed question (dict or JSON line) and fill derived fields.
+
+    Required: question_text, exam_type, year. Chapter and topic are detected with the
+    curriculum matcher when the parser did not provide them.
+
+    Raises:
+        ValueError: If the JSON is malformed, a required field is missing or an enum value is invalid
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    text = (raw.get('question_text') or '').strip()
+    if not text:
+        raise ValueError("question_text is required")
+    if raw.get('year') in (None, ''):
+        raise ValueError("year is required")
+
+    exam_type = ExamType(str(raw.get('exam_type', '')).strip().lower())
+    subject = Subject(str(raw['subject']).strip().lower()) if raw.get('subject') else None
+    class_level = ClassLevel(str(raw['class_level']).strip()) if raw.get('class_level') else None
+
+    chapter = raw.get('chapter')
+    topic = raw.get('topic')
+    if not chapter or not topic:
+        matched = get_curriculum_matcher().match(text)
+        chapter = chapter or matched['chapters'][0]
+        topic = topic or matched['topics'][0]
+
+    return {
+        'pyq_id': raw.get('pyq_id'),
+        'exam_type': exam_type,
+        'year': int(raw['year']),
+        'class_level': class_level,
+        'subject': subject,
+        'question_number': raw.get('question_number'),
+        'question_text': text,
+        'question_hash': question_hash(text),
+        'chapter': (chapter or GENERAL).strip().lower(),
+        'topic': (topic or GENERAL).strip().lower(),
+        'marks': 1 if raw.get('marks') in (None, '') else int(raw['marks'])
+    }
+
+
+def iter_questions_jsonl(stream: Iterable) -> Iterator[str]:
+    """
+    Yield each non-empty line of a JSON-lines stream (text or bytes).
+    Lines are decoded by prepare_question so one malformed line only skips that row.
+    """
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if line:
+            yield line
+
+
+def bulk_ingest_questions(
+    rows: Iterable[Union[Dict, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bind: Optional[Engine] = None,
+    use_copy: Optional[bool] = None
+) -> Dict:
+    """
+    Stream parsed questions into pyq_questions in batches.
+
+    Rows are consumed lazily, so memory is bounded by batch_size no matter how many
+    questions the source yields. Each batch is one transaction: COPY on Postgres,
+    a single executemany INSERT elsewhere. Invalid rows are skipped and counted.
+
+    Returns:
+        {'inserted': int, 'skipped': int, 'batches': int, 'errors': [first few errors]}
+    """
+    bind = bind or default_engine
+    if use_copy is None:
+        use_copy = bind.dialect.name == 'postgresql'
+
+    stats = {'inserted': 0, 'skipped': 0, 'batches': 0, 'errors': []}
+
+    def prepared():
+        for line_number, raw in enumerate(rows, start=1):
+            try:
+                yield prepare_question(raw)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                stats['skipped'] += 1
+                if len(stats['errors']) < 20:
+                    stats['errors'].append(f"row {line_number}: {e}")
+
+    table = PYQQuestion.__table__
+    for batch in iter_batches(prepared(), batch_size):
+        with bind.begin() as conn:
+            if use_copy:
+                copy_rows(conn, table, INGEST_COLUMNS, batch)
+            else:
+                conn.execute(table.insert(), batch)
+        stats['inserted'] += len(batch)
+        stats['batches'] += 1
+
+    return stats
+
+
+def ingest_questions_file(stream: TextIO, batch_size: int = DEFAULT_BATCH_SIZE, bind: Optional[Engine] = None) -> Dict:
+    """Ingest a JSON-lines stream of parsed questions"""
+    return bulk_ingest_questions(iter_questions_jsonl(stream), batch_size=batch_size, bind=bind)
@@ -0,0 +1,174 @@
+"""
+Streaming PYQ Aggregators
+Incremental, bounded-memory aggregators fed one PYQ at a time by
+PYQAnalyzer.analyze_stream, so a full analysis is a single pass over the corpus
+"""
+import hashlib
+import heapq
+from typing import Dict, Hashable, List, Optional
+from collections import Counter, defaultdict
+from app.services.weightage_trends import WeightageMatrix, summarize_predictions
+
+
+def _hash64(value: str, seed: int = 0) -> int:
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8, salt=seed.to_bytes(16, 'little')).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class MinHashSketch:
+    """
+    Bottom-k MinHash sketch: keeps the k smallest hash values seen.
+
+    Estimates the number of distinct items in O(k) memory and, between two sketches,
+    their Jaccard similarity (e.g. how much of this year's question patterns repeat
+    from last year).
+    """
+
+    def __init__(self, k: int = 256, seed: int = 0):
+        self.k = k
+        self.seed = seed
+        self._heap: List[int] = []  # max-heap of the k smallest hashes (negated)
+        self._members = set()
+
+    def add(self, value: str):
+        h = _hash64(value, self.seed)
+        if h in self._members:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, -h)
+            self._members.add(h)
+        elif h < -self._heap[0]:
+            evicted = -heapq.heappushpop(self._heap, -h)
+            self._members.discard(evicted)
+            self._members.add(h)
+
+    def estimate_distinct(self) -> int:
+        if len(self._heap) < self.k:
+            return len(self._heap)
+        kth_smallest = -self._heap[0]
+        return int((self.k - 1) * (2 ** 64) / kth_smallest)
+
+    def jaccard(self, other: "MinHashSketch") -> float:
+        union = sorted(self._members | other._members)[:self.k]
+        if not union:
+            return 0.0
+        both = self._members & other._members
+        return sum(1 for h in union if h in both) / len(union)
+
+
+class RepeatedPatternAggregator:
+    """
+    Track repeated question patterns in bounded memory.
+
+    At most `capacity` patterns are kept. When the table is full, the least frequent
+    tenth is evicted in one batch (amortized O(log n) per PYQ), so counts are exact
+    while distinct patterns stay below capacity and only rare patterns can be lost
+    beyond it. Each pattern keeps a year histogram and a capped occurrence sample;
+    a MinHash sketch estimates the true number of distinct patterns.
+    """
+
+    def __init__(self, capacity: int = 5000, sample_size: int = 10):
+        self.capacity = capacity
+        self.sample_size = sample_size
+        self.total = 0
+        self.evicted = 0
+        self.entries: Dict[str, Dict] = {}
+        self.distinct = MinHashSketch()
+
+    def _evict(self):
+        drop = max(1, self.capacity // 10)
+        for pattern in heapq.nsmallest(drop, self.entries, key=lambda p: self.entries[p]['count']):
+            del self.entries[pattern]
+        self.evicted += drop
+
+    def add(self, pattern: str, occurrence: Dict):
+        self.total += 1
+        self.distinct.add(pattern)
+        entry = self.entries.get(pattern)
+        if entry is None:
+            if len(self.entries) >= self.capacity:
+                self._evict()
+            entry = {'count': 0, 'years': Counter(), 'occurrences': []}
+            self.entries[pattern] = entry
+        entry['count'] += 1
+        entry['years'][occurrence['year']] += 1
+        if len(entry['occurrences']) < self.sample_size:
+            entry['occurrences'].append(occurrence)
+
+    def result(self) -> Dict:
+        repeated = {}
+        for pattern, entry in self.entries.items():
+            if entry['count'] > 1:
+                repeated[pattern] = {
+                    'count': entry['count'],
+                    'years': sorted(entry['years'].elements()),
+                    'occurrences': entry['occurrences'],
+                    'frequency': f"{entry['count']}/{self.total} years"
+                }
+
+        repeated_sorted = dict(sorted(repeated.items(), key=lambda x: x[1]['count'], reverse=True))
+
+        return {
+            'total_pyqs': self.total,
+            'repeated_patterns': repeated_sorted,
+            'repetition_rate': len(repeated_sorted) / self.total * 100 if self.total else 0,
+            'distinct_patterns_estimate': self.distinct.estimate_distinct(),
+            'exact': self.evicted == 0
+        }
+
+
+class ChapterAggregator:
+    """Chapter frequency counter with the set of years each chapter appeared in"""
+
+    def __init__(self):
+        self.total = 0
+        self.frequency = Counter()
+        self.years = defaultdict(set)
+
+    def add(self, chapters: List[str], year: int):
+        self.total += 1
+        for chapter in chapters:
+            self.frequency[chapter] += 1
+            self.years[chapter].add(year)
+
+    def result(self) -> Dict:
+        important_chapters = []
+        for chapter, count in self.frequency.most_common():
+            important_chapters.append({
+                'chapter': chapter,
+                'frequency': count,
+                'importance_score': round((count / self.total) * 100, 2) if self.total > 0 else 0,
+                'years_appeared': sorted(self.years[chapter]),
+                'appearance_rate': f"{count}/{self.total} PYQs"
+            })
+
+        return {
+            'total_pyqs': self.total,
+            'important_chapters': important_chapters,
+            'top_10_chapters': important_chapters[:10]
+        }
+
+
+class TopicYearAggregator:
+    """Year histogram plus topic x year counts, the input of the weightage model"""
+
+    def __init__(self, group: Optional[Hashable] = None):
+        self.group = group
+        self.year_histogram = Counter()
+        self.topic_year_counts = Counter()
+
+    def add(self, topics: List[str], year: int):
+        self.year_histogram[year] += 1
+        for topic in topics:
+            self.topic_year_counts[(year, topic)] += 1
+
+    def matrix(self) -> WeightageMatrix:
+        return WeightageMatrix.from_counts(
+            ((self.group, year, topic, count) for (year, topic), count in self.topic_year_counts.items()),
+            ((self.group, year, count) for year, count in self.year_histogram.items())
+        )
+
+    def result(self, method: str = 'trend') -> Dict:
+        if not self.year_histogram:
+            return {'error': 'No PYQs found'}
+        return summarize_predictions(self.matrix(), method)[self.group]
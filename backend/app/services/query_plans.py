@@ -0,0 +1,102 @@
+"""
+Query Plan Check
+EXPLAINs the hot listing and history queries against the connected database and
+flags any that would read a whole table (sequential scan) or sort outside an index
+"""
+import json
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import literal, select, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+from app.models import (
+    CareerQuery, ClassLevel, Doubt, Exam, ExamAttempt, ExamQuestion, ExamType, Note, PYQ, Subject, User
+)
+
+PAGE = 20
+
+# name -> statement, shaped like the route that issues it (constant filter values)
+HOT_QUERIES: List[Tuple[str, Callable]] = [
+    ("notes: approved listing", lambda: select(Note).where(Note.is_approved == True)
+        .order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE)),
+    ("notes: by class and subject", lambda: select(Note).where(
+        Note.is_approved == True, Note.class_level == ClassLevel.CLASS_10, Note.subject == Subject.SCIENCE
+    ).order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE)),
+    ("notes: by subject", lambda: select(Note).where(Note.is_approved == True, Note.subject == Subject.SCIENCE)
+        .order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE)),
+    ("pyqs: approved listing", lambda: select(PYQ).where(PYQ.is_approved == True)
+        .order_by(PYQ.year.desc(), PYQ.created_at.desc(), PYQ.id.desc()).limit(PAGE)),
+    ("pyqs: by exam type", lambda: select(PYQ).where(PYQ.is_approved == True, PYQ.exam_type == ExamType.NEET)
+        .order_by(PYQ.year.desc(), PYQ.created_at.desc(), PYQ.id.desc()).limit(PAGE)),
+    ("pyqs: analysis scan", lambda: select(PYQ.id, PYQ.title, PYQ.year, PYQ.subject).where(
+        PYQ.exam_type == ExamType.NEET, PYQ.is_approved == True
+    ).order_by(PYQ.year.desc())),
+    ("pyqs: listing page after a cursor", lambda: select(PYQ).where(
+        PYQ.is_approved == True,
+        tuple_(PYQ.year, PYQ.created_at, PYQ.id) < tuple_(literal(2020), literal("2024-01-01 00:00:00"), literal(1000))
+    ).order_by(PYQ.year.desc(), PYQ.created_at.desc(), PYQ.id.desc()).limit(PAGE)),
+    ("admin: all notes", lambda: select(Note).order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE)),
+    ("admin: pending notes", lambda: select(Note).where(Note.is_approved == False)
+        .order_by(Note.created_at.desc(), Note.id.desc()).limit(PAGE)),
+    ("admin: all pyqs", lambda: select(PYQ).order_by(PYQ.created_at.desc(), PYQ.id.desc()).limit(PAGE)),
+    ("admin: all users", lambda: select(User).order_by(User.created_at.desc(), User.id.desc()).limit(PAGE)),
+    ("doubts: user history", lambda: select(Doubt.id, Doubt.question, Doubt.created_at)
+        .where(Doubt.user_id == 1).order_by(Doubt.created_at.desc(), Doubt.id.desc()).limit(PAGE)),
+    ("exams: user list", lambda: select(Exam.id, Exam.title, Exam.created_at)
+        .where(Exam.user_id == 1).order_by(Exam.created_at.desc(), Exam.id.desc()).limit(PAGE)),
+    ("career: user history", lambda: select(CareerQuery)
+        .where(CareerQuery.user_id == 1).order_by(CareerQuery.created_at.desc())),
+    ("exam questions: by exam", lambda: select(ExamQuestion)
+        .where(ExamQuestion.exam_id == 1).order_by(ExamQuestion.question_number)),
+    ("exam attempts: by exam", lambda: select(ExamAttempt).where(ExamAttempt.exam_id == 1)),
+    ("exam attempts: one answer", lambda: select(ExamAttempt.id)
+        .where(ExamAttempt.exam_id == 1, ExamAttempt.question_id == 1)),
+]
+
+
+def _sqlite_plan(conn: Connection, sql: str) -> Tuple[List[str], List[str]]:
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    lines = [row[3] for row in rows]
+    problems = []
+    for detail in lines:
+        if detail.startswith("SCAN ") and "USING" not in detail:
+            problems.append(f"sequential scan: {detail}")
+        elif "TEMP B-TREE" in detail:
+            problems.append(f"sort outside an index: {detail}")
+    return lines, problems
+
+
+def _postgres_plan(conn: Connection, sql: str) -> Tuple[List[str], List[str]]:
+    # Small tables are cheaper to scan, so the planner would pick a Seq Scan whether
+    # or not an index exists; with seq scans priced out, any that remain have no index
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, problems = [], []
+
+    def walk(node: Dict, depth: int):
+        label = node["Node Type"]
+        if node.get("Relation Name"):
+            label += f" on {node['Relation Name']}"
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        lines.append("  " * depth + label)
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"sequential scan: {label}")
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"], 0)
+    return lines, problems
+
+
+def check_query_plans(engine: Engine) -> List[Dict]:
+    """EXPLAIN each hot query; returns [{name, sql, plan, problems}]"""
+    is_sqlite = engine.dialect.name == "sqlite"
+    results = []
+    with engine.connect() as conn:
+        for name, build in HOT_QUERIES:
+            sql = str(build().compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            with conn.begin():
+                plan, problems = (_sqlite_plan if is_sqlite else _postgres_plan)(conn, sql)
+            results.append({'name': name, 'sql': sql, 'plan': plan, 'problems': problems})
+    return results
@@ -0,0 +1,205 @@
+"""
+Question Bank Service
+Shared, reusable exam questions with O(k) random sampling by random key
+"""
+import json
+import random
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from sqlalchemy import bindparam, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.database import engine as default_engine
+from app.models import QuestionBankItem, Subject, ClassLevel, ExamType
+from app.services.bulk_insert import iter_batches
+from app.services.pyq_question_store import DEFAULT_BATCH_SIZE, iter_questions_jsonl
+
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+@lru_cache(maxsize=4096)
+def parse_options(options_json: Optional[str]) -> Tuple[str, ...]:
+    """Decode an options JSON string once; bank questions share it across every exam"""
+    return tuple(json.loads(options_json)) if options_json else ()
+
+
+def prepare_bank_question(raw: Union[Dict, str]) -> Dict:
+    """
+    Validate one bank question (dict or JSON line), e.g. a parsed PYQ with its options.
+
+    Required: question_text, options (two or more), correct_answer.
+
+    Raises:
+        ValueError: If the JSON is malformed, a required field is missing or an enum value is invalid
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    text = (raw.get('question_text') or '').strip()
+    if not text:
+        raise ValueError("question_text is required")
+    options = raw.get('options')
+    if not isinstance(options, list) or len(options) < 2:
+        raise ValueError("options must be a list of at least two choices")
+    if raw.get('correct_answer') in (None, ''):
+        raise ValueError("correct_answer is required")
+    difficulty = str(raw.get('difficulty') or 'medium').strip().lower()
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {DIFFICULTIES}")
+
+    return {
+        'subject': Subject(str(raw['subject']).strip().lower()) if raw.get('subject') else None,
+        'class_level': ClassLevel(str(raw['class_level']).strip()) if raw.get('class_level') else None,
+        'exam_type': ExamType(str(raw['exam_type']).strip().lower()) if raw.get('exam_type') else None,
+        'difficulty': difficulty,
+        'question_text': text,
+        'options': json.dumps([str(option) for option in options]),
+        'correct_answer': str(raw['correct_answer']).strip(),
+        'marks': int(raw.get('marks') or 1),
+        'pyq_question_id': raw.get('pyq_question_id'),
+        'random_key': random.random()
+    }
+
+
+def import_bank_questions(
+    rows: Iterable[Union[Dict, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bind: Optional[Engine] = None
+) -> Dict:
+    """
+    Stream questions into the bank in batches, one transaction per batch.
+    Invalid rows are skipped and counted.
+
+    Returns:
+        {'inserted': int, 'skipped': int, 'batches': int, 'errors': [first few errors]}
+    """
+    bind = bind or default_engine
+    stats = {'inserted': 0, 'skipped': 0, 'batches': 0, 'errors': []}
+
+    def prepared():
+        for line_number, raw in enumerate(rows, start=1):
+            try:
+                yield prepare_bank_question(raw)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                stats['skipped'] += 1
+                if len(stats['errors']) < 20:
+                    stats['errors'].append(f"row {line_number}: {e}")
+
+    table = QuestionBankItem.__table__
+    for batch in iter_batches(prepared(), batch_size):
+        with bind.begin() as conn:
+            conn.execute(table.insert(), batch)
+        stats['inserted'] += len(batch)
+        stats['batches'] += 1
+
+    return stats
+
+
+def import_bank_questions_file(stream, batch_size: int = DEFAULT_BATCH_SIZE, bind: Optional[Engine] = None) -> Dict:
+    """Import a JSON-lines stream of bank questions"""
+    return import_bank_questions(iter_questions_jsonl(stream), batch_size=batch_size, bind=bind)
+
+
+def split_by_difficulty(total: int, difficulty: str, rng: random.Random) -> Dict[str, int]:
+    """How many questions to draw per difficulty ('mixed' picks one at random per question)"""
+    if difficulty != "mixed":
+        return {difficulty: total}
+    return dict(Counter(rng.choice(DIFFICULTIES) for _ in range(total)))
+
+
+def sample_bank_questions(
+    db: Session,
+    k: int,
+    subject: Optional[Subject] = None,
+    class_level: Optional[ClassLevel] = None,
+    exam_type: Optional[ExamType] = None,
+    difficulty: str = "medium",
+    rng: Optional[random.Random] = None
+) -> List[Tuple[int, int, str]]:
+    """
+    Draw up to k bank questions of one difficulty in O(k).
+
+    Every bank row carries a uniform random_key. A random start point is drawn and
+    the next k rows by random_key are read with an index range scan (wrapping around
+    to the start if the tail is short), instead of sorting the whole table with
+    ORDER BY random(). None filters match any value. Callers re-key the rows they use
+    (rekey_bank_questions) so later samples don't return the same run again.
+
+    Returns:
+        [(bank_question_id, marks, difficulty), ...]
+    """
+    rng = rng or random.Random()
+    query = db.query(QuestionBankItem.id, QuestionBankItem.marks, QuestionBankItem.difficulty).filter(
+        QuestionBankItem.difficulty == difficulty
+    )
+    if subject:
+        query = query.filter(QuestionBankItem.subject == subject)
+    if class_level:
+        query = query.filter(QuestionBankItem.class_level == class_level)
+    if exam_type:
+        query = query.filter(QuestionBankItem.exam_type == exam_type)
+
+    start = rng.random()
+    rows = query.filter(QuestionBankItem.random_key >= start).order_by(QuestionBankItem.random_key).limit(k).all()
+    if len(rows) < k:
+        rows += query.filter(QuestionBankItem.random_key < start).order_by(
+            QuestionBankItem.random_key
+        ).limit(k - len(rows)).all()
+    return [tuple(row) for row in rows]
+
+
+def rekey_bank_questions(db: Session, bank_question_ids: Iterable[int], rng: Optional[random.Random] = None):
+    """
+    Move sampled questions to fresh random keys (no commit).
+
+    A sample is a run of adjacent keys, so without this, exams whose start points land
+    close together would share long runs of questions. Rows are updated in id order so
+    concurrent exam creations lock them in the same order.
+    """
+    rng = rng or random.Random()
+    ids = sorted(set(bank_question_ids))
+    if not ids:
+        return
+    table = QuestionBankItem.__table__
+    db.execute(
+        table.update().where(table.c.id == bindparam('row_id')).values(random_key=bindparam('new_key')),
+        [{'row_id': bank_question_id, 'new_key': rng.random()} for bank_question_id in ids]
+    )
+
+
+def add_bank_questions(
+    db: Session,
+    questions: List[Dict],
+    subject: Optional[Subject] = None,
+    class_level: Optional[ClassLevel] = None,
+    exam_type: Optional[ExamType] = None
+) -> List[Tuple[int, int, str]]:
+    """
+    Insert generated questions into the bank (no commit) so later exams reuse them.
+
+    Returns:
+        [(bank_question_id, marks, difficulty), ...]
+    """
+    if not questions:
+        return []
+    rows = [
+        {
+            'subject': subject,
+            'class_level': class_level,
+            'exam_type': exam_type,
+            'difficulty': q.get("difficulty", "medium"),
+            'question_text': q["question_text"],
+            'options': json.dumps(q["options"]),
+            'correct_answer': q["correct_answer"],
+            'marks': q.get("marks", 1),
+            'random_key': random.random()
+        }
+        for q in questions
+    ]
+    result = db.execute(
+        insert(QuestionBankItem).returning(
+            QuestionBankItem.id, QuestionBankItem.marks, QuestionBankItem.difficulty
+        ),
+        rows
+    )
+    return [tuple(row) for row in result]
@@ -0,0 +1,240 @@
+"""
+Rate Limiter
+Token-bucket limits per user and per client IP for each expensive route group
+(sign-in, AI, revision, search), kept in process or shared through Redis
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+RATE_LIMIT_BACKENDS = ('memory', 'redis')
+
+PERIOD_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class RateLimitPolicy:
+    """A bucket of `limit` tokens refilled evenly over `period_seconds` (bursts up to `limit`)"""
+
+    def __init__(self, limit: int, period_seconds: float):
+        if limit < 1 or period_seconds <= 0:
+            raise ValueError("Rate limits need a positive count and period")
+        self.limit = limit
+        self.period_seconds = period_seconds
+        self.refill_per_second = limit / period_seconds
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> Optional["RateLimitPolicy"]:
+        """
+        Parse '20/minute' style specs; empty or 'off' disables the policy.
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        spec = (spec or '').strip().lower()
+        if not spec or spec == 'off':
+            return None
+        try:
+            count, period = spec.split('/')
+            return cls(int(count), PERIOD_SECONDS[period.strip().rstrip('s')])
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit '{spec}'. Use <count>/<second|minute|hour|day>")
+
+
+class RateLimitGroup:
+    def __init__(self, name: str, methods: Tuple[str, ...], prefixes: Tuple[str, ...],
+                 user_policy: Optional[RateLimitPolicy], ip_policy: Optional[RateLimitPolicy]):
+        self.name = name
+        self.methods = methods
+        self.prefixes = prefixes
+        self.user_policy = user_policy
+        self.ip_policy = ip_policy
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and path.startswith(self.prefixes)
+
+
+class RateLimitResult:
+    def __init__(self, allowed: bool, limit: int, remaining: int, retry_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+    def headers(self) -> dict:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining)
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class MemoryRateLimitBackend:
+    """Buckets in this process: key -> (tokens, updated_at), least recently used evicted first"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take_all(self, buckets: List[Tuple[str, RateLimitPolicy]]) -> Tuple[bool, List[float]]:
+        """
+        Take one token from every bucket, or from none if any is empty;
+        returns (allowed, tokens left per bucket)
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, policy in buckets:
+                tokens, updated_at = self._buckets.pop(key, (policy.limit, now))
+                levels.append(min(policy.limit, tokens + (now - updated_at) * policy.refill_per_second))
+            allowed = all(tokens >= 1 for tokens in levels)
+            if allowed:
+                levels = [tokens - 1 for tokens in levels]
+            for (key, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                # An evicted bucket was idle the longest, so it was (nearly) full anyway
+                self._buckets.popitem(last=False)
+        return allowed, levels
+
+
+# Refill every bucket and take from all of them (or none) atomically in Redis,
+# on Redis' clock so every worker agrees. ARGV holds capacity, rate per key.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if levels[i] < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    if allowed == 1 then
+        levels[i] = levels[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', levels[i], 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+    result[i + 1] = tostring(levels[i])
+end
+return result
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by every worker: one hash per key, expiring once it would be full again"""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._take = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take_all(self, buckets: List[Tuple[str, RateLimitPolicy]]) -> Tuple[bool, List[float]]:
+        args = []
+        for _, policy in buckets:
+            args += [policy.limit, policy.refill_per_second]
+        allowed, *levels = self._take(keys=[f'ratelimit:{key}' for key, _ in buckets], args=args)
+        return bool(allowed), [float(tokens) for tokens in levels]
+
+
+class RateLimiter:
+    """
+    Route groups, each with an optional per-user and per-IP policy.
+
+    A request is matched to its group by method and path prefix; it takes one token
+    from its user bucket (when signed in) and one from its IP bucket, and is refused
+    if either is empty. Both buckets are checked before either is taken from, so a
+    refused request costs nothing. Each check is O(1) per bucket.
+    """
+
+    def __init__(self, backend, groups: List[RateLimitGroup]):
+        self.backend = backend
+        self.groups = groups
+
+    def match(self, method: str, path: str) -> Optional[RateLimitGroup]:
+        for group in self.groups:
+            if group.matches(method, path):
+                return group
+        return None
+
+    def check(self, group: RateLimitGroup, user_id: Optional[str], ip: Optional[str]) -> Optional[RateLimitResult]:
+        buckets = []
+        if group.ip_policy and ip:
+            buckets.append((f'{group.name}:ip:{ip}', group.ip_policy))
+        if group.user_policy and user_id:
+            buckets.append((f'{group.name}:user:{user_id}', group.user_policy))
+
+        if not buckets:
+            return None
+
+        allowed, levels = self.backend.take_all(buckets)
+        result = None
+        for (_, policy), tokens in zip(buckets, levels):
+            if not allowed:
+                if tokens >= 1:
+                    continue
+                # Report the empty bucket that refills last
+                retry_after = (1 - tokens) / policy.refill_per_second
+                if result is None or retry_after > result.retry_after:
+                    result = RateLimitResult(False, policy.limit, 0, retry_after)
+                continue
+            # Report the bucket closest to running out
+            if result is None or int(tokens) < result.remaining:
+                result = RateLimitResult(True, policy.limit, int(tokens), 0.0)
+        return result
+
+
+def build_rate_limit_groups() -> List[RateLimitGroup]:
+    """The route groups and their policies from settings"""
+    parse = RateLimitPolicy.parse
+    return [
+        RateLimitGroup('login', ('POST',), ('/api/auth/login', '/api/auth/register'),
+                       None, parse(settings.RATE_LIMIT_LOGIN_IP)),
+        RateLimitGroup('ai', ('POST',), ('/api/ai/', '/api/career/'),
+                       parse(settings.RATE_LIMIT_AI_USER), parse(settings.RATE_LIMIT_AI_IP)),
+        RateLimitGroup('revision', ('GET', 'POST'), ('/api/revision/',),
+                       parse(settings.RATE_LIMIT_REVISION_USER), parse(settings.RATE_LIMIT_REVISION_IP)),
+        RateLimitGroup('search', ('GET', 'POST'), ('/api/search/',),
+                       parse(settings.RATE_LIMIT_SEARCH_USER), parse(settings.RATE_LIMIT_SEARCH_IP)),
+    ]
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the process-wide limiter, or None when RATE_LIMIT_ENABLED is off"""
+    global _limiter
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    if _limiter is None:
+        backend_name = settings.RATE_LIMIT_BACKEND
+        if backend_name not in RATE_LIMIT_BACKENDS:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend_name}'. Use one of {RATE_LIMIT_BACKENDS}")
+        if backend_name == 'redis':
+            if not settings.REDIS_URL:
+                raise ValueError("RATE_LIMIT_BACKEND is 'redis' but REDIS_URL is not set")
+            backend = RedisRateLimitBackend(settings.REDIS_URL)
+        else:
+            backend = MemoryRateLimitBackend()
+        _limiter = RateLimiter(backend, build_rate_limit_groups())
+    return _limiter
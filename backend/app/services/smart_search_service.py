@@ -2,8 +2,8 @@
 Ultra Fast Smart Search Service
 Google-style education search across notes, PYQs, and chapters
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Note, PYQ, Subject, ClassLevel, ExamType
 from app.services.ai_service import _call_ai, detect_language
 from typing import List, Dict, Optional
@@ -12,7 +12,7 @@ import re
 
 async def unified_search(
     query: str,
-    db: Session,
+    db: AsyncSession,
     search_type: str = "all",  # "all", "notes", "pyqs", "chapters"
     limit: int = 20
 ) -> Dict:
@@ -44,22 +44,25 @@ async def unified_search(
     
     # Search Notes
     if search_type in ["all", "notes"]:
-        notes = search_notes(db, query, keywords, limit)
+        notes = await search_notes(db, query, keywords, limit)
         results["notes"] = notes
     
     # Search PYQs
     if search_type in ["all", "pyqs"]:
-        pyqs = search_pyqs(db, query, keywords, limit)
+        pyqs = await search_pyqs(db, query, keywords, limit)
         results["pyqs"] = pyqs
     
     # Search Chapters (from notes and PYQs)
     if search_type in ["all", "chapters"]:
-        chapters = search_chapters(db, query, keywords, limit)
+        chapters = await search_chapters(db, query, keywords, limit)
         results["chapters"] = chapters
     
     # Calculate total results
     results["total_results"] = len(results["notes"]) + len(results["pyqs"]) + len(results["chapters"])
     
+    # End the read transaction so the connection goes back to the pool during the LLM call
+    await db.commit()
+    
     # Generate AI explanation/summary
     if results["total_results"] > 0:
         ai_explanation = await generate_search_explanation(query, results, detected_language)
@@ -83,7 +86,7 @@ def extract_keywords(query: str) -> List[str]:
     return keywords[:10]  # Top 10 keywords
 
 
-def search_notes(db: Session, query: str, keywords: List[str], limit: int) -> List[Dict]:
+async def search_notes(db: AsyncSession, query: str, keywords: List[str], limit: int) -> List[Dict]:
     """Search notes by title, chapter, subject, class"""
     query_lower = query.lower()
     
@@ -109,12 +112,12 @@ def search_notes(db: Session, query: str, keywords: List[str], limit: int) -> Li
     )
     
     # Query notes
-    notes_query = db.query(Note).filter(
+    notes_query = select(Note).where(
         Note.is_approved == True,
-        or_(*conditions) if conditions else None
+        or_(*conditions)
     ).limit(limit)
     
-    notes = notes_query.all()
+    notes = (await db.execute(notes_query)).scalars().all()
     
     # Format results
     from app.utils.url_rewrite import rewrite_file_url
@@ -133,7 +136,7 @@ def search_notes(db: Session, query: str, keywords: List[str], limit: int) -> Li
     } for note in notes]
 
 
-def search_pyqs(db: Session, query: str, keywords: List[str], limit: int) -> List[Dict]:
+async def search_pyqs(db: AsyncSession, query: str, keywords: List[str], limit: int) -> List[Dict]:
     """Search PYQs by exam type, year, subject, title"""
     query_lower = query.lower()
     
@@ -158,12 +161,11 @@ def search_pyqs(db: Session, query: str, keywords: List[str], limit: int) -> Lis
             break
     
     # Query PYQs
-    pyqs_query = db.query(PYQ).filter(
-        PYQ.is_approved == True,
-        or_(*conditions) if conditions else None
-    ).limit(limit)
+    pyqs_query = select(PYQ).where(PYQ.is_approved == True)
+    if conditions:
+        pyqs_query = pyqs_query.where(or_(*conditions))
     
-    pyqs = pyqs_query.all()
+    pyqs = (await db.execute(pyqs_query.limit(limit))).scalars().all()
     
     from app.utils.url_rewrite import rewrite_file_url
     
@@ -181,14 +183,16 @@ def search_pyqs(db: Session, query: str, keywords: List[str], limit: int) -> Lis
     } for pyq in pyqs]
 
 
-def search_chapters(db: Session, query: str, keywords: List[str], limit: int) -> List[Dict]:
+async def search_chapters(db: AsyncSession, query: str, keywords: List[str], limit: int) -> List[Dict]:
     """Search chapters across notes and PYQs"""
     query_lower = query.lower()
     
     # Get unique chapters from notes
-    notes = db.query(Note.chapter, Note.subject, Note.class_level).filter(
-        Note.is_approved == True
-    ).distinct().all()
+    notes = (await db.execute(
+        select(Note.chapter, Note.subject, Note.class_level).where(
+            Note.is_approved == True
+        ).distinct()
+    )).all()
     
     chapters = []
     seen_chapters = set()
@@ -0,0 +1,123 @@
+"""
+Token Revocation
+In-memory set of revoked access tokens, synced incrementally from the revoked_tokens
+table, so stateless token checks still honour logout, deactivation and deletion
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import RevokedToken, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Rows re-read below the last seen id, in case a lower id committed after a higher one
+SYNC_OVERLAP = 100
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        # Written with datetime.utcnow(); SQLite returns it naive
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenRevocationList:
+    """
+    Revoked token ids (jti -> expiry) and per-user minimum token versions
+    (user_id -> (min_version, expiry)).
+
+    is_revoked() is two dict lookups. Revocations made in this worker apply at once;
+    rows written by other workers are fetched by id past the last seen one at most every
+    sync_seconds. Entries are dropped once every token they cover has expired.
+    """
+
+    def __init__(self, sync_seconds: float = 5.0):
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, float] = {}
+        self._users: Dict[int, Tuple[int, float]] = {}
+        self._last_id = 0
+        self._synced_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._users)
+
+    def _apply(self, row: RevokedToken):
+        expires_at = _epoch(row.expires_at)
+        if row.jti:
+            self._tokens[row.jti] = expires_at
+        if row.user_id is not None and row.min_version is not None:
+            current = self._users.get(row.user_id)
+            if current is None or row.min_version >= current[0]:
+                self._users[row.user_id] = (row.min_version, max(expires_at, current[1] if current else 0))
+        self._last_id = max(self._last_id, row.id)
+
+    def _prune(self, now: float):
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+
+    def sync(self, db: Session, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+                return
+            # Claim this sync so concurrent requests keep using the current set meanwhile
+            self._synced_at = now
+            last_id = self._last_id
+        rows = db.query(RevokedToken).filter(
+            RevokedToken.id > last_id - SYNC_OVERLAP, RevokedToken.expires_at > datetime.utcnow()
+        ).order_by(RevokedToken.id).all()
+        with self._lock:
+            for row in rows:
+                self._apply(row)
+            self._prune(time.time())
+
+    def is_revoked(self, db: Session, claims: Dict) -> bool:
+        self.sync(db)
+        jti = claims.get("jti")
+        if jti and jti in self._tokens:
+            return True
+        entry = self._users.get(claims.get("uid"))
+        return entry is not None and claims.get("ver", 0) < entry[0]
+
+    def _add(self, db: Session, row: RevokedToken):
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        with self._lock:
+            self._apply(row)
+
+    def revoke_token(self, db: Session, jti: str, user_id: Optional[int], expires_at: datetime):
+        """Revoke one token (e.g. on logout) until it expires"""
+        self._add(db, RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+
+    def revoke_user(self, db: Session, user_id: int):
+        """
+        Revoke every token issued to a user so far by bumping their token_version.
+        Tokens issued afterwards (at the next login) carry the new version.
+        """
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return
+        user.token_version = (user.token_version or 0) + 1
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._add(db, RevokedToken(user_id=user_id, min_version=user.token_version, expires_at=expires_at))
+        logger.info(f"🔒 Revoked tokens of user {user_id} below version {user.token_version}")
+        # Purge rows whose tokens have all expired; the table stays small
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+        db.commit()
+
+
+_revocations: Optional[TokenRevocationList] = None
+
+
+def get_token_revocations() -> TokenRevocationList:
+    global _revocations
+    if _revocations is None:
+        _revocations = TokenRevocationList(sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS)
+    return _revocations
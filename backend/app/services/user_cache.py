@@ -0,0 +1,163 @@
+"""
+Authenticated User Cache
+Short-lived, size-bounded cache of users keyed by token subject, so most authenticated
+requests resolve the current user without a database query
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import CacheVersion, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+USER_CACHE_NAME = "users"
+
+
+class CachedUser:
+    """Detached, read-only snapshot of a User row with the attributes routes read"""
+    __slots__ = ('id', 'email', 'username', 'full_name', 'role', 'is_active', 'created_at', 'updated_at')
+
+    def __init__(self, user: User):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+
+class UserCache:
+    """
+    LRU of username -> (CachedUser, expires_at, version) bounded by max_size and ttl_seconds.
+
+    Every entry remembers the cluster-wide version stamp (the 'users' row of
+    cache_versions) it was loaded under. invalidate() bumps that stamp, so the calling
+    worker drops its entries at once and every other worker within
+    version_check_seconds, the only database read left on the hot path.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_size: int = 10000, version_check_seconds: float = 1.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.version_check_seconds = version_check_seconds
+        self._entries: "OrderedDict[str, Tuple[CachedUser, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_version(self, db: Session) -> int:
+        return db.query(CacheVersion.version).filter(CacheVersion.name == USER_CACHE_NAME).scalar() or 0
+
+    def _set_version(self, version: int, checked_at: float):
+        with self._lock:
+            # Stamps only grow; a read that raced an invalidate() must not roll it back
+            if self._version is not None and version < self._version:
+                version = self._version
+            if version != self._version:
+                self._entries.clear()
+            self._version = version
+            self._version_checked_at = checked_at
+
+    def current_version(self, db: Session) -> int:
+        """The version stamp, re-read from the database at most every version_check_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.version_check_seconds:
+                return self._version
+            # Claim this check so concurrent requests keep using the known stamp meanwhile
+            self._version_checked_at = now
+        self._set_version(self._read_version(db), now)
+        return self._version
+
+    def get_user(self, db: Session, username: str) -> Optional[CachedUser]:
+        # Captured before loading: a row read while an invalidation commits is stored
+        # under the old stamp and rejected once the new one is seen
+        version = self.current_version(db)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[1] > now and entry[2] == version:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        with self._lock:
+            self._entries[username] = (cached, now + self.ttl_seconds, version)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, db: Session):
+        """Drop every cached user here and bump the version stamp so other workers do too"""
+        bumped = db.query(CacheVersion).filter(CacheVersion.name == USER_CACHE_NAME).update(
+                {CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False
+            )
+        if not bumped:
+            try:
+                db.add(CacheVersion(name=USER_CACHE_NAME, version=1))
+                db.flush()
+            except IntegrityError:
+                # Another worker created the row first
+                db.rollback()
+                db.query(CacheVersion).filter(CacheVersion.name == USER_CACHE_NAME).update(
+                    {CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False
+                )
+        db.commit()
+        version = self._read_version(db)
+        self._set_version(version, time.monotonic())
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        logger.info(f"🔑 User cache invalidated (version {version})")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'version': self._version
+            }
+
+
+_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """Return the process-wide user cache, or None when USER_CACHE_ENABLED is off"""
+    global _cache
+    if not settings.USER_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = UserCache(
+            ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+            max_size=settings.USER_CACHE_MAX_SIZE,
+            version_check_seconds=settings.USER_CACHE_VERSION_CHECK_SECONDS
+        )
+    return _cache
+
+
+def invalidate_user_cache(db: Session):
+    """
+    Call after committing a change to a user's role, active state or existence,
+    so no worker keeps authorizing with the old row
+    """
+    cache = get_user_cache()
+    if cache is not None:
+        cache.invalidate(db)
@@ -0,0 +1,198 @@
+"""
+View Counters
+Buffers note view and download increments and writes them back in batches, so
+reading a note does not lock and rewrite its row on every page view
+
+Loss window:
+- Pending increments are flushed every COUNTER_FLUSH_SECONDS and on graceful
+  shutdown. A failed flush puts them back.
+- memory backend: per process (each worker flushes its own increments); a hard
+  crash loses at most the last flush interval of counts. With several workers a
+  note's shown count only adds the answering worker's pending increments, so it
+  can lag by the other workers' unflushed views until their next flush.
+- redis backend: increments live in Redis, so they survive app crashes and any
+  worker's flusher writes them back.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import bindparam, func
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Note
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+COUNTER_BACKENDS = ('memory', 'redis')
+
+# Tables and the counter columns that may be buffered
+COUNTED_COLUMNS = {
+    'notes': (Note, ('views_count', 'download_count')),
+}
+
+CounterKey = Tuple[str, int, str]  # (table, row id, column)
+
+
+class MemoryCounterBackend:
+    """In-process backend: pending increments in one dict guarded by a lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+
+    def add(self, key: CounterKey, amount: int) -> int:
+        with self._lock:
+            self._pending[key] += amount
+            return self._pending[key]
+
+    def take(self) -> Dict[CounterKey, int]:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        return dict(pending)
+
+    def restore(self, pending: Dict[CounterKey, int]):
+        with self._lock:
+            for key, amount in pending.items():
+                self._pending[key] += amount
+
+
+class RedisCounterBackend:
+    """Shared backend: one Redis hash of pending increments, field 'table:id:column'"""
+
+    KEY = 'counters:pending'
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _field(key: CounterKey) -> str:
+        return f"{key[0]}:{key[1]}:{key[2]}"
+
+    def add(self, key: CounterKey, amount: int) -> int:
+        return int(self._redis.hincrby(self.KEY, self._field(key), amount))
+
+    def take(self) -> Dict[CounterKey, int]:
+        # Read and clear atomically, so increments made meanwhile go to the next flush
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hgetall(self.KEY)
+        pipe.delete(self.KEY)
+        fields, _ = pipe.execute()
+        pending = {}
+        for field, amount in fields.items():
+            table, row_id, column = field.split(':')
+            pending[(table, int(row_id), column)] = int(amount)
+        return pending
+
+    def restore(self, pending: Dict[CounterKey, int]):
+        pipe = self._redis.pipeline(transaction=False)
+        for key, amount in pending.items():
+            pipe.hincrby(self.KEY, self._field(key), amount)
+        pipe.execute()
+
+
+class CounterBuffer:
+    """
+    Write-behind view/download counters.
+
+    increment() only touches the backend; a flusher thread applies the totals with
+    one executemany `UPDATE ... SET col = col + :n WHERE id = :id` per counter column,
+    rows in id order so concurrent flushes from several workers lock them in the
+    same order.
+    """
+
+    def __init__(self, backend, session_factory=SessionLocal, flush_seconds: float = 10.0):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def increment(self, table: str, row_id: int, column: str, amount: int = 1) -> int:
+        """
+        Buffer an increment; returns the amount still pending for this counter, which
+        callers add to the stored value to show an up-to-date count
+
+        Raises:
+            ValueError: If the table/column is not a buffered counter
+        """
+        if table not in COUNTED_COLUMNS or column not in COUNTED_COLUMNS[table][1]:
+            raise ValueError(f"{table}.{column} is not a buffered counter")
+        try:
+            return self.backend.add((table, row_id, column), amount)
+        except Exception as e:
+            # A counter store outage must not fail the page view itself
+            logger.warning(f"⚠️  Could not count {table}.{column} for {row_id}: {e}")
+            return 0
+
+    def flush(self) -> int:
+        """Write all pending increments; returns the number of counters updated"""
+        pending = self.backend.take()
+        if not pending:
+            return 0
+
+        grouped = defaultdict(list)
+        for (table, row_id, column), amount in sorted(pending.items()):
+            grouped[(table, column)].append({'row_id': row_id, 'amount': amount})
+
+        db = self.session_factory()
+        try:
+            for (table, column), rows in grouped.items():
+                model = COUNTED_COLUMNS[table][0]
+                target = getattr(model, column)
+                statement = model.__table__.update().where(
+                    model.__table__.c.id == bindparam('row_id')
+                ).values({column: func.coalesce(target, 0) + bindparam('amount')})
+                db.execute(statement, rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.backend.restore(pending)
+            logger.error(f"❌ Failed to flush {len(pending)} view/download counters: {e}")
+            return 0
+        finally:
+            db.close()
+        return len(pending)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                # e.g. the Redis backend is unreachable; try again next interval
+                logger.error(f"❌ Counter flush failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="view-counter-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write back everything still pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+
+_buffer: Optional[CounterBuffer] = None
+
+
+def get_counter_buffer() -> CounterBuffer:
+    global _buffer
+    if _buffer is None:
+        backend_name = settings.COUNTER_BACKEND
+        if backend_name not in COUNTER_BACKENDS:
+            raise ValueError(f"Unknown COUNTER_BACKEND '{backend_name}'. Use one of {COUNTER_BACKENDS}")
+        if backend_name == 'redis':
+            if not settings.REDIS_URL:
+                raise ValueError("COUNTER_BACKEND is 'redis' but REDIS_URL is not set")
+            backend = RedisCounterBackend(settings.REDIS_URL)
+        else:
+            backend = MemoryCounterBackend()
+        _buffer = CounterBuffer(backend, flush_seconds=settings.COUNTER_FLUSH_SECONDS)
+    return _buffer
@@ -0,0 +1,218 @@
+"""
+Weightage Trend Model
+Vectorized topic x year weightage analysis for PYQ weightage prediction
+"""
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+import numpy as np
+
+
+PREDICTION_METHODS = ('trend', 'exponential')
+
+# Slopes smaller than this (percentage points per year) are reported as stable
+STABLE_SLOPE = 1e-9
+
+
+class WeightageMatrix:
+    """
+    Topic x year count tensor for one or more groups (e.g. subjects).
+
+    counts has shape (groups, topics, years) and papers has shape (groups, years);
+    papers[g, y] is the number of PYQs of group g in year y, which is the
+    denominator of the weightage and also tells which years a group has data for.
+    """
+
+    def __init__(self, groups: List[Hashable], topics: List[str], years: List[int],
+                 counts: np.ndarray, papers: np.ndarray):
+        self.groups = groups
+        self.topics = topics
+        self.years = years
+        self.counts = counts
+        self.papers = papers
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[Hashable, int, Sequence[str]]]) -> "WeightageMatrix":
+        """Build the tensor from (group, year, topics) rows, one row per PYQ"""
+        group_index: Dict[Hashable, int] = {}
+        topic_index: Dict[str, int] = {}
+        year_index: Dict[int, int] = {}
+        topic_rows: List[Tuple[int, int, int]] = []
+        paper_rows: List[Tuple[int, int]] = []
+
+        for group, year, topics in records:
+            g = group_index.setdefault(group, len(group_index))
+            y = year_index.setdefault(year, len(year_index))
+            paper_rows.append((g, y))
+            for topic in topics:
+                t = topic_index.setdefault(topic, len(topic_index))
+                topic_rows.append((g, t, y))
+
+        # Years are indexed in first-seen order; reorder the axis chronologically
+        years = sorted(year_index)
+        year_order = np.empty(len(year_index), dtype=np.int64)
+        for position, year in enumerate(years):
+            year_order[year_index[year]] = position
+
+        counts = np.zeros((len(group_index), len(topic_index), len(years)), dtype=np.float64)
+        papers = np.zeros((len(group_index), len(years)), dtype=np.float64)
+        if topic_rows:
+            g, t, y = np.array(topic_rows, dtype=np.int64).T
+            np.add.at(counts, (g, t, year_order[y]), 1)
+        if paper_rows:
+            g, y = np.array(paper_rows, dtype=np.int64).T
+            np.add.at(papers, (g, year_order[y]), 1)
+
+        return cls(list(group_index), list(topic_index), years, counts, papers)
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[Tuple[Hashable, int, str, float]],
+                    totals: Iterable[Tuple[Hashable, int, float]]) -> "WeightageMatrix":
+        """
+        Build the tensor from pre-aggregated rows, e.g. SQL GROUP BY results:
+        counts as (group, year, topic, value) and per-year totals as (group, year, total)
+        """
+        totals = list(totals)
+        counts = list(counts)
+        groups = list(dict.fromkeys([row[0] for row in totals] + [row[0] for row in counts]))
+        years = sorted({row[1] for row in totals} | {row[1] for row in counts})
+        topics = list(dict.fromkeys(row[2] for row in counts))
+        group_index = {group: i for i, group in enumerate(groups)}
+        year_index = {year: i for i, year in enumerate(years)}
+        topic_index = {topic: i for i, topic in enumerate(topics)}
+
+        count_tensor = np.zeros((len(groups), len(topics), len(years)), dtype=np.float64)
+        papers = np.zeros((len(groups), len(years)), dtype=np.float64)
+        if counts:
+            g, y, t = np.array(
+                [(group_index[row[0]], year_index[row[1]], topic_index[row[2]]) for row in counts],
+                dtype=np.int64
+            ).T
+            np.add.at(count_tensor, (g, t, y), np.array([row[3] for row in counts], dtype=np.float64))
+        if totals:
+            g, y = np.array([(group_index[row[0]], year_index[row[1]]) for row in totals], dtype=np.int64).T
+            np.add.at(papers, (g, y), np.array([row[2] for row in totals], dtype=np.float64))
+
+        return cls(groups, topics, years, count_tensor, papers)
+
+    # ---------------- VECTORIZED STATISTICS ----------------
+
+    @property
+    def year_mask(self) -> np.ndarray:
+        """(groups, 1, years) boolean mask of years that have at least one PYQ"""
+        return (self.papers > 0)[:, None, :]
+
+    def weightage(self) -> np.ndarray:
+        """Share of a year's PYQs that cover each topic, in percent"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = self.counts / self.papers[:, None, :] * 100
+        return np.where(self.year_mask, shares, 0.0)
+
+    def trend_slopes(self, weightage: np.ndarray) -> np.ndarray:
+        """Least-squares slope of weightage against year (percentage points per year)"""
+        mask = np.broadcast_to(self.year_mask, weightage.shape)
+        x = np.broadcast_to(np.asarray(self.years, dtype=np.float64), weightage.shape)
+        n = mask.sum(axis=-1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = np.where(mask, x, 0).sum(axis=-1, keepdims=True) / n
+            w_mean = np.where(mask, weightage, 0).sum(axis=-1, keepdims=True) / n
+            dx = np.where(mask, x - x_mean, 0)
+            covariance = (dx * (weightage - w_mean)).sum(axis=-1)
+            variance = (dx * dx).sum(axis=-1)
+            slopes = covariance / variance
+        return np.where(variance > 0, slopes, 0.0)
+
+    def _positions_from_end(self) -> np.ndarray:
+        """0 for a group's latest year with data, 1 for the one before, ... (-1 where no data)"""
+        mask = self.papers > 0
+        from_end = np.cumsum(mask[:, ::-1], axis=-1)[:, ::-1] - 1
+        return np.where(mask, from_end, -1)[:, None, :]
+
+    def moving_average(self, weightage: np.ndarray, window: int = 3) -> np.ndarray:
+        """Mean weightage over each group's last `window` years with data"""
+        positions = self._positions_from_end()
+        in_window = (positions >= 0) & (positions < window)
+        n = np.broadcast_to(in_window, weightage.shape).sum(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(in_window, weightage, 0).sum(axis=-1) / n
+        return np.where(n > 0, averages, 0.0)
+
+    def exponential_smoothing(self, weightage: np.ndarray, alpha: float = 0.5) -> np.ndarray:
+        """
+        Simple exponential smoothing level after the latest year, in closed form:
+        the k-th most recent year gets weight alpha * (1 - alpha) ** k and the oldest
+        year keeps the remaining (1 - alpha) ** (n - 1), so weights sum to one.
+        """
+        positions = self._positions_from_end()
+        mask = positions >= 0
+        weights = np.where(mask, alpha * (1 - alpha) ** np.maximum(positions, 0), 0.0)
+        oldest = positions == (self.papers > 0).sum(axis=-1)[:, None, None] - 1
+        weights = np.where(oldest & mask, (1 - alpha) ** np.maximum(positions, 0), weights)
+        return (weightage * weights).sum(axis=-1)
+
+    def predict(self, method: str = 'trend', window: int = 3, alpha: float = 0.5) -> Dict[str, np.ndarray]:
+        """
+        Predict next-year weightage for every (group, topic).
+
+        'trend' adds the least-squares slope to the recent moving average;
+        'exponential' uses the exponentially smoothed level instead.
+        """
+        if method not in PREDICTION_METHODS:
+            raise ValueError(f"Unknown prediction method '{method}'. Use one of {PREDICTION_METHODS}")
+
+        weightage = self.weightage()
+        slopes = self.trend_slopes(weightage)
+        moving_average = self.moving_average(weightage, window)
+        if method == 'exponential':
+            predicted = self.exponential_smoothing(weightage, alpha)
+        else:
+            predicted = moving_average + slopes
+
+        return {
+            'weightage': weightage,
+            'slopes': slopes,
+            'moving_average': moving_average,
+            'predicted': np.maximum(predicted, 0.0),
+            'years_present': (self.counts > 0).sum(axis=-1)
+        }
+
+
+def summarize_predictions(matrix: WeightageMatrix, method: str = 'trend', window: int = 3,
+                          alpha: float = 0.5, top_n: int = 10) -> Dict[Hashable, Dict]:
+    """
+    Turn the prediction tensors into the per-group response shape used by
+    PYQAnalyzer.predict_weightage. Topics seen in fewer than two years are skipped.
+    """
+    stats = matrix.predict(method, window, alpha)
+    weightage = np.round(stats['weightage'], 2)
+    predicted = np.round(stats['predicted'], 2)
+    slopes = stats['slopes']
+    summaries = {}
+
+    for g, group in enumerate(matrix.groups):
+        year_mask = matrix.papers[g] > 0
+        predictions = {}
+        # Rank topics once with NumPy instead of sorting dicts
+        for t in np.argsort(-predicted[g], kind='stable'):
+            if stats['years_present'][g, t] < 2:
+                continue
+            appeared = np.nonzero(matrix.counts[g, t] > 0)[0]
+            slope = float(slopes[g, t])
+            predictions[matrix.topics[t]] = {
+                'current_weightage': float(weightage[g, t, appeared[-1]]),
+                'predicted_weightage': float(predicted[g, t]),
+                'trend': 'increasing' if slope > STABLE_SLOPE else 'decreasing' if slope < -STABLE_SLOPE else 'stable',
+                'trend_slope': round(slope, 4),
+                'moving_average': round(float(stats['moving_average'][g, t]), 2),
+                'history': [
+                    {'year': matrix.years[y], 'weightage': float(weightage[g, t, y])}
+                    for y in appeared
+                ]
+            }
+
+        summaries[group] = {
+            'years_analyzed': [year for year, present in zip(matrix.years, year_mask) if present],
+            'topic_predictions': predictions,
+            'high_weightage_topics': list(predictions.keys())[:top_n],
+            'method': method
+        }
+
+    return summaries
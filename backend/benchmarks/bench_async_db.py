@@ -0,0 +1,104 @@
+"""
+Benchmark: async routes on the sync Session vs an AsyncSession
+Usage: python -m benchmarks.bench_async_db [requests] [concurrency] [query_rows]
+
+Each simulated request runs one query and then awaits 20ms of network I/O (an LLM
+or storage call). A heartbeat task measures how late the event loop wakes up, which
+is the latency every other request on the worker sees.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# A recursive count stands in for a query that spends time in the database
+QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :rows) "
+    "SELECT count(*) FROM n"
+)
+IO_SECONDS = 0.02
+HEARTBEAT_SECONDS = 0.005
+
+
+async def heartbeat(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(time.perf_counter() - start - HEARTBEAT_SECONDS)
+
+
+async def drive(handler, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    lags, stop = [], asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            await handler()
+
+    beat = asyncio.ensure_future(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, lags
+
+
+async def run_sync(url, requests, concurrency, rows):
+    """Before: a sync Session inside an async route blocks the loop for every query"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Session = sessionmaker(bind=engine)
+
+    async def handler():
+        with Session() as db:
+            db.execute(QUERY, {"rows": rows}).scalar()
+            db.commit()
+        await asyncio.sleep(IO_SECONDS)
+
+    try:
+        return await drive(handler, requests, concurrency)
+    finally:
+        engine.dispose()
+
+
+async def run_async(url, requests, concurrency, rows):
+    """After: queries are awaited, so the loop keeps serving while they run"""
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def handler():
+        async with Session() as db:
+            (await db.execute(QUERY, {"rows": rows})).scalar()
+            await db.commit()
+        await asyncio.sleep(IO_SECONDS)
+
+    try:
+        return await drive(handler, requests, concurrency)
+    finally:
+        await engine.dispose()
+
+
+def report(label, requests, elapsed, lags):
+    lags = sorted(lags) or [0.0]
+    print(f"{label}: {requests / elapsed:.1f} req/s, event loop lag "
+          f"p50 {statistics.median(lags) * 1000:.1f}ms "
+          f"p95 {lags[int(0.95 * (len(lags) - 1))] * 1000:.1f}ms max {lags[-1] * 1000:.1f}ms")
+
+
+def run(requests=400, concurrency=50, rows=20000):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"{requests} requests, concurrency {concurrency}, query over {rows} rows + "
+              f"{IO_SECONDS * 1000:.0f}ms I/O each")
+        report("sync Session  ", requests, *asyncio.run(run_sync(url, requests, concurrency, rows)))
+        report("AsyncSession  ", requests, *asyncio.run(run_async(url, requests, concurrency, rows)))
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:4]])
@@ -0,0 +1,83 @@
+"""
+Benchmark: multi-subject PYQ analysis, sequential vs. process pool
+Usage: python -m benchmarks.bench_batch_analysis [pyqs_per_partition] [max_workers]
+
+Builds a throwaway SQLite database with PYQs for every (exam_type, subject) pair,
+then runs the batch analysis on pools of 1, 2, 4, ... workers up to max_workers.
+Each pool is warmed up with one untimed run, as the app's pool is long-lived.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import PYQ, ExamType, Subject
+from app.services.pyq_batch_analysis import BatchAnalysisPool
+
+
+TITLE_WORDS = [
+    'motion', 'force', 'light', 'lens', 'current', 'magnetic', 'wave', 'heat', 'atom',
+    'organic', 'element', 'enzyme', 'electromagnetic waves', 'classical mechanics',
+    'ray optics', 'chapter 5', 'paper', 'question', 'set', 'solutions', 'nuclei'
+]
+
+
+def build_database(path, pyqs_per_partition, seed=42):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    db = sessionmaker(bind=engine)()
+    for exam_type in ExamType:
+        for subject in Subject:
+            db.bulk_insert_mappings(PYQ, [
+                {
+                    'title': ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(3, 8))),
+                    'exam_type': exam_type,
+                    'subject': subject,
+                    'year': rng.randint(1995, 2024),
+                    'is_approved': True,
+                    'uploaded_by': 1
+                }
+                for _ in range(pyqs_per_partition)
+            ])
+    db.commit()
+    db.close()
+    engine.dispose()
+    return url
+
+
+def run(pyqs_per_partition=20_000, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        url = build_database(os.path.join(tmp, "bench.db"), pyqs_per_partition)
+        partitions = len(ExamType) * len(Subject)
+        print(f"{partitions} partitions x {pyqs_per_partition:,} PYQs, {os.cpu_count()} CPU cores")
+
+        baseline = None
+        workers = 1
+        while workers <= max_workers:
+            pool = BatchAnalysisPool(workers=workers, database_url=url)
+            try:
+                pool.run()
+                start = time.perf_counter()
+                report = pool.run()
+                elapsed = time.perf_counter() - start
+            finally:
+                pool.shutdown()
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {elapsed:7.2f}s  speedup {baseline / elapsed:4.1f}x  "
+                  f"(failed partitions: {len(report['failed'])})")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else None
+    )
@@ -0,0 +1,75 @@
+"""
+Benchmark: exam creation latency, per-question flush vs bulk insert
+Usage: python -m benchmarks.bench_create_exam [database_url] [repeats]
+
+Runs against a throwaway SQLite file by default; pass a Postgres URL to include
+network round trips, where the gap is much larger.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Exam, ExamQuestion, QuestionBankItem, Subject, ExamType
+from app.services.exam_service import create_exam, generate_exam_questions
+
+SIZES = (30, 100, 500)
+
+
+def create_exam_per_question(db, user_id, subject, exam_type, total_questions):
+    """Previous implementation: commit the exam, then add + flush each question"""
+    exam = Exam(user_id=user_id, title="bench", subject=subject, exam_type=exam_type,
+                duration_minutes=60, total_questions=total_questions, status="pending")
+    db.add(exam)
+    db.commit()
+    db.refresh(exam)
+    for q in generate_exam_questions(exam.id, subject, None, exam_type, total_questions):
+        db.add(ExamQuestion(
+            exam_id=exam.id, question_number=q["question_number"], question_text=q["question_text"],
+            options=json.dumps(q["options"]), correct_answer=q["correct_answer"],
+            marks=q.get("marks", 1), difficulty=q.get("difficulty", "medium")
+        ))
+        db.flush()
+    db.commit()
+    return exam
+
+
+def time_it(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def run(database_url=None, repeats=20):
+    path = None
+    if database_url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine, tables=[Exam.__table__, ExamQuestion.__table__, QuestionBankItem.__table__])
+    Session = sessionmaker(bind=engine)
+
+    try:
+        for size in SIZES:
+            with Session() as db:
+                legacy = time_it(lambda: create_exam_per_question(db, 1, Subject.PHYSICS, ExamType.NEET, size), repeats)
+                bulk = time_it(lambda: create_exam(db, 1, Subject.PHYSICS, None, ExamType.NEET, total_questions=size), repeats)
+            print(f"{size:>4} questions: per-question flush {legacy * 1000:7.2f}ms, "
+                  f"bank + bulk insert {bulk * 1000:7.2f}ms ({legacy / bulk:.1f}x)")
+    finally:
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else None
+    run(url, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,131 @@
+"""
+Micro-benchmark: curriculum matcher vs. the previous per-call regex/keyword extraction
+Usage: python -m benchmarks.bench_curriculum_matcher [num_titles]
+"""
+import random
+import re
+import sys
+import time
+
+from app.services.curriculum_matcher import CurriculumMatcher
+
+
+TITLE_WORDS = [
+    'motion', 'force', 'light', 'lens', 'current', 'magnetic', 'wave', 'heat', 'atom',
+    'organic', 'element', 'enzyme', 'electromagnetic waves', 'classical mechanics',
+    'ray optics', 'chapter 5', 'ch. 12', 'paper', 'question', 'board', 'physics',
+    'set', 'solutions', 'semiconductors', 'nuclei'
+]
+
+
+def legacy_extract_chapters(text):
+    """Chapter extraction as it was before the matcher (tables rebuilt per call)"""
+    patterns = [
+        r'chapter\s+(\d+[a-z]?)',
+        r'ch\.\s*(\d+)',
+        r'(\w+\s+waves?)',
+        r'(\w+\s+mechanics)',
+        r'(\w+\s+optics)',
+        r'(\w+\s+electricity)',
+        r'(\w+\s+magnetism)',
+    ]
+    chapters = []
+    text_lower = text.lower()
+    for pattern in patterns:
+        chapters.extend(re.findall(pattern, text_lower))
+    if not chapters:
+        common_chapters = [
+            'motion', 'force', 'energy', 'waves', 'optics', 'electricity',
+            'magnetism', 'atoms', 'nuclei', 'semiconductors', 'communication'
+        ]
+        for chapter in common_chapters:
+            if chapter in text_lower:
+                chapters.append(chapter)
+    return list(set(chapters)) if chapters else ['general']
+
+
+def legacy_extract_topics(text):
+    """Topic extraction as it was before the matcher (tables rebuilt per call)"""
+    topics = []
+    text_lower = text.lower()
+    topic_keywords = {
+        'mechanics': ['motion', 'force', 'momentum', 'energy', 'work', 'power'],
+        'optics': ['light', 'lens', 'mirror', 'refraction', 'reflection'],
+        'electricity': ['current', 'voltage', 'resistance', 'circuit', 'electric'],
+        'magnetism': ['magnetic', 'field', 'induction', 'flux'],
+        'waves': ['wave', 'frequency', 'amplitude', 'oscillation'],
+        'thermodynamics': ['heat', 'temperature', 'entropy', 'thermodynamics'],
+        'atoms': ['atom', 'electron', 'proton', 'nucleus'],
+        'organic': ['organic', 'compound', 'reaction', 'molecule'],
+        'inorganic': ['inorganic', 'element', 'periodic'],
+        'biochemistry': ['biochemistry', 'enzyme', 'protein', 'dna']
+    }
+    for topic, keywords in topic_keywords.items():
+        if any(keyword in text_lower for keyword in keywords):
+            topics.append(topic)
+    return topics if topics else ['general']
+
+
+def make_titles(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(3, 8))).title()
+        for _ in range(count)
+    ]
+
+
+# Fragments that stress the regex boundary rules: run-together words, repeated
+# markers, unicode digits/whitespace and suffixes glued to other words
+ADVERSARIAL_PIECES = [
+    'wave', 'waves', 'mechanics', 'optics', 'chapter', 'ch.', 'ch', '5', '12', '7a', 'a', 'x', '_',
+    ' ', '  ', '\t', '\xa0', '\u2003', '\x1c', '.', 's', '²', '٣', 'é', 'İ', 'motion'
+]
+
+
+def make_adversarial_titles(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(ADVERSARIAL_PIECES) for _ in range(rng.randint(1, 10)))
+        for _ in range(count)
+    ]
+
+
+def count_mismatches(matcher, titles):
+    return sum(
+        1 for t in titles
+        if legacy_extract_topics(t) != matcher.match(t)['topics']
+        or set(legacy_extract_chapters(t)) != set(matcher.match(t)['chapters'])
+    )
+
+
+def run(num_titles=100_000):
+    titles = make_titles(num_titles)
+
+    start = time.perf_counter()
+    legacy = [(legacy_extract_topics(t), legacy_extract_chapters(t)) for t in titles]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = CurriculumMatcher()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = [matcher.match(t) for t in titles]
+    matcher_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for (topics, chapters), m in zip(legacy, matched)
+        if topics != m['topics'] or set(chapters) != set(m['chapters'])
+    )
+    adversarial_mismatches = count_mismatches(matcher, make_adversarial_titles(num_titles))
+
+    print(f"Titles:            {num_titles:,}")
+    print(f"Legacy extraction: {legacy_time:.3f}s ({legacy_time / num_titles * 1e6:.1f} µs/title)")
+    print(f"Automaton build:   {build_time * 1000:.2f}ms (once per process)")
+    print(f"Matcher (1 pass):  {matcher_time:.3f}s ({matcher_time / num_titles * 1e6:.1f} µs/title)")
+    print(f"Speedup:           {legacy_time / matcher_time:.1f}x")
+    print(f"Result mismatches: {mismatches} ({adversarial_mismatches} on {num_titles:,} adversarial titles)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
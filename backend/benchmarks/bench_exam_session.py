@@ -0,0 +1,65 @@
+"""
+Benchmark: answer latency through the exam session store vs direct database writes
+Usage: python -m benchmarks.bench_exam_session [questions] [answers]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Exam, ExamQuestion, ExamAttempt, QuestionBankItem, Subject, ExamType
+from app.services.exam_service import create_exam, start_exam, submit_answer
+from app.services.exam_session_store import ExamSessionStore, MemorySessionBackend
+
+
+def run(num_questions=100, num_answers=2000):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[
+        Exam.__table__, ExamQuestion.__table__, ExamAttempt.__table__, QuestionBankItem.__table__
+    ])
+    Session = sessionmaker(bind=engine)
+
+    try:
+        with Session() as db:
+            exam = create_exam(db, 1, Subject.PHYSICS, None, ExamType.NEET, total_questions=num_questions)
+            start_exam(db, exam.id)
+            question_ids = [q.id for q in db.query(ExamQuestion.id).filter(ExamQuestion.exam_id == exam.id)]
+            clicks = [
+                {"question_id": random.choice(question_ids), "selected_answer": str(random.randint(0, 3))}
+                for _ in range(num_answers)
+            ]
+
+            start = time.perf_counter()
+            for click in clicks[:200]:
+                submit_answer(db, exam.id, click["question_id"], click["selected_answer"])
+            direct = (time.perf_counter() - start) / 200
+
+            store = ExamSessionStore(MemorySessionBackend(), session_factory=Session)
+            store.load(db, exam.id, 1)  # first request of the exam loads the session
+            start = time.perf_counter()
+            for click in clicks:
+                store.record_answers(db, exam.id, 1, [click])
+            cached = (time.perf_counter() - start) / num_answers
+
+            start = time.perf_counter()
+            written = store.flush_exam(db, exam.id)
+            flush_time = time.perf_counter() - start
+
+        print(f"direct DB write per answer : {direct * 1000:.3f}ms")
+        print(f"session store per answer   : {cached * 1000:.4f}ms")
+        print(f"write-behind flush         : {written} rows in {flush_time * 1000:.2f}ms")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,99 @@
+"""
+Benchmark: login throughput, and sync-route latency during a login storm
+Usage: python -m benchmarks.bench_login [logins] [bcrypt_rounds]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, check_password, hash_password
+
+# Starlette runs sync routes on a 40-thread pool
+THREADPOOL_SIZE = 40
+LISTING_REQUESTS = 20
+
+
+def listing_request(submitted_at):
+    """Stand-in for a sync notes/PYQ listing: a short database round trip"""
+    time.sleep(0.002)
+    return time.perf_counter() - submitted_at
+
+
+def run_threadpool(logins, password, hashed):
+    """Before: bcrypt runs on the shared threadpool, so listings queue behind it"""
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        start = time.perf_counter()
+        login_futures = [pool.submit(check_password, password, hashed) for _ in range(logins)]
+        listing_futures = [pool.submit(listing_request, time.perf_counter()) for _ in range(LISTING_REQUESTS)]
+        for future in login_futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        latencies = [future.result() for future in listing_futures]
+    return elapsed, latencies
+
+
+async def run_hasher(hasher, logins, password, hashed):
+    """After: bcrypt runs on the hasher's processes; listings keep the threadpool"""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        start = time.perf_counter()
+        login_tasks = [asyncio.ensure_future(hasher.verify(password, hashed)) for _ in range(logins)]
+        await asyncio.sleep(0)
+        latencies = await asyncio.gather(*[
+            loop.run_in_executor(pool, listing_request, time.perf_counter()) for _ in range(LISTING_REQUESTS)
+        ])
+        await asyncio.gather(*login_tasks)
+        elapsed = time.perf_counter() - start
+    return elapsed, list(latencies)
+
+
+async def run_overload(hasher, attempts, password, hashed):
+    """A burst far above max_pending: the excess is refused immediately"""
+    async def attempt():
+        start = time.perf_counter()
+        try:
+            await hasher.verify(password, hashed)
+            return True, time.perf_counter() - start
+        except PasswordHasherBusy:
+            return False, time.perf_counter() - start
+
+    results = await asyncio.gather(*[attempt() for _ in range(attempts)])
+    rejected = [elapsed for ok, elapsed in results if not ok]
+    return len(results) - len(rejected), rejected
+
+
+def report(label, logins, elapsed, latencies):
+    latencies = sorted(latencies)
+    print(f"{label}: {logins / elapsed:.1f} logins/s, "
+          f"listing latency p50 {statistics.median(latencies) * 1000:.1f}ms "
+          f"max {latencies[-1] * 1000:.1f}ms")
+
+
+def run(logins=200, rounds=10):
+    password = "correct horse battery staple"
+    hashed = hash_password(password, rounds)
+    workers = os.cpu_count() or 1
+    print(f"{logins} logins, bcrypt rounds {rounds}, {workers} hashing processes")
+
+    elapsed, latencies = run_threadpool(logins, password, hashed)
+    report("shared threadpool ", logins, elapsed, latencies)
+
+    hasher = PasswordHasher(workers=workers, max_pending=logins, rounds=rounds)
+    try:
+        asyncio.run(hasher.verify(password, hashed))  # start the worker processes
+        elapsed, latencies = asyncio.run(run_hasher(hasher, logins, password, hashed))
+        report("hasher process pool", logins, elapsed, latencies)
+
+        hasher.max_pending = 4 * workers
+        accepted, rejected = asyncio.run(run_overload(hasher, logins, password, hashed))
+        print(f"overload (max_pending {hasher.max_pending}): {accepted} accepted, {len(rejected)} rejected "
+              f"in {max(rejected, default=0) * 1000:.2f}ms at most")
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:3]])
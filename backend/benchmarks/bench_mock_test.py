@@ -0,0 +1,73 @@
+"""
+Benchmark: mock test assembly from the cached posting index
+Usage: python -m benchmarks.bench_mock_test [num_pyqs] [num_questions]
+"""
+import random
+import sys
+import time
+
+from app.services.curriculum_matcher import get_curriculum_matcher
+from app.services.pyq_index import CHAPTER, TOPIC, PYQPostingIndex
+from app.services.pyq_stream_aggregators import ChapterAggregator, TopicYearAggregator
+
+PHRASES = [
+    "Explain Newton's laws of motion", "Derive the equation for projectile motion",
+    "State the first law of thermodynamics", "Calculate the current in the electric circuit",
+    "Balance the chemical reaction", "Describe the structure of the cell membrane",
+    "Find the derivative of the function", "Evaluate the definite integral using integration",
+    "Explain the process of photosynthesis", "Describe the mechanism of the organic reaction",
+    "Find the probability of the event", "Solve the quadratic equation",
+]
+
+
+def make_corpus(num_pyqs, seed=42):
+    rng = random.Random(seed)
+    years = [rng.randint(2005, 2024) for _ in range(num_pyqs)]
+    titles = [f"{rng.choice(PHRASES)} - variant {rng.randint(1, 500)}" for _ in range(num_pyqs)]
+    return years, titles
+
+
+def build_index(years, titles):
+    matcher = get_curriculum_matcher()
+    chapters = ChapterAggregator()
+    topics = TopicYearAggregator()
+    for year, title in zip(years, titles):
+        matched = matcher.match(title)
+        chapters.add(matched['chapters'], year)
+        topics.add(matched['topics'], year)
+    return PYQPostingIndex(years, titles, chapters.result(), topics.result())
+
+
+def assemble(index, num_questions, rng):
+    """Same selection steps as PYQAnalyzer.generate_mock_test"""
+    selected = []
+    for topic in index.high_weightage_topics[:int(num_questions * 0.6)]:
+        selected.append(index.references(index.sample(TOPIC, topic, 2, rng)))
+    for chapter in index.top_chapters[:int(num_questions * 0.3)]:
+        selected.append(index.references(index.sample(CHAPTER, chapter, 2, rng)))
+    for position in index.random_sample(num_questions - len(selected), rng):
+        selected.append(index.references([position]))
+    return selected
+
+
+def run(num_pyqs=100000, num_questions=30, repeats=200):
+    years, titles = make_corpus(num_pyqs)
+
+    start = time.perf_counter()
+    index = build_index(years, titles)
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        assemble(index, num_questions, rng)
+    per_test = (time.perf_counter() - start) / repeats
+
+    print(f"{num_pyqs} PYQs: index build {build_time:.2f}s (once per TTL), "
+          f"{len(index.postings)} posting lists")
+    print(f"mock test of {num_questions} questions: {per_test * 1000:.3f}ms per request")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
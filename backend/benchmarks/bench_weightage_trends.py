@@ -0,0 +1,44 @@
+"""
+Benchmark: vectorized weightage prediction at curriculum scale
+Usage: python -m benchmarks.bench_weightage_trends [groups] [topics] [years]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.weightage_trends import WeightageMatrix, summarize_predictions
+
+
+def make_matrix(groups, topics, years, seed=42):
+    rng = np.random.default_rng(seed)
+    papers = rng.integers(20, 200, size=(groups, years)).astype(np.float64)
+    counts = rng.binomial(papers[:, None, :].astype(np.int64), rng.uniform(0, 0.3, size=(groups, topics, 1)))
+    return WeightageMatrix(
+        groups=[f"subject_{g}" for g in range(groups)],
+        topics=[f"topic_{t}" for t in range(topics)],
+        years=list(range(2024 - years, 2024)),
+        counts=counts.astype(np.float64),
+        papers=papers
+    )
+
+
+def run(groups=8, topics=500, years=40):
+    matrix = make_matrix(groups, topics, years)
+
+    for method in ('trend', 'exponential'):
+        start = time.perf_counter()
+        matrix.predict(method)
+        predict_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summarize_predictions(matrix, method)
+        summary_time = time.perf_counter() - start
+
+        print(f"{method:<12} {groups} groups x {topics} topics x {years} years: "
+              f"predict {predict_time * 1000:.1f}ms, full response {summary_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
@@ -0,0 +1,34 @@
+"""
+Script to check that the hot queries are served by indexes
+Usage: python check_query_plans.py [--verbose]
+
+Runs EXPLAIN against DATABASE_URL (SQLite or PostgreSQL) after syncing the schema,
+prints each query's plan and exits with status 1 if any does a sequential scan
+or sorts outside an index.
+"""
+import sys
+from app.database import engine
+from app.database_migrations import sync_database_schema
+from app.services.query_plans import check_query_plans
+
+
+def check(verbose: bool = False) -> int:
+    sync_database_schema()
+    results = check_query_plans(engine)
+    flagged = [result for result in results if result['problems']]
+
+    for result in results:
+        status = "❌" if result['problems'] else "✅"
+        print(f"{status} {result['name']}")
+        if verbose or result['problems']:
+            for line in result['plan']:
+                print(f"     {line}")
+        for problem in result['problems']:
+            print(f"   ⚠️  {problem}")
+
+    print(f"\n{len(results) - len(flagged)}/{len(results)} hot queries use indexes")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(check(verbose="--verbose" in sys.argv[1:]))
@@ -0,0 +1,37 @@
+"""
+Script to bulk load parsed PYQ questions into the pyq_questions table
+Usage: python ingest_pyq_questions.py questions.jsonl [batch_size]
+
+Each line of the file is one JSON object:
+{"question_text": "...", "exam_type": "neet", "year": 2023, "subject": "physics",
+ "class_level": "12", "chapter": "ray optics", "topic": "optics", "marks": 4}
+chapter/topic are detected automatically when omitted.
+"""
+import sys
+import time
+from app.database import Base, engine
+from app.models import PYQQuestion
+from app.services.pyq_question_store import DEFAULT_BATCH_SIZE, ingest_questions_file
+
+
+def ingest(path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Make sure the table exists on fresh databases
+    Base.metadata.create_all(bind=engine, tables=[PYQQuestion.__table__])
+
+    start = time.time()
+    with open(path, encoding="utf-8") as f:
+        stats = ingest_questions_file(f, batch_size=batch_size)
+    elapsed = time.time() - start
+
+    print(f"Inserted {stats['inserted']} questions in {stats['batches']} batches ({elapsed:.1f}s)")
+    if stats['skipped']:
+        print(f"⚠️  Skipped {stats['skipped']} invalid rows")
+        for error in stats['errors']:
+            print(f"   {error}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    ingest(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BATCH_SIZE)
@@ -88,6 +88,160 @@ COMMENT ON TABLE exam_attempts IS 'Stores student answers for exam questions';
 COMMENT ON TABLE exam_results IS 'Stores exam results and performance analytics';
 COMMENT ON COLUMN doubts.detected_language IS 'Language detected from student question: hindi, hinglish, or english';
 
+-- ============================================
+-- PYQ Question Store
+-- ============================================
+
+-- Per-question PYQ data (bulk loaded with backend/ingest_pyq_questions.py)
+CREATE TABLE IF NOT EXISTS pyq_questions (
+    id SERIAL PRIMARY KEY,
+    pyq_id INTEGER REFERENCES pyqs(id),
+    exam_type examtype NOT NULL,
+    year INTEGER NOT NULL,
+    class_level classlevel,
+    subject subject,
+    question_number INTEGER,
+    question_text TEXT NOT NULL,
+    question_hash VARCHAR(40) NOT NULL,
+    chapter VARCHAR,
+    topic VARCHAR,
+    marks INTEGER DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_id ON pyq_questions(id);
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_pyq_id ON pyq_questions(pyq_id);
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_exam_subject_year ON pyq_questions(exam_type, subject, year);
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_exam_subject_chapter ON pyq_questions(exam_type, subject, chapter, year);
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_exam_subject_topic ON pyq_questions(exam_type, subject, topic, year);
+CREATE INDEX IF NOT EXISTS ix_pyq_questions_exam_subject_hash ON pyq_questions(exam_type, subject, question_hash);
+
+COMMENT ON TABLE pyq_questions IS 'Individual PYQ questions with chapter, topic and marks for analysis';
+
+-- ============================================
+-- Question Bank
+-- ============================================
+
+-- Shared questions sampled by exams (exam_questions reference them by id)
+CREATE TABLE IF NOT EXISTS question_bank (
+    id SERIAL PRIMARY KEY,
+    subject subject,
+    class_level classlevel,
+    exam_type examtype,
+    difficulty VARCHAR DEFAULT 'medium',
+    question_text TEXT NOT NULL,
+    options TEXT, -- JSON string: ["option1", "option2", ...]
+    correct_answer VARCHAR,
+    marks INTEGER DEFAULT 1,
+    pyq_question_id INTEGER REFERENCES pyq_questions(id),
+    random_key DOUBLE PRECISION NOT NULL DEFAULT random(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_question_bank_id ON question_bank(id);
+CREATE INDEX IF NOT EXISTS ix_question_bank_sampling ON question_bank(subject, class_level, exam_type, difficulty, random_key);
+
+ALTER TABLE exam_questions ADD COLUMN IF NOT EXISTS bank_question_id INTEGER REFERENCES question_bank(id);
+ALTER TABLE exam_questions ALTER COLUMN question_text DROP NOT NULL;
+
+COMMENT ON TABLE question_bank IS 'Reusable exam questions; random_key enables O(k) random sampling';
+
+-- ============================================
+-- Exam Analyses
+-- ============================================
+
+-- Precomputed AI performance analysis, one row per exam and language
+CREATE TABLE IF NOT EXISTS exam_analyses (
+    id SERIAL PRIMARY KEY,
+    exam_id INTEGER NOT NULL REFERENCES exams(id) ON DELETE CASCADE,
+    language VARCHAR NOT NULL,
+    status VARCHAR DEFAULT 'pending', -- pending, running, ready, failed
+    analysis TEXT,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    CONSTRAINT unique_exam_analysis_language UNIQUE (exam_id, language)
+);
+
+CREATE INDEX IF NOT EXISTS ix_exam_analyses_id ON exam_analyses(id);
+CREATE INDEX IF NOT EXISTS ix_exam_analyses_status ON exam_analyses(status);
+
+COMMENT ON TABLE exam_analyses IS 'AI exam performance analysis generated in the background after submit';
+
+-- ============================================
+-- History Pagination
+-- ============================================
+
+-- Exam list and doubt history are paged per user by (created_at, id)
+CREATE INDEX IF NOT EXISTS ix_exams_user_created ON exams(user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_doubts_user_created ON doubts(user_id, created_at);
+
+-- ============================================
+-- Cache Versions
+-- ============================================
+
+-- Version stamp per in-process cache (e.g. the authenticated-user cache);
+-- workers drop their cached entries when the version changes
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO cache_versions (name, version) VALUES ('users', 0) ON CONFLICT (name) DO NOTHING;
+
+COMMENT ON TABLE cache_versions IS 'Cross-worker invalidation stamps for in-process caches';
+
+-- ============================================
+-- Token Revocation
+-- ============================================
+
+-- Access tokens carry the user's token_version; bumping it revokes older tokens
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER DEFAULT 0;
+
+-- Revoked tokens (one jti, or every token of a user below min_version),
+-- kept until the tokens would have expired anyway
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id SERIAL PRIMARY KEY,
+    jti VARCHAR,
+    user_id INTEGER,
+    min_version INTEGER,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_id ON revoked_tokens(id);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+COMMENT ON TABLE revoked_tokens IS 'Revoked access tokens, synced into every worker''s in-memory revocation set';
+
+-- ============================================
+-- Access-Path Indexes
+-- ============================================
+
+-- Approved note listings, newest first (unfiltered, by class/subject, by subject)
+CREATE INDEX IF NOT EXISTS ix_notes_approved_created ON notes(is_approved, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_notes_approved_class_subject_created ON notes(is_approved, class_level, subject, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_notes_approved_subject_created ON notes(is_approved, subject, created_at, id);
+
+-- Approved PYQ listings by year then upload time, and per-exam-type analysis scans
+CREATE INDEX IF NOT EXISTS ix_pyqs_approved_year_created ON pyqs(is_approved, year, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_pyqs_approved_exam_year_created ON pyqs(is_approved, exam_type, year, created_at, id);
+
+-- Per-user history and per-exam lookups
+-- (doubts/exams by user: ix_*_user_created; exam_attempts: unique_exam_question_attempt)
+CREATE INDEX IF NOT EXISTS ix_career_queries_user_created ON career_queries(user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_exam_questions_exam_number ON exam_questions(exam_id, question_number);
+
+-- ============================================
+-- Keyset Pagination Indexes
+-- ============================================
+
+-- Admin lists of every note, PYQ and user, newest first
+CREATE INDEX IF NOT EXISTS ix_notes_created ON notes(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_pyqs_created ON pyqs(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_users_created ON users(created_at, id);
+
 -- ============================================
 -- Migration Complete
 -- ============================================
@@ -1,7 +1,7 @@
 'use client'
 
 import { useState } from 'react'
-import { useMutation, useQuery } from 'react-query'
+import { useInfiniteQuery, useMutation } from 'react-query'
 import { aiAPI } from '@/lib/api'
 import { Brain, Send, MessageSquare, Globe } from 'lucide-react'
 import Link from 'next/link'
@@ -14,9 +14,19 @@ export default function AIDoubtPage() {
   const [classLevel, setClassLevel] = useState('')
   const [chapter, setChapter] = useState('')
 
-  const { data: doubts, refetch } = useQuery('doubts', () =>
-    aiAPI.getDoubts().then((res) => res.data)
+  const [fullAnswers, setFullAnswers] = useState<Record<number, string>>({})
+
+  const { data, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery(
+    'doubts',
+    ({ pageParam }) => aiAPI.getDoubts({ cursor: pageParam }),
+    { getNextPageParam: (lastPage) => lastPage.headers['x-next-cursor'] || undefined }
   )
+  const doubts = data ? data.pages.flatMap((page: any) => page.data) : []
+
+  const showFullAnswer = async (id: number) => {
+    const res = await aiAPI.getDoubt(id)
+    setFullAnswers((prev) => ({ ...prev, [id]: res.data.ai_response }))
+  }
 
   const askMutation = useMutation(
     (data: { question: string; subject?: string; class_level?: string; chapter?: string }) =>
@@ -135,16 +145,26 @@ export default function AIDoubtPage() {
                   <div className="mb-3">
                     <p className="font-semibold text-gray-900 text-lg">{doubt.question}</p>
                   </div>
-                  {doubt.ai_response && (
+                  {doubt.has_response && (
                     <div className="mt-4 p-4 bg-gray-50 rounded-xl border-2 border-gray-200">
                       <div className="flex items-start gap-2 mb-2">
                         <span className="text-xl">🤖</span>
                         <span className="font-semibold text-gray-900">AI Response:</span>
                       </div>
-                      <p className="text-gray-700 whitespace-pre-wrap leading-relaxed">{doubt.ai_response}</p>
+                      <p className="text-gray-700 whitespace-pre-wrap leading-relaxed">
+                        {fullAnswers[doubt.id] ?? doubt.ai_response_preview}
+                      </p>
+                      {fullAnswers[doubt.id] === undefined && doubt.ai_response_preview?.length >= 280 && (
+                        <button
+                          onClick={() => showFullAnswer(doubt.id)}
+                          className="mt-2 text-primary-600 font-semibold hover:underline"
+                        >
+                          Show full answer
+                        </button>
+                      )}
                     </div>
                   )}
-                  {!doubt.ai_response && (
+                  {!doubt.has_response && (
                     <div className="mt-4 p-4 bg-yellow-50 rounded-xl border border-yellow-200">
                       <p className="text-yellow-700 font-medium flex items-center gap-2">
                         <span className="animate-spin">⏳</span>
@@ -154,6 +174,15 @@ export default function AIDoubtPage() {
                   )}
                 </div>
               ))}
+              {hasNextPage && (
+                <button
+                  onClick={() => fetchNextPage()}
+                  disabled={isFetchingNextPage}
+                  className="w-full py-3 rounded-xl border-2 border-gray-200 font-semibold text-gray-700 hover:border-primary-300 disabled:opacity-50"
+                >
+                  {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           ) : (
             <div className="text-center py-12">
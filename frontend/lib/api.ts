@@ -38,11 +38,13 @@ export const authAPI = {
   login: (data: { username: string; password: string }) =>
     api.post('/api/auth/login', data),
   getMe: () => api.get('/api/auth/me'),
+  logout: (token: string) =>
+    api.post('/api/auth/logout', null, { headers: { Authorization: `Bearer ${token}` } }),
 }
 
 // Notes APIs
 export const notesAPI = {
-  getNotes: (params?: { class_level?: string; subject?: string; chapter?: string; skip?: number; limit?: number }) =>
+  getNotes: (params?: { class_level?: string; subject?: string; chapter?: string; skip?: number; limit?: number; cursor?: string }) =>
     api.get('/api/notes/', { params }),
   getNote: (id: number) => api.get(`/api/notes/${id}`),
   downloadNote: (id: number) => api.post(`/api/notes/${id}/download`),
@@ -50,7 +52,7 @@ export const notesAPI = {
 
 // PYQs APIs
 export const pyqsAPI = {
-  getPYQs: (params?: { exam_type?: string; class_level?: string; subject?: string; year?: number; skip?: number; limit?: number }) =>
+  getPYQs: (params?: { exam_type?: string; class_level?: string; subject?: string; year?: number; skip?: number; limit?: number; cursor?: string }) =>
     api.get('/api/pyqs/', { params }),
   getPYQ: (id: number) => api.get(`/api/pyqs/${id}`),
   downloadPYQ: (id: number) => api.post(`/api/pyqs/${id}/download`),
@@ -69,13 +71,13 @@ export const adminAPI = {
   getPendingNotes: () => api.get('/api/admin/notes/pending'),
   approveNote: (id: number) => api.post(`/api/admin/notes/${id}/approve`),
   deleteNote: (id: number) => api.delete(`/api/admin/notes/${id}`),
-  getAllNotes: (params?: { skip?: number; limit?: number }) =>
+  getAllNotes: (params?: { skip?: number; limit?: number; cursor?: string }) =>
     api.get('/api/admin/notes/all', { params }),
-  getAllPYQs: (params?: { skip?: number; limit?: number }) =>
+  getAllPYQs: (params?: { skip?: number; limit?: number; cursor?: string }) =>
     api.get('/api/admin/pyqs/all', { params }),
   deletePYQ: (id: number) => api.delete(`/api/admin/pyqs/${id}`),
   approvePYQ: (id: number) => api.post(`/api/admin/pyqs/${id}/approve`),
-  getAllUsers: (params?: { skip?: number; limit?: number }) =>
+  getAllUsers: (params?: { skip?: number; limit?: number; cursor?: string }) =>
     api.get('/api/admin/users/all', { params }),
   toggleUserActive: (id: number) => api.post(`/api/admin/users/${id}/toggle-active`),
   deleteUser: (id: number) => api.delete(`/api/admin/users/${id}`),
@@ -95,7 +97,7 @@ export const adminAPI = {
 export const aiAPI = {
   askDoubt: (data: { question: string; subject?: string; class_level?: string; chapter?: string }) =>
     api.post('/api/ai/doubt', data),
-  getDoubts: () => api.get('/api/ai/doubts'),
+  getDoubts: (params?: { limit?: number; cursor?: string }) => api.get('/api/ai/doubts', { params }),
   getDoubt: (id: number) => api.get(`/api/ai/doubts/${id}`),
   generateImportantQuestions: (data: { subject: string; class_level: string; chapter: string; count?: number }) =>
     api.post('/api/ai/important-questions', data),
@@ -137,6 +139,12 @@ export const searchAPI = {
 }
 
 // Exam Mode APIs
+export interface ExamAnswer {
+  question_id: number
+  selected_answer: string
+  time_spent_seconds?: number
+}
+
 export const examAPI = {
   createExam: (data: { subject?: string; class_level?: string; exam_type?: string; duration_minutes?: number; total_questions?: number; difficulty?: string }) =>
     api.post('/api/exam/create', data),
@@ -145,10 +153,16 @@ export const examAPI = {
   getQuestions: (examId: number) => api.get(`/api/exam/${examId}/questions`),
   submitAnswer: (examId: number, data: { question_id: number; selected_answer: string; time_spent_seconds?: number }) =>
     api.post(`/api/exam/${examId}/answer`, data),
+  submitAnswers: (examId: number, answers: ExamAnswer[]) =>
+    api.post(`/api/exam/${examId}/answers`, { answers }),
   submitExam: (examId: number) => api.post(`/api/exam/${examId}/submit`),
   getResult: (examId: number) => api.get(`/api/exam/${examId}/result`),
   getAnalysis: (examId: number, language?: string) => api.get(`/api/exam/${examId}/analysis`, { params: { language } }),
-  listExams: () => api.get('/api/exam/list'),
+  // Returns an array; pass the X-Next-Cursor response header back as cursor for the next page
+  listExams: (params?: { limit?: number; cursor?: string }) => api.get('/api/exam/list', { params }),
+  getRank: (examId: number) => api.get(`/api/exam/${examId}/rank`),
+  getLeaderboard: (params?: { subject?: string; class_level?: string; exam_type?: string; limit?: number }) =>
+    api.get('/api/exam/leaderboard', { params }),
 }
 
 export default api
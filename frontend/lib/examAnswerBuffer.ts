@@ -0,0 +1,98 @@
+import { examAPI, ExamAnswer } from './api'
+
+// Defaults mirror the backend's EXAM_ANSWER_DEBOUNCE_MS / EXAM_ANSWER_MAX_BATCH;
+// every batch response carries the server's current values in `sync`.
+const DEFAULT_DEBOUNCE_MS = 2000
+const DEFAULT_MAX_BATCH_SIZE = 100
+
+/**
+ * Buffers exam answers and sends them in batches to POST /api/exam/{id}/answers.
+ *
+ * Contract (see answer_sync_contract in the exam router):
+ * - one pending entry per question; a newer answer replaces the older one
+ * - flush after `debounceMs` without a new answer, or when the buffer is full
+ * - at most one batch in flight; answers given meanwhile go into the next batch
+ * - flush when the page is hidden and always before submitting the exam
+ * - a failed batch is merged back under newer answers and retried on the next flush
+ */
+export function createExamAnswerBuffer(examId: number) {
+  let pending: { [questionId: number]: ExamAnswer } = {}
+  let debounceMs = DEFAULT_DEBOUNCE_MS
+  let maxBatchSize = DEFAULT_MAX_BATCH_SIZE
+  let timer: ReturnType<typeof setTimeout> | null = null
+  let inFlight: Promise<void> | null = null
+
+  const pendingCount = () => Object.keys(pending).length
+
+  const send = async (): Promise<void> => {
+    const batch = pending
+    pending = {}
+    const answers = Object.keys(batch).map((id) => batch[Number(id)])
+    if (answers.length === 0) return
+    try {
+      const response = await examAPI.submitAnswers(examId, answers.slice(0, maxBatchSize))
+      const sync = response.data?.sync
+      if (sync) {
+        debounceMs = sync.debounce_ms
+        maxBatchSize = sync.max_batch_size
+      }
+      // Anything beyond the batch limit goes back to the buffer
+      answers.slice(maxBatchSize).forEach((answer) => {
+        if (!pending[answer.question_id]) pending[answer.question_id] = answer
+      })
+    } catch (error) {
+      // Keep unsent answers unless the student has answered the question again since
+      answers.forEach((answer) => {
+        if (!pending[answer.question_id]) pending[answer.question_id] = answer
+      })
+      throw error
+    }
+  }
+
+  const flush = async (): Promise<void> => {
+    if (timer) {
+      clearTimeout(timer)
+      timer = null
+    }
+    while (inFlight) await inFlight
+    if (pendingCount() === 0) return
+    inFlight = send().finally(() => {
+      inFlight = null
+    })
+    await inFlight
+    if (pendingCount() > 0) await flush()
+  }
+
+  const schedule = () => {
+    if (timer) clearTimeout(timer)
+    timer = setTimeout(() => {
+      flush().catch(() => undefined)
+    }, debounceMs)
+  }
+
+  const onVisibilityChange = () => {
+    if (document.visibilityState === 'hidden') flush().catch(() => undefined)
+  }
+  if (typeof document !== 'undefined') {
+    document.addEventListener('visibilitychange', onVisibilityChange)
+  }
+
+  return {
+    record(answer: ExamAnswer) {
+      pending[answer.question_id] = answer
+      if (pendingCount() >= maxBatchSize) {
+        flush().catch(() => undefined)
+      } else {
+        schedule()
+      }
+    },
+    flush,
+    pendingCount,
+    dispose() {
+      if (timer) clearTimeout(timer)
+      if (typeof document !== 'undefined') {
+        document.removeEventListener('visibilitychange', onVisibilityChange)
+      }
+    },
+  }
+}
@@ -54,6 +54,11 @@ export const useAuthStore = create<AuthState>((set) => ({
   },
 
   logout: () => {
+    const token = Cookies.get('access_token')
+    if (token) {
+      // Revoke the token server-side; logging out locally does not wait for it
+      authAPI.logout(token).catch(() => {})
+    }
     Cookies.remove('access_token')
     set({ user: null, token: null })
   },